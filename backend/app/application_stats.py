@@ -0,0 +1,184 @@
+"""Application funnel counters for the hiring dashboard.
+
+One small document per job plus one for all jobs together:
+
+  {"_id": <job_id> | {"all_jobs": true}, "total": 42,
+   "counts": {"Pending": 30, "Viewed": 7, "Shortlisted": 3, "Rejected": 2}}
+
+Job ids are strings (whatever the client sent), so the all-jobs _id is a
+document: no job id can ever land on it.
+
+apply / apply-file add one to the new application's status, a status
+change moves one from the old status to the new one ($inc, so concurrent
+writers never lose an update). The counters are updated right after the
+application write, not in the same transaction: reconcile() recounts
+everything with one $group and fixes any document that drifted, and
+runs every APPLICATION_STATS_RECONCILE_SECONDS and at startup.
+
+Environment:
+  APPLICATION_STATS_RECONCILE_SECONDS   recount interval (default 900)
+"""
+import asyncio
+import logging
+import os
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.database import application_collection, application_stats_collection
+
+logger = logging.getLogger(__name__)
+
+APPLICATION_STATS_RECONCILE_SECONDS = float(os.getenv("APPLICATION_STATS_RECONCILE_SECONDS", "900"))
+ALL_JOBS = {"all_jobs": True}
+STATUSES = ("Pending", "Unviewed", "Viewed", "Shortlisted", "Rejected")
+# Frontend in dono ko "Unviewed" dikhata hai (app/live.py UNVIEWED_QUERY bhi)
+UNVIEWED_STATUSES = ("Pending", "Unviewed")
+
+_tasks = []
+
+
+def status_key(status) -> str:
+    """Counter name for a status; missing means the model default, Pending."""
+    if not status:
+        return "Pending"
+    # ApplicationModel.status free text hai - field path mein "." ya "$" na jaye
+    return status if status in STATUSES else "Other"
+
+
+def _doc_id(job_id):
+    """Counter document _id for a job, or for all jobs when job_id is None."""
+    return ALL_JOBS if job_id is None else str(job_id)
+
+
+def _job_id(doc_id):
+    """Inverse of _doc_id (dict _ids are not hashable, None is)."""
+    return None if doc_id == ALL_JOBS else doc_id
+
+
+async def _inc(doc_id, counts: dict):
+    update = {
+        "$inc": {**{f"counts.{name}": n for name, n in counts.items()}, "total": sum(counts.values())},
+        "$set": {"updated_at": datetime.utcnow()},
+    }
+    try:
+        await application_stats_collection.update_one({"_id": doc_id}, update, upsert=True)
+    except DuplicateKeyError:
+        # Do pehli applications ek saath - haarne wala dobara, ab document mil jayega
+        await application_stats_collection.update_one({"_id": doc_id}, update, upsert=True)
+
+
+async def _apply(job_id, counts: dict):
+    counts = {name: n for name, n in counts.items() if n}
+    if not counts:
+        return
+    try:
+        await asyncio.gather(_inc(ALL_JOBS, counts), _inc(_doc_id(job_id), counts))
+    except PyMongoError as e:
+        # Application save ho chuki - request fail na karo, reconcile() theek kar dega
+        logger.warning("Application stats update for job %s failed: %s", job_id, e)
+
+
+async def count_new(job_id, status):
+    """One more application in status."""
+    await _apply(job_id, {status_key(status): 1})
+
+
+async def count_move(job_id, old_status, new_status):
+    """An application moved from old_status to new_status."""
+    old, new = status_key(old_status), status_key(new_status)
+    if old != new:
+        await _apply(job_id, {old: -1, new: 1})
+
+
+def _view(job_id, doc) -> dict:
+    counts = {name: 0 for name in STATUSES}
+    counts.update((doc or {}).get("counts") or {})
+    return {
+        "job_id": job_id,
+        "total": (doc or {}).get("total", 0),
+        "counts": counts,
+        "unviewed": sum(counts.get(name, 0) for name in UNVIEWED_STATUSES),
+        "updated_at": (doc or {}).get("updated_at"),
+    }
+
+
+async def get_stats(job_id=None) -> dict:
+    """Counters for one job, or for all jobs when job_id is None."""
+    job_id = str(job_id) if job_id else None
+    return _view(job_id, await application_stats_collection.find_one({"_id": _doc_id(job_id)}))
+
+
+async def unviewed_total():
+    """Unviewed applications over all jobs, or None before the first reconcile."""
+    doc = await application_stats_collection.find_one({"_id": ALL_JOBS}, {"counts": 1})
+    return None if doc is None else _view(None, doc)["unviewed"]
+
+
+# --- RECONCILIATION ---
+async def recount() -> dict:
+    """job id (None: all jobs) -> Counter of statuses, counted from the applications themselves."""
+    counted = defaultdict(Counter)
+    async for row in application_collection.aggregate([
+        {"$group": {"_id": {"job_id": "$job_id", "status": "$status"}, "count": {"$sum": 1}}},
+    ]):
+        key = status_key(row["_id"].get("status"))
+        counted[None][key] += row["count"]
+        counted[str(row["_id"].get("job_id"))][key] += row["count"]
+    return counted
+
+
+async def reconcile(fix: bool = True) -> dict:
+    """Compare the stored counters with a full recount; rewrite the ones that differ.
+
+    A status change landing between the recount and the rewrite can be
+    overwritten; the next run puts it right.
+    """
+    counted = await recount()
+    stored = {_job_id(doc["_id"]): doc async for doc in application_stats_collection.find({})}
+    drifted = []
+    for job_id in set(counted) | set(stored):
+        expected = {name: n for name, n in counted.get(job_id, {}).items() if n}
+        actual = {name: n for name, n in (stored.get(job_id) or {}).get("counts", {}).items() if n}
+        if expected == actual and (stored.get(job_id) or {}).get("total") == sum(expected.values()):
+            continue
+        drifted.append({"job_id": job_id, "stored": actual, "counted": expected})
+        if not fix:
+            continue
+        doc_id = _doc_id(job_id)
+        if expected:
+            await application_stats_collection.replace_one(
+                {"_id": doc_id},
+                {"counts": expected, "total": sum(expected.values()), "updated_at": datetime.utcnow()},
+                upsert=True,
+            )
+        else:
+            # Job ki saari applications khatam
+            await application_stats_collection.delete_one({"_id": doc_id})
+    if drifted:
+        logger.info("Application stats: %d counter documents drifted", len(drifted))
+    return {"documents": len(counted), "drifted": drifted, "fixed": fix}
+
+
+async def _reconcile_loop():
+    while True:
+        try:
+            await reconcile()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Application stats reconcile failed")
+        await asyncio.sleep(APPLICATION_STATS_RECONCILE_SECONDS)
+
+
+def start():
+    if not _tasks:
+        _tasks.append(asyncio.create_task(_reconcile_loop()))
+
+
+async def stop():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,139 @@
+"""Monthly attendance summaries kept up to date incrementally.
+
+approved_leaves (approved leave *days*), unapproved_absence,
+total_deduction and unpaid_days are stored on the attendance document.
+Leave approvals adjust approved_leaves for each affected employee/month
+in one atomic update, and the derived fields are recomputed inside the
+same update pipeline. Reads are then a plain indexed find.
+
+reconcile_month() recounts approved leave days from the leave calendar
+(app.leave_calendar) and reports (or fixes) any counter that drifted.
+"""
+from datetime import datetime, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+from app.database import attendance_collection, leave_days_collection
+
+
+def as_datetime(value):
+    """Leave dates may still be ISO strings on old documents."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# Pipeline stages jo stored counters se derived fields dobara nikalte hain
+DERIVED_FIELDS = [
+    {"$set": {"approved_leaves": {"$ifNull": ["$approved_leaves", 0]}}},
+    # unapproved_absence = absent_days - approved_leaves
+    {"$set": {"unapproved_absence": {"$max": [
+        0,
+        {"$subtract": [{"$ifNull": ["$absent_days", 0]}, "$approved_leaves"]},
+    ]}}},
+    # total_deduction based on unapproved_absence; unpaid_days for backward compatibility
+    {"$set": {
+        "total_deduction": {"$multiply": [
+            "$unapproved_absence", {"$ifNull": ["$daily_deduction", 0]},
+        ]},
+        "unpaid_days": {"$max": [
+            0,
+            {"$subtract": ["$unapproved_absence", {"$ifNull": ["$paid_leaves", 0]}]},
+        ]},
+    }},
+]
+
+
+def summary_key(employee_id: str, month: int, year: int) -> dict:
+    return {"employee_id": employee_id, "month": month, "year": year}
+
+
+def save_pipeline(fields: dict) -> list:
+    """Update pipeline that sets fields and recomputes the derived ones."""
+    literal = {name: {"$literal": value} for name, value in fields.items()}
+    return [{"$set": literal}, *DERIVED_FIELDS]
+
+
+def leave_delta_pipeline(delta: int) -> list:
+    """Update pipeline that adds delta to approved_leaves (never below 0)."""
+    return [
+        {"$set": {"approved_leaves": {"$max": [
+            0, {"$add": [{"$ifNull": ["$approved_leaves", 0]}, delta]},
+        ]}}},
+        *DERIVED_FIELDS,
+    ]
+
+
+def attendance_update(fields: dict):
+    """(filter, pipeline) that upserts admin-entered attendance.
+
+    approved_leaves stays the stored counter, whatever the client sent.
+    """
+    fields = {k: v for k, v in fields.items() if k not in ("approved_leaves", "unapproved_absence")}
+    key = summary_key(fields["employee_id"], fields["month"], fields["year"])
+    return key, save_pipeline(fields)
+
+
+async def upsert_summary(key: dict, update):
+    """update_one(upsert=True) on the unique (employee_id, month, year) key.
+
+    Two concurrent upserts for a missing row can both try the insert; the
+    loser gets a DuplicateKeyError and its retry matches the winner's row.
+    """
+    try:
+        return await attendance_collection.update_one(key, update, upsert=True)
+    except DuplicateKeyError:
+        return await attendance_collection.update_one(key, update, upsert=True)
+
+
+async def save_attendance(fields: dict):
+    """Upsert one attendance summary."""
+    return await upsert_summary(*attendance_update(fields))
+
+
+async def apply_leave_delta(employee_id: str, month: int, year: int, delta: int):
+    """Move the approved-leave counter of one employee/month by delta days."""
+    if not employee_id or delta == 0:
+        return
+    await upsert_summary(summary_key(employee_id, month, year), leave_delta_pipeline(delta))
+
+
+def approval_delta(old_status, new_status) -> int:
+    """+1 when a leave becomes Approved, -1 when it stops being Approved."""
+    return int(new_status == "Approved") - int(old_status == "Approved")
+
+
+async def recount_approved_leaves(month: int, year: int) -> dict:
+    """employee_id -> approved leave days in month/year, counted from scratch."""
+    pipeline = [
+        {"$match": {"month": month, "year": year}},
+        {"$group": {"_id": "$employee_id", "count": {"$sum": 1}}},
+    ]
+    return {row["_id"]: row["count"] async for row in leave_days_collection.aggregate(pipeline)}
+
+
+async def reconcile_month(month: int, year: int, fix: bool = False) -> list:
+    """Compare stored counters with a full recount; optionally repair them."""
+    expected = await recount_approved_leaves(month, year)
+    mismatches = []
+    async for att in attendance_collection.find(
+        {"month": month, "year": year}, {"employee_id": 1, "approved_leaves": 1}
+    ):
+        emp_id = att.get("employee_id")
+        want = expected.pop(emp_id, 0)
+        if att.get("approved_leaves", 0) != want:
+            mismatches.append({"employee_id": emp_id, "stored": att.get("approved_leaves", 0), "expected": want})
+    # Leaves hain magar attendance document abhi bana hi nahi
+    for emp_id, want in expected.items():
+        mismatches.append({"employee_id": emp_id, "stored": None, "expected": want})
+
+    if fix:
+        for row in mismatches:
+            await attendance_collection.update_one(
+                summary_key(row["employee_id"], month, year),
+                save_pipeline({"approved_leaves": row["expected"]}),
+                upsert=True,
+            )
+    return mismatches
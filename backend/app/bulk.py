@@ -0,0 +1,62 @@
+"""Helpers for the bulk import endpoints (CSV or JSON array bodies)."""
+import csv
+import io
+import json
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+
+MAX_BULK_ROWS = 10000
+
+
+async def read_rows(request: Request) -> list:
+    """Parse the request body as CSV (text/csv) or a JSON array of objects."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "csv" in content_type:
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            # Khali CSV cells ko missing field samjho taake defaults lag jayen
+            rows = [{k: v for k, v in row.items() if k and v not in ("", None)} for row in reader]
+        else:
+            rows = json.loads(body or b"[]")
+    except (UnicodeDecodeError, ValueError, csv.Error):
+        raise HTTPException(status_code=400, detail="Body must be CSV or a JSON array")
+
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise HTTPException(status_code=400, detail="Body must be a list of objects")
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ROWS} rows per request")
+    return rows
+
+
+def validate_rows(rows: list, model):
+    """Validate every row up front -> ({row_index: model}, {row_index: error})."""
+    valid, errors = {}, {}
+    for index, row in enumerate(rows):
+        try:
+            valid[index] = model(**row)
+        except ValidationError as e:
+            errors[index] = "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+    return valid, errors
+
+
+def write_errors(error) -> dict:
+    """BulkWriteError -> {operation index: message}."""
+    return {
+        err["index"]: err.get("errmsg", "write failed")
+        for err in error.details.get("writeErrors", [])
+    }
+
+
+def row_results(count: int, errors: dict, ok: dict) -> list:
+    """Per-row result list in input order."""
+    results = []
+    for index in range(count):
+        if index in errors:
+            results.append({"row": index, "status": "error", "detail": errors[index]})
+        else:
+            results.append({"row": index, **ok.get(index, {"status": "skipped"})})
+    return results
@@ -0,0 +1,188 @@
+"""Response cache with TTL, LRU eviction, ETags and explicit invalidation.
+
+Cached entries hold the encoded JSON body, so a hit costs no database
+call and no serialization. Every response carries a strong ETag, and a
+matching If-None-Match gets an empty 304.
+
+Keys are grouped in namespaces ("jobs", "employee"). Write endpoints call
+invalidate(namespace) after they change the data. Concurrent misses for
+the same key share one loader call (app.singleflight), so a burst right
+after an invalidation hits Mongo once. Each namespace has a generation,
+bumped by invalidate(): a fill started under an older generation is
+not stored, and callers after the invalidation start their own flight
+(the generation is in the flight key) instead of joining the stale one.
+The in-process backend
+only invalidates its own worker; with several uvicorn workers, plug in a
+shared backend (e.g. Redis) that implements CacheBackend.
+
+TTLCache is the small synchronous LRU + deadline map behind the auth
+caches (app.security) and the idempotency replays (app.idempotency).
+
+Environment:
+  RESPONSE_CACHE_SIZE   max entries (default 1024)
+  RESPONSE_CACHE_TTL    seconds an entry lives (default 300)
+"""
+import hashlib
+import os
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.responses import dumps
+from app.singleflight import flights
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+
+class TTLCache:
+    """Tiny LRU map whose entries also expire at a per-entry deadline."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, expires_at: float):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    headers: dict = field(default_factory=dict)
+
+
+class CacheBackend:
+    """Interface a cache store has to implement (all methods async)."""
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    async def set(self, key: str, entry: CacheEntry, ttl: float):
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str) -> int:
+        raise NotImplementedError
+
+    def size(self) -> int:
+        return 0
+
+
+class InMemoryCache(CacheBackend):
+    """Per-process LRU map with a TTL on every entry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    async def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        entry, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    async def set(self, key, entry, ttl):
+        self._data[key] = (entry, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def delete_prefix(self, prefix):
+        keys = [k for k in self._data if k.startswith(prefix)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def size(self):
+        return len(self._data)
+
+
+Loader = Callable[[], Awaitable[Tuple[object, dict]]]
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0, "stale_fills": 0}
+        self._generations = Counter()  # namespace -> invalidate() count
+
+    @staticmethod
+    def key_for(request: Request) -> str:
+        """Route path + sorted query params, so ?a=1&b=2 == ?b=2&a=1."""
+        return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+    async def respond(self, request: Request, namespace: str, loader: Loader) -> Response:
+        """Serve from cache, or call loader() -> (data, headers) and cache it."""
+        key = f"{namespace}:{self.key_for(request)}"
+        entry = await self.backend.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            generation = self._generations[namespace]
+            entry = await flights.do(
+                f"cache.{namespace}", f"{generation}:{key}", lambda: self._fill(namespace, generation, key, loader)
+            )
+        else:
+            self.stats["hits"] += 1
+
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"}
+        if entry.etag in request.headers.get("if-none-match", ""):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    async def _fill(self, namespace: str, generation: int, key: str, loader: Loader) -> CacheEntry:
+        data, headers = await loader()
+        body = dumps(data)
+        entry = CacheEntry(body, f'"{hashlib.sha1(body).hexdigest()}"', headers)
+        if self._generations[namespace] != generation:
+            # Load ke dauran write + invalidate hua - yeh data purana ho sakta hai, store na karo
+            self.stats["stale_fills"] += 1
+            return entry
+        await self.backend.set(key, entry, self.ttl)
+        return entry
+
+    async def invalidate(self, namespace: str):
+        self.stats["invalidations"] += 1
+        self._generations[namespace] += 1
+        await self.backend.delete_prefix(f"{namespace}:")
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": self.backend.size(),
+            "evictions": getattr(self.backend, "evictions", None),
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else None,
+        }
+
+
+response_cache = ResponseCache(InMemoryCache(RESPONSE_CACHE_SIZE), RESPONSE_CACHE_TTL)
@@ -0,0 +1,84 @@
+"""PDF text extraction and requirement-based CV scoring.
+
+Pure functions with no database imports, so they can run inside the
+scoring worker processes (app.scoring).
+"""
+import re
+import zlib
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # optional - fallback parser below handles simple PDFs
+    PdfReader = None
+
+_STREAM_RE = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+_TEXT_RE = re.compile(rb"\((?:\\.|[^\\)])*\)")
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"(": b"(", b")": b")", b"\\": b"\\"}
+
+
+def _unescape(raw: bytes) -> bytes:
+    return re.sub(rb"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), raw)
+
+
+def _fallback_text(data: bytes) -> str:
+    """Collect string operands from (optionally Flate-compressed) content streams."""
+    parts = []
+    for stream in _STREAM_RE.findall(data):
+        try:
+            stream = zlib.decompress(stream)
+        except zlib.error:
+            pass
+        parts.extend(_unescape(s[1:-1]) for s in _TEXT_RE.findall(stream))
+    return b" ".join(parts).decode("latin-1", errors="ignore")
+
+
+def extract_pdf_text(path: str) -> str:
+    """Best-effort plain text of a PDF file."""
+    if PdfReader is not None:
+        try:
+            return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+        except Exception:
+            pass
+    with open(path, "rb") as f:
+        return _fallback_text(f.read())
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens; keeps tech names like c++, c#, node.js."""
+    return [t.rstrip(".") for t in _TOKEN_RE.findall(text.lower())]
+
+
+def score_text(text: str, requirements: list, description: str = ""):
+    """(ai_score 0-100, ai_reasoning) for CV text against a job."""
+    tokens = set(tokenize(text))
+    if not tokens:
+        return 0, "No readable text found in CV."
+
+    # Har requirement ke saare words CV mein hon to match
+    wanted = [r for r in requirements if tokenize(r)]
+    if wanted:
+        matched = [r for r in wanted if set(tokenize(r)) <= tokens]
+        missing = [r for r in wanted if r not in matched]
+        score = round(100 * len(matched) / len(wanted))
+        reasoning = f"Matched {len(matched)}/{len(wanted)} requirements"
+        if matched:
+            reasoning += f": {', '.join(matched)}"
+        if missing:
+            reasoning += f". Missing: {', '.join(missing)}"
+        return score, reasoning + "."
+
+    # Requirements na hon to description ke words se overlap
+    keywords = {t for t in tokenize(description) if len(t) > 3}
+    if not keywords:
+        return 0, "Job has no requirements to score against."
+    overlap = keywords & tokens
+    score = round(100 * len(overlap) / len(keywords))
+    return score, f"Matched {len(overlap)}/{len(keywords)} description keywords."
+
+
+def score_cv(path: str, requirements: list, description: str = ""):
+    """Worker entry point: (ai_score, ai_reasoning, text) for a stored CV."""
+    text = extract_pdf_text(path)
+    score, reasoning = score_text(text, requirements, description)
+    return score, reasoning, text
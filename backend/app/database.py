@@ -1,20 +1,176 @@
+import logging
 import motor.motor_asyncio
 import os
+from pymongo.errors import OperationFailure
 from dotenv import load_dotenv
+from app.metrics import mongo_listener, pool_listener
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 MONGO_URL = os.getenv("MONGO_URI")
+DATABASE_NAME = "HR_System"
+
+# Connection pool / client settings (env se, sirf jo set hon)
+CLIENT_OPTIONS = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", int),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", int),
+    "maxIdleTimeMS": ("MONGO_MAX_IDLE_MS", int),
+    "waitQueueTimeoutMS": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", int),
+    "connectTimeoutMS": ("MONGO_CONNECT_TIMEOUT_MS", int),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", int),
+    "socketTimeoutMS": ("MONGO_SOCKET_TIMEOUT_MS", int),
+    "readPreference": ("MONGO_READ_PREFERENCE", str),
+    "compressors": ("MONGO_COMPRESSORS", str),  # e.g. "zstd,snappy,zlib"
+}
+
+client = None
+
+
+class ClientNotConnected(RuntimeError):
+    """A collection was used before connect() or after close()."""
+
+
+def client_options() -> dict:
+    options = {}
+    for option, (env_name, cast) in CLIENT_OPTIONS.items():
+        value = os.getenv(env_name)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+def connect():
+    """Create the Motor client (called from the FastAPI lifespan)."""
+    global client
+    if client is None:
+        # mongo_listener har command ka time request ke hisaab se record karta hai,
+        # pool_listener checked-out connections aur wait time
+        client = motor.motor_asyncio.AsyncIOMotorClient(
+            MONGO_URL,
+            event_listeners=[mongo_listener, pool_listener],
+            **client_options(),
+        )
+    return client
+
+
+def close():
+    """Close every pooled connection (called on shutdown)."""
+    global client
+    if client is not None:
+        client.close()
+        client = None
+
+
+def get_database():
+    # Chupke se naya client na banao: shutdown ke baad wala kaam (ya bhoola hua
+    # connect()) error de. Scripts (migrations, benchmarks) khud connect() karte hain.
+    if client is None:
+        raise ClientNotConnected("Mongo client is not connected; call database.connect() first")
+    return client[DATABASE_NAME]
+
+
+class _Collection:
+    """Module-level handle that resolves to the live client's collection.
 
-client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URL)
+    Routes import these at import time, before the lifespan has created
+    the client, so attribute access is forwarded on every use.
+    """
 
-# 1. Yeh hai tumhara MAIN DATABASE (Ghar)
-database = client.HR_System 
+    def __init__(self, name: str):
+        self.name = name
 
+    def __getattr__(self, attr):
+        return getattr(get_database()[self.name], attr)
+
+
+# 1. Yeh hai tumhara MAIN DATABASE (Ghar) - HR_System, connect() ke baad
 # 2. Yeh hain tumhare COLLECTIONS (Kamray)
 # Hum in variables ko pure project mein use karenge data save/get karne ke liye
-employee_collection = database.get_collection("employees")
-job_collection = database.get_collection("jobs")
-application_collection = database.get_collection("applications")
-leave_collection = database.get_collection("leaves")
-attendance_collection = database.get_collection("attendance")
\ No newline at end of file
+employee_collection = _Collection("employees")
+job_collection = _Collection("jobs")
+application_collection = _Collection("applications")
+leave_collection = _Collection("leaves")
+attendance_collection = _Collection("attendance")
+# Approved leaves, ek document per employee per din (app/leave_calendar.py)
+leave_days_collection = _Collection("leave_days")
+# CVs ka extracted text, search index ke liye (app/search_index.py)
+cv_text_collection = _Collection("cv_texts")
+# Content-addressed CV files: _id = sha256, refs = applications using it (app/uploads.py)
+cv_blob_collection = _Collection("cv_blobs")
+# Per-job application status counters, _id = job_id ya {"all_jobs": true} (app/application_stats.py)
+application_stats_collection = _Collection("application_stats")
+# Idempotency-Key ke stored responses, TTL se khud delete (app/idempotency.py)
+idempotency_collection = _Collection("idempotency_keys")
+
+# 3. INDEXES - har hot lookup ke liye
+# (collection, keys, options). create_index idempotent hai, is liye har
+# startup par dobara chalana safe hai.
+INDEXES = [
+    # Employees: login by email, admin add/signup by cnic + employee_code.
+    # Email tab tak "" rehta hai jab tak signup na ho, is liye partial index.
+    (employee_collection, [("email", 1)],
+     {"unique": True, "partialFilterExpression": {"email": {"$gt": ""}}}),
+    (employee_collection, [("cnic", 1)], {"unique": True}),
+    (employee_collection, [("employee_code", 1)], {"unique": True}),
+
+    # Attendance: one summary per employee per month
+    (attendance_collection, [("employee_id", 1), ("month", 1), ("year", 1)], {"unique": True}),
+    (attendance_collection, [("month", 1), ("year", 1)], {}),
+
+    # Leaves: my-leaves, and approved-leave counts by month
+    (leave_collection, [("employee_id", 1), ("status", 1), ("start_date", 1)], {}),
+    (leave_collection, [("status", 1), ("start_date", 1)], {}),
+    # Overlap check: same employee, start <= new end, end >= new start
+    (leave_collection, [("employee_id", 1), ("start_date", 1), ("end_date", 1)], {}),
+
+    # Leave calendar: per-leave rows, per-employee month counts, date ranges
+    (leave_days_collection, [("leave_id", 1), ("date", 1)], {"unique": True}),
+    (leave_days_collection, [("employee_id", 1), ("year", 1), ("month", 1), ("date", 1)], {}),
+    (leave_days_collection, [("month", 1), ("year", 1), ("employee_id", 1)], {}),
+    (leave_days_collection, [("date", 1), ("employee_id", 1)], {}),
+
+    # Applications: by job (HR) and by candidate (applicant)
+    (application_collection, [("job_id", 1), ("status", 1)], {}),
+    (application_collection, [("candidate_email", 1)], {}),
+    # CV scoring queue (app/scoring.py)
+    (application_collection, [("scoring_status", 1), ("next_attempt_at", 1)], {}),
+    # CV refcount recount (app/migrations.py)
+    (application_collection, [("cv_sha", 1)], {"sparse": True}),
+
+    # CV search index refresh
+    (cv_text_collection, [("updated_at", 1)], {}),
+
+    # Jobs: active listings
+    (job_collection, [("is_active", 1)], {}),
+
+    # Idempotency keys: Mongo khud expires_at par delete karta hai
+    (idempotency_collection, [("expires_at", 1)], {"expireAfterSeconds": 0}),
+]
+
+
+class MissingUniqueIndex(RuntimeError):
+    """A declared unique index could not be built (usually duplicate legacy data)."""
+
+
+async def ensure_indexes():
+    """Create every declared index (no-op for the ones that already exist).
+
+    Routes rely on the unique indexes for duplicate checks (DuplicateKeyError),
+    so if one of those cannot be built startup fails instead of letting
+    duplicates in. Other index failures are only logged.
+    """
+    missing = []
+    for collection, keys, options in INDEXES:
+        try:
+            await collection.create_index(keys, **options)
+        except OperationFailure as e:
+            # e.g. purane duplicate data ki wajah se unique index nahi ban saka
+            logger.error("Index %s on %s not created: %s", keys, collection.name, e)
+            if options.get("unique"):
+                missing.append(f"{collection.name} {keys}")
+    if missing:
+        raise MissingUniqueIndex(
+            "Unique indexes missing (remove the duplicate documents, then restart): " + "; ".join(missing)
+        )
@@ -0,0 +1,67 @@
+"""Streaming NDJSON / CSV exports straight from Motor cursors.
+
+Documents are pulled in batches and written out batch by batch, so memory
+stays flat however big the collection is.
+"""
+import csv
+import io
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.responses import dumps
+
+EXPORT_BATCH_SIZE = 500
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _plain(value):
+    """ObjectId / datetime -> str so csv can write them."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def batches(cursor, size: int = EXPORT_BATCH_SIZE):
+    """Yield lists of up to size documents from cursor."""
+    batch = []
+    async for doc in cursor.batch_size(size):
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def encode_rows(rows, fmt: str, columns):
+    """Turn an async iterator of row batches into NDJSON or CSV text chunks."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        async for batch in rows:
+            for row in batch:
+                writer.writerow([_plain(row.get(col)) for col in columns])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        async for batch in rows:
+            yield b"".join(dumps({col: row.get(col) for col in columns}) + b"\n" for row in batch)
+
+
+def export_response(rows, fmt: str, columns, filename: str) -> StreamingResponse:
+    """StreamingResponse for rows in the requested format (csv or ndjson)."""
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    return StreamingResponse(
+        encode_rows(rows, fmt, columns),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,271 @@
+"""Idempotency-Key support for the POST routes that create documents.
+
+A client that may retry (network error, timeout, double submit) sends the
+same Idempotency-Key header on every attempt. The first attempt runs the
+route and its response is stored in the idempotency_keys collection;
+later attempts get that stored response back, with an
+Idempotent-Replayed: true header, and the route does not run again.
+
+Concurrent duplicates: the first attempt claims the key by inserting an
+in-progress record (the _id is unique, so exactly one insert wins).
+Others get 409 with Retry-After until it finishes. A claim left behind
+by a crashed worker can be taken over after IDEMPOTENCY_LOCK_SECONDS.
+5xx responses and exceptions are not stored: the claim is removed so
+the retry runs the route again. A response too big to store still
+marks the key completed (without the body): the route did its work, so
+a retry gets 409 instead of running it a second time.
+
+A key belongs to one method + path, and reusing it with a different
+body gets 422. Records expire through a TTL index after IDEMPOTENCY_TTL.
+Completed responses are also kept in a per-process LRU, so a replay
+usually needs no Mongo read.
+
+Environment:
+  IDEMPOTENCY_TTL             seconds a key is remembered (default 86400)
+  IDEMPOTENCY_LOCK_SECONDS    in-progress claim lifetime (default 60)
+  IDEMPOTENCY_CACHE_SIZE      completed responses kept in memory (default 1024)
+"""
+import hashlib
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from app.cache import TTLCache
+from app.database import idempotency_collection
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# Is se bari response store nahi hoti (yeh routes chhota JSON dete hain)
+MAX_STORED_BODY = 256 * 1024
+
+# (method, path) jin par header maana jata hai
+IDEMPOTENT_ROUTES = {
+    ("POST", "/api/leaves/request"),
+    ("POST", "/api/applications/apply"),
+    ("POST", "/api/applications/apply-file"),
+    ("POST", "/api/jobs/create"),
+    ("POST", "/api/employee/add"),
+}
+# Replay mein yeh headers dobara nahi bhejte (server/CORS har dafa khud lagata hai)
+_SKIPPED_HEADERS = {b"content-length", b"date", b"server", b"set-cookie"}
+
+_completed = TTLCache(IDEMPOTENCY_CACHE_SIZE)
+stats = Counter()  # executed, replayed, memory_hits, in_progress, mismatched, released, not_stored
+
+
+class _Fingerprint:
+    """sha256 of the request body, minus the multipart boundary.
+
+    Browsers pick a new boundary for every send, so a retried upload
+    would otherwise never match its first attempt.
+    """
+
+    def __init__(self, boundary: bytes = b""):
+        self._digest = hashlib.sha256()
+        self._boundary = boundary
+        self._tail = b""
+
+    def update(self, chunk: bytes):
+        if not self._boundary:
+            self._digest.update(chunk)
+            return
+        # Boundary do chunks mein bata ho sakta hai - aakhri bytes agle chunk ke saath
+        data = (self._tail + chunk).replace(self._boundary, b"")
+        keep = len(self._boundary) - 1
+        self._digest.update(data[:-keep] if len(data) > keep else b"")
+        self._tail = data[-keep:] if len(data) > keep else data
+
+    def hexdigest(self) -> str:
+        digest = self._digest.copy()
+        digest.update(self._tail)
+        return digest.hexdigest()
+
+
+def _boundary(content_type: str) -> bytes:
+    if not content_type.startswith("multipart/"):
+        return b""
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary":
+            return value.strip('"').encode("latin-1")
+    return b""
+
+
+def _json_response(status: int, detail: str, extra_headers=()):
+    body = ('{"detail":"%s"}' % detail).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *extra_headers]
+    return status, headers, body
+
+
+async def _send_response(send, status: int, headers, body: bytes):
+    await send({"type": "http.response.start", "status": status, "headers": list(headers)})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _drain(receive, digest):
+    """Read (and hash) the whole request body without keeping it."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return False
+        digest.update(message.get("body", b""))
+        if not message.get("more_body"):
+            return True
+
+
+def _replay(record: dict):
+    headers = [(bytes(k), bytes(v)) for k, v in record["headers"]]
+    headers.append((b"content-length", str(len(record["body"])).encode()))
+    headers.append((REPLAYED_HEADER.lower().encode(), b"true"))
+    return record["status"], headers, bytes(record["body"])
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware; the request body streams through untouched."""
+
+    def __init__(self, app, routes=IDEMPOTENT_ROUTES):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            return await self.app(scope, receive, send)
+        key, content_type = None, ""
+        for name, value in scope["headers"]:
+            if name == b"idempotency-key":
+                key = value.decode("latin-1").strip()
+            elif name == b"content-type":
+                content_type = value.decode("latin-1")
+        if key is None:
+            return await self.app(scope, receive, send)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return await _send_response(send, *_json_response(400, f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters"))
+
+        record_id = f"{scope['method']} {scope['path']} {key}"
+        digest = _Fingerprint(_boundary(content_type))
+
+        record = _completed.get(record_id)
+        if record is not None:
+            stats["memory_hits"] += 1
+            return await self._respond_stored(record, receive, send, digest)
+
+        now = datetime.utcnow()
+        claim = {
+            "_id": record_id,
+            "state": "in_progress",
+            "created_at": now,
+            "locked_until": now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+            "expires_at": now + timedelta(seconds=IDEMPOTENCY_TTL),
+        }
+        try:
+            await idempotency_collection.insert_one(claim)
+        except DuplicateKeyError:
+            existing = await idempotency_collection.find_one({"_id": record_id})
+            if existing and existing["state"] == "completed":
+                _completed.set(record_id, existing, time.time() + IDEMPOTENCY_TTL)
+                return await self._respond_stored(existing, receive, send, digest)
+            # Crash ke baad phansa claim - waqt guzar gaya ho to hum le lete hain
+            taken = await idempotency_collection.find_one_and_update(
+                {"_id": record_id, "state": "in_progress", "locked_until": {"$lt": now}},
+                {"$set": {"locked_until": claim["locked_until"], "expires_at": claim["expires_at"]}},
+            )
+            if taken is None:
+                stats["in_progress"] += 1
+                return await _send_response(send, *_json_response(
+                    409, "A request with this Idempotency-Key is still being processed",
+                    [(b"retry-after", b"1")],
+                ))
+
+        await self._execute(scope, receive, send, record_id, digest)
+
+    async def _respond_stored(self, record: dict, receive, send, digest):
+        if not await _drain(receive, digest):
+            return
+        if digest.hexdigest() != record.get("fingerprint"):
+            stats["mismatched"] += 1
+            return await _send_response(send, *_json_response(
+                422, f"{HEADER} was already used with a different request body",
+            ))
+        if not record.get("cached", True):
+            stats["not_stored"] += 1
+            return await _send_response(send, *_json_response(
+                409, f"A request with this {HEADER} was already processed; its response was too large to store",
+            ))
+        stats["replayed"] += 1
+        await _send_response(send, *_replay(record))
+
+    async def _execute(self, scope, receive, send, record_id: str, digest):
+        response = {"status": 500, "headers": [], "body": bytearray(), "too_big": False}
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                digest.update(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    [name, value] for name, value in message.get("headers", []) if name.lower() not in _SKIPPED_HEADERS
+                ]
+            elif message["type"] == "http.response.body" and not response["too_big"]:
+                response["body"] += message.get("body", b"")
+                response["too_big"] = len(response["body"]) > MAX_STORED_BODY
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except BaseException:
+            await self._release(record_id)
+            raise
+        stats["executed"] += 1
+        if response["status"] >= 500:
+            await self._release(record_id)
+            return
+
+        if response["too_big"]:
+            # Kaam ho chuka - retry dobara na chale, bas body yaad nahi
+            record = {"state": "completed", "cached": False, "status": response["status"],
+                      "fingerprint": digest.hexdigest()}
+        else:
+            record = {
+                "state": "completed",
+                "status": response["status"],
+                "headers": response["headers"],
+                "body": bytes(response["body"]),
+                "fingerprint": digest.hexdigest(),
+            }
+        try:
+            await idempotency_collection.update_one({"_id": record_id}, {"$set": record})
+        except PyMongoError as e:
+            # Response ja chuka - record na bana to retry route dobara chalayega
+            logger.warning("Idempotency record %s not saved: %s", record_id, e)
+            await self._release(record_id)
+            return
+        _completed.set(record_id, record, time.time() + IDEMPOTENCY_TTL)
+
+    async def _release(self, record_id: str):
+        """Drop an unfinished claim so a retry runs the route again."""
+        stats["released"] += 1
+        try:
+            await idempotency_collection.delete_one({"_id": record_id, "state": "in_progress"})
+        except PyMongoError as e:
+            logger.warning("Idempotency claim %s not released: %s", record_id, e)
+
+
+def lines() -> list:
+    """Prometheus counters for /metrics."""
+    return ["# TYPE idempotency_requests_total counter"] + [
+        f'idempotency_requests_total{{result="{name}"}} {count}' for name, count in sorted(stats.items())
+    ]
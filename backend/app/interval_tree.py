@@ -0,0 +1,123 @@
+"""Balanced interval tree for leave overlap checks.
+
+An AVL tree keyed on interval start, where every node also stores the
+largest end in its subtree. Inserts are O(log n). Asking whether anything
+overlaps [start, end] is O(log n) too, because a subtree whose max end is
+before start cannot contain a match and is skipped.
+
+Intervals are closed: [1, 3] and [3, 5] overlap (a leave ending on the
+day another one starts is a clash).
+"""
+
+
+class _Node:
+    __slots__ = ("start", "end", "value", "max_end", "height", "left", "right")
+
+    def __init__(self, start, end, value):
+        self.start = start
+        self.end = end
+        self.value = value
+        self.max_end = end
+        self.height = 1
+        self.left = None
+        self.right = None
+
+
+def _height(node) -> int:
+    return node.height if node else 0
+
+
+def _update(node):
+    node.height = 1 + max(_height(node.left), _height(node.right))
+    node.max_end = node.end
+    for child in (node.left, node.right):
+        if child is not None and child.max_end > node.max_end:
+            node.max_end = child.max_end
+
+
+def _rotate_right(node):
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rotate_left(node):
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _balance(node):
+    _update(node)
+    diff = _height(node.left) - _height(node.right)
+    if diff > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if diff < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class IntervalTree:
+    """Closed intervals [start, end] with an attached value (e.g. the leave)."""
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, start, end, value=None):
+        if end < start:
+            raise ValueError("end cannot be before start")
+
+        def insert(node):
+            if node is None:
+                return _Node(start, end, value)
+            if start < node.start:
+                node.left = insert(node.left)
+            else:
+                node.right = insert(node.right)
+            return _balance(node)
+
+        self._root = insert(self._root)
+        self._size += 1
+
+    def first_overlap(self, start, end):
+        """(start, end, value) of one interval overlapping [start, end], or None."""
+        node = self._root
+        while node is not None:
+            if node.start <= end and start <= node.end:
+                return node.start, node.end, node.value
+            # Left subtree can only match if something there ends on/after start
+            if node.left is not None and node.left.max_end >= start:
+                node = node.left
+            else:
+                node = node.right
+        return None
+
+    def overlapping(self, start, end) -> list:
+        """Every (start, end, value) overlapping [start, end], ordered by start."""
+        found = []
+
+        def walk(node):
+            if node is None or node.max_end < start:
+                return
+            walk(node.left)
+            if node.start <= end and start <= node.end:
+                found.append((node.start, node.end, node.value))
+            if node.start <= end:
+                walk(node.right)
+
+        walk(self._root)
+        return found
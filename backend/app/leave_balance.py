@@ -0,0 +1,188 @@
+"""Leave conflict detection and paid-leave balance.
+
+Overlaps: a new leave may not overlap a Pending or Approved leave of the
+same employee. At request time this is one indexed range query on
+(employee_id, start_date, end_date). validate_batch() checks many
+proposed leaves at once against an in-memory IntervalTree per employee
+(app.interval_tree), including against each other.
+
+Two concurrent requests can both pass the overlap query before either
+is inserted, so request_leave re-checks after its insert and the newer
+of two overlapping leaves (larger _id) is removed again.
+
+Balance: only paid leave types (PAID_LEAVE_TYPES) use the balance.
+Approving one reserves its days on the employee's paid_leaves_used in
+one conditional update, so two concurrent approvals cannot spend the
+same days. The reserved count is kept on the leave (paid_days_reserved)
+and given back when the leave stops being Approved.
+
+Environment:
+  PAID_LEAVE_TYPES   comma separated leave types charged to the balance (default "Casual,Annual")
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.attendance_summary import as_datetime
+from app.database import employee_collection, leave_collection
+from app.interval_tree import IntervalTree
+from app.security import invalidate_employee
+
+# Yeh statuses calendar mein jagah gherte hain
+ACTIVE_STATUSES = ["Pending", "Approved"]
+DEFAULT_PAID_LEAVES = 20
+PAID_LEAVE_TYPES = {
+    name.strip().lower() for name in os.getenv("PAID_LEAVE_TYPES", "Casual,Annual").split(",") if name.strip()
+}
+
+
+def is_paid_leave(leave: dict) -> bool:
+    """Does this leave's type draw on paid_leaves_total? ("Casual Leave" == "Casual")"""
+    leave_type = (leave.get("leave_type") or "Casual").strip().lower()
+    if leave_type.endswith(" leave"):
+        leave_type = leave_type[: -len(" leave")]
+    return leave_type in PAID_LEAVE_TYPES
+
+
+def leave_span(leave: dict):
+    """(first day, last day) at midnight, or None if the dates are missing."""
+    start = as_datetime(leave.get("start_date"))
+    end = as_datetime(leave.get("end_date")) or start
+    if not isinstance(start, datetime) or not isinstance(end, datetime):
+        return None
+    return datetime(start.year, start.month, start.day), datetime(end.year, end.month, end.day)
+
+
+def span_days(span) -> int:
+    return (span[1] - span[0]).days + 1
+
+
+async def find_overlap(employee_id: str, span, exclude_id=None, older_than=None):
+    """An active leave of employee_id sharing a day with span, or None.
+
+    older_than: only leaves with a smaller _id (the re-check after insert).
+    """
+    first_day, last_day = span
+    query = {
+        "employee_id": employee_id,
+        "status": {"$in": ACTIVE_STATUSES},
+        "start_date": {"$lt": last_day + timedelta(days=1)},
+        "end_date": {"$gte": first_day},
+    }
+    if exclude_id is not None:
+        query["_id"] = {"$ne": exclude_id}
+    if older_than is not None:
+        query["_id"] = {"$lt": older_than}
+    return await leave_collection.find_one(query, {"start_date": 1, "end_date": 1, "status": 1})
+
+
+def _remaining(emp: dict) -> int:
+    total = emp.get("paid_leaves_total", DEFAULT_PAID_LEAVES) or 0
+    return total - (emp.get("paid_leaves_used") or 0)
+
+
+async def remaining_balance(employee_id: str):
+    """Unreserved paid leave days of employee_id, or None if unknown."""
+    emp = await employee_collection.find_one(
+        {"employee_code": employee_id}, {"paid_leaves_total": 1, "paid_leaves_used": 1}
+    )
+    return _remaining(emp) if emp else None
+
+
+async def reserve_paid_leave(employee_id: str, days: int) -> bool:
+    """Add days to paid_leaves_used if the balance allows it (atomic).
+
+    False means not enough balance - or no such employee; callers tell
+    the two apart with remaining_balance().
+    """
+    if days <= 0:
+        return True
+    updated = await employee_collection.find_one_and_update(
+        {
+            "employee_code": employee_id,
+            "$expr": {"$lte": [
+                {"$add": [{"$ifNull": ["$paid_leaves_used", 0]}, days]},
+                {"$ifNull": ["$paid_leaves_total", DEFAULT_PAID_LEAVES]},
+            ]},
+        },
+        {"$inc": {"paid_leaves_used": days}},
+        projection={"_id": 1},
+    )
+    if updated is None:
+        return False
+    # /me (get_current_employee) purana balance na dikhaye
+    invalidate_employee(updated["_id"])
+    return True
+
+
+async def release_paid_leave(employee_id: str, days: int):
+    """Give back days reserved by reserve_paid_leave()."""
+    if days > 0:
+        updated = await employee_collection.find_one_and_update(
+            {"employee_code": employee_id}, {"$inc": {"paid_leaves_used": -days}}, projection={"_id": 1}
+        )
+        if updated is not None:
+            invalidate_employee(updated["_id"])
+
+
+async def validate_batch(leaves: list, row_numbers=None) -> list:
+    """Check proposed leaves for overlaps and balance, in order.
+
+    Each proposal is checked against the employee's existing active
+    leaves and against earlier accepted proposals of the same batch
+    (named by row_numbers[i], default i, in the error).
+    Returns one {"ok", "days", "error"} dict per input.
+    """
+    spans = [leave_span(leave) for leave in leaves]
+    row_numbers = row_numbers or list(range(len(leaves)))
+    employee_ids = sorted({leave.get("employee_id") for leave in leaves if leave.get("employee_id")})
+
+    trees = defaultdict(IntervalTree)
+    balance = {}
+    if employee_ids:
+        cursor = leave_collection.find(
+            {"employee_id": {"$in": employee_ids}, "status": {"$in": ACTIVE_STATUSES}},
+            {"employee_id": 1, "start_date": 1, "end_date": 1, "status": 1},
+        )
+        async for existing in cursor:
+            span = leave_span(existing)
+            if span:
+                # Purane data mein end < start ho sakta hai
+                trees[existing["employee_id"]].add(
+                    span[0], max(span), f"{(existing.get('status') or '').lower()} leave {existing['_id']}"
+                )
+        async for emp in employee_collection.find(
+            {"employee_code": {"$in": employee_ids}},
+            {"employee_code": 1, "paid_leaves_total": 1, "paid_leaves_used": 1},
+        ):
+            balance[emp["employee_code"]] = _remaining(emp)
+
+    results = []
+    for index, (leave, span) in enumerate(zip(leaves, spans)):
+        employee_id = leave.get("employee_id")
+        result = {"ok": False, "days": 0, "error": None}
+        results.append(result)
+        if not employee_id or span is None:
+            result["error"] = "employee_id, start_date and end_date are required"
+            continue
+        start, end = span
+        if end < start:
+            result["error"] = "end_date cannot be before start_date"
+            continue
+        result["days"] = span_days(span)
+        if employee_id not in balance:
+            result["error"] = "Employee not found"
+            continue
+        clash = trees[employee_id].first_overlap(start, end)
+        if clash:
+            result["error"] = f"Overlaps {clash[2]}"
+            continue
+        paid = is_paid_leave(leave)
+        if paid and result["days"] > balance[employee_id]:
+            result["error"] = f"Only {max(balance[employee_id], 0)} paid leave days left"
+            continue
+        result["ok"] = True
+        if paid:
+            balance[employee_id] -= result["days"]
+        trees[employee_id].add(start, end, f"row {row_numbers[index]}")
+    return results
@@ -0,0 +1,107 @@
+"""Per-employee, per-day calendar of approved leave.
+
+Every approved leave is expanded into one document per calendar day in
+the leave_days collection ({leave_id, employee_id, date, month, year}).
+Rows are added when a leave is approved and removed when it stops being
+approved. Multi-day and month-spanning leaves therefore count correctly,
+and date-range questions are plain indexed queries.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from pymongo.errors import BulkWriteError
+
+from app.attendance_summary import apply_leave_delta, approval_delta, as_datetime
+from app.database import leave_days_collection
+from app.singleflight import coalesce
+
+# Ghalat dates se hazaron documents na ban jayen
+MAX_LEAVE_DAYS = 366
+
+
+def _midnight(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+
+def expand_leave_days(start_date, end_date) -> list:
+    """Every calendar day from start_date to end_date, both inclusive."""
+    start = as_datetime(start_date)
+    end = as_datetime(end_date) if end_date else start
+    if not isinstance(start, datetime):
+        return []
+    start = _midnight(start)
+    end = _midnight(end) if isinstance(end, datetime) and end >= start else start
+    count = min((end - start).days + 1, MAX_LEAVE_DAYS)
+    return [start + timedelta(days=i) for i in range(count)]
+
+
+def days_per_month(days) -> Counter:
+    """(month, year) -> number of days."""
+    return Counter((day.month, day.year) for day in days)
+
+
+async def add_leave_days(leave: dict) -> list:
+    """Write calendar rows for an approved leave; returns the expanded days."""
+    days = expand_leave_days(leave.get("start_date"), leave.get("end_date"))
+    if not days or not leave.get("employee_id"):
+        return []
+    rows = [
+        {
+            "leave_id": leave["_id"],
+            "employee_id": leave["employee_id"],
+            "date": day,
+            "month": day.month,
+            "year": day.year,
+        }
+        for day in days
+    ]
+    try:
+        await leave_days_collection.insert_many(rows, ordered=False)
+    except BulkWriteError as e:
+        # Already expanded (e.g. retried approval) - duplicates are fine
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    return days
+
+
+async def remove_leave_days(leave: dict) -> list:
+    """Delete calendar rows of a leave that is no longer approved."""
+    days = expand_leave_days(leave.get("start_date"), leave.get("end_date"))
+    await leave_days_collection.delete_many({"leave_id": leave["_id"]})
+    return days
+
+
+async def sync_leave_status(leave: dict, old_status, new_status):
+    """Keep calendar rows and attendance counters in step with a status change."""
+    sign = approval_delta(old_status, new_status)
+    if sign == 0:
+        return
+    if sign > 0:
+        days = await add_leave_days(leave)
+    else:
+        days = await remove_leave_days(leave)
+    for (month, year), count in days_per_month(days).items():
+        await apply_leave_delta(leave.get("employee_id"), month, year, sign * count)
+
+
+@coalesce("leaves.calendar")
+async def employees_on_leave(start: datetime, end: datetime) -> list:
+    """Who is on approved leave between start and end (inclusive)."""
+    pipeline = [
+        {"$match": {"date": {"$gte": _midnight(start), "$lte": _midnight(end)}}},
+        {"$group": {"_id": "$employee_id", "days": {"$sum": 1}, "dates": {"$push": "$date"}}},
+        {"$sort": {"_id": 1}},
+    ]
+    return [
+        {"employee_id": row["_id"], "days": row["days"], "dates": sorted(row["dates"])}
+        async for row in leave_days_collection.aggregate(pipeline)
+    ]
+
+
+async def employee_leave_days(employee_id: str, month: int, year: int) -> list:
+    """Approved leave dates of one employee in month/year."""
+    cursor = leave_days_collection.find(
+        {"employee_id": employee_id, "month": month, "year": year},
+        {"_id": 0, "date": 1},
+    ).sort("date", 1)
+    return [row["date"] async for row in cursor]
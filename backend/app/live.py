@@ -0,0 +1,233 @@
+"""Live updates for the admin dashboards (Server-Sent Events).
+
+One change stream per watched collection (leaves, applications) feeds a
+Broadcaster that fans every delta out to all connected subscribers, so
+the number of Mongo cursors does not grow with the number of open
+dashboards. Recent events sit in a ring buffer: a client reconnecting
+with Last-Event-ID gets what it missed, or a "reset" event telling it to
+reload when it has been away too long. The watchers keep the Mongo
+resume token and pick the stream up where it stopped after an error.
+
+The "unviewed" event carries the number of applications nobody has
+looked at yet (status missing, Pending or Unviewed); it is re-read from
+the funnel counters (app.application_stats) at most once per
+UNVIEWED_DEBOUNCE after an application changes.
+
+Change streams need a replica set. On a standalone server the watchers
+stop and the write routes publish their own changes through
+publish_local(), which covers a single-process deployment.
+
+Environment:
+  LIVE_BUFFER_SIZE     events kept for Last-Event-ID replay (default 1000)
+  LIVE_QUEUE_SIZE      events a slow subscriber may fall behind (default 256)
+"""
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import deque
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.application_stats import unviewed_total
+from app.database import application_collection, leave_collection
+
+logger = logging.getLogger(__name__)
+
+LIVE_BUFFER_SIZE = int(os.getenv("LIVE_BUFFER_SIZE", "1000"))
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "256"))
+UNVIEWED_DEBOUNCE = 1.0
+RETRY_SECONDS = 5
+UNVIEWED_QUERY = {"$or": [{"status": {"$exists": False}}, {"status": {"$in": ["Pending", "Unviewed", None]}}]}
+WATCHED = {"leaves": leave_collection, "applications": application_collection}
+
+
+class Subscriber:
+    def __init__(self, topics):
+        self.topics = set(topics)
+        self.queue = asyncio.Queue(maxsize=LIVE_QUEUE_SIZE)
+        # Queue bhar gayi to band - client Last-Event-ID se wapas aayega
+        self.overflowed = False
+
+
+class Broadcaster:
+    """Fan-out of (seq, topic, data) events with a replay buffer.
+
+    Event ids are "<epoch>-<seq>"; the epoch changes on every restart so
+    an id from before a restart is never mistaken for a current one.
+    """
+
+    def __init__(self, buffer_size: int = LIVE_BUFFER_SIZE):
+        self.epoch = format(time.time_ns() // 1_000_000, "x")
+        self._ids = itertools.count(1)
+        self.last_id = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, topic: str, data: dict):
+        event = (next(self._ids), topic, data)
+        self.last_id = event[0]
+        self._buffer.append(event)
+        self.published += 1
+        for sub in list(self._subscribers):
+            if topic not in sub.topics or sub.overflowed:
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                sub.overflowed = True
+                self.dropped += 1
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def subscribe(self, topics, last_event_id=None):
+        """New subscriber plus the events it missed since last_event_id.
+
+        Returns (subscriber, missed) where missed is None if those events
+        are gone (restart, or older than the buffer) and the client
+        should reload.
+        """
+        sub = Subscriber(topics)
+        missed = []
+        if last_event_id:
+            epoch, _, seq = last_event_id.partition("-")
+            seq = int(seq) if seq.isdigit() else -1
+            oldest = self._buffer[0][0] if self._buffer else self.last_id + 1
+            if epoch != self.epoch or seq < oldest - 1 or seq > self.last_id:
+                missed = None
+            else:
+                missed = [e for e in self._buffer if e[0] > seq and e[1] in sub.topics]
+        self._subscribers.add(sub)
+        return sub, missed
+
+    def unsubscribe(self, sub: Subscriber):
+        self._subscribers.discard(sub)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+            "buffered": len(self._buffer),
+            "change_streams": sorted(name for name, ok in _streaming.items() if ok),
+        }
+
+
+broadcaster = Broadcaster()
+
+_tasks = []
+_streaming = {}  # collection name -> change stream running
+_unviewed = {"count": None, "scheduled": False}
+
+
+def _delta(topic: str, change: dict) -> dict:
+    """Small JSON-able delta of one change event."""
+    delta = {"collection": topic, "op": change.get("operationType"), "id": str(change.get("documentKey", {}).get("_id"))}
+    if "fullDocument" in change and change["fullDocument"] is not None:
+        delta["doc"] = change["fullDocument"]
+    description = change.get("updateDescription")
+    if description:
+        delta["updated"] = description.get("updatedFields") or {}
+        delta["removed"] = description.get("removedFields") or []
+    return delta
+
+
+def _changed(topic: str, delta: dict):
+    broadcaster.publish(topic, delta)
+    if topic == "applications":
+        _schedule_unviewed()
+
+
+def publish_local(topic: str, op: str, doc_id, fields: dict):
+    """Publish a write made by this process when change streams are unavailable."""
+    if _streaming.get(topic):
+        return  # change stream isko khud bhejega
+    delta = {"collection": topic, "op": op, "id": str(doc_id)}
+    delta["doc" if op == "insert" else "updated"] = fields
+    _changed(topic, delta)
+
+
+# --- UNVIEWED COUNT ---
+async def _count_unviewed() -> int:
+    count = await unviewed_total()
+    if count is None:
+        # Counters abhi reconcile nahi huay (pehla startup) - seedha gino
+        count = await application_collection.count_documents(UNVIEWED_QUERY)
+    return count
+
+
+async def unviewed_count() -> int:
+    if _unviewed["count"] is None:
+        _unviewed["count"] = await _count_unviewed()
+    return _unviewed["count"]
+
+
+def _schedule_unviewed():
+    if _unviewed["scheduled"]:
+        return
+    _unviewed["scheduled"] = True
+    _tasks.append(asyncio.create_task(_recount_unviewed()))
+
+
+async def _recount_unviewed():
+    task = asyncio.current_task()
+    try:
+        # Debounce: ek second ki saari changes ka ek hi count
+        await asyncio.sleep(UNVIEWED_DEBOUNCE)
+        _unviewed["scheduled"] = False
+        count = await _count_unviewed()
+        if count != _unviewed["count"]:
+            _unviewed["count"] = count
+            broadcaster.publish("unviewed", {"count": count})
+    except PyMongoError as e:
+        _unviewed["scheduled"] = False
+        logger.warning("Unviewed recount failed: %s", e)
+    finally:
+        if task in _tasks:
+            _tasks.remove(task)
+
+
+# --- CHANGE STREAMS ---
+async def _watch(topic: str, collection):
+    token = None
+    while True:
+        try:
+            async with collection.watch(resume_after=token) as stream:
+                _streaming[topic] = True
+                async for change in stream:
+                    token = change["_id"]
+                    _changed(topic, _delta(topic, change))
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            # 40573: standalone server, change streams nahi - local publish par chalo
+            if e.code == 40573 or "replica set" in str(e):
+                logger.info("Change streams unavailable for %s; using in-process events", topic)
+                _streaming[topic] = False
+                return
+            logger.warning("Change stream on %s failed: %s", topic, e)
+            # Token expire ho gaya ho to naye sire se
+            if e.code in (260, 280, 286):
+                token = None
+        except PyMongoError as e:
+            logger.warning("Change stream on %s interrupted: %s", topic, e)
+        _streaming[topic] = False
+        await asyncio.sleep(RETRY_SECONDS)
+
+
+def start():
+    for topic, collection in WATCHED.items():
+        _tasks.append(asyncio.create_task(_watch(topic, collection)))
+
+
+async def stop():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    _streaming.clear()
+    _unviewed.update(count=None, scheduled=False)
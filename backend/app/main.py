@@ -1,7 +1,18 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.database import database
+from app.cache import response_cache
+from app import idempotency
+from app import database
+from app.metrics import MetricsMiddleware, render as render_metrics
+from app.pagination import NEXT_CURSOR_HEADER
+from app.security import shutdown_executor
+from app.singleflight import flights
+from app.uploads import UploadLimitMiddleware
+from app import application_stats, live, scoring, search_index
+import asyncio
 import os
 
 # Saare Routes Import karo
@@ -11,14 +22,47 @@ from app.routes import (
     application_routes,
     leave_routes,
     attendance_routes,
+    live_routes,
+    cv_routes,
 )
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mongo client yahan banta hai (pool settings env se, app/database.py)
+    database.connect()
+    # Unique + compound indexes ensure karo
+    await database.ensure_indexes()
+    # CV scoring queue ke background workers
+    await scoring.start_workers()
+    # CV search index background mein build hota hai
+    search_task = asyncio.create_task(search_index.refresh())
+    # Application funnel counters: startup par aur phir har thodi der baad recount
+    application_stats.start()
+    # Leaves/applications change streams -> SSE subscribers
+    live.start()
+    try:
+        yield
+    finally:
+        search_task.cancel()
+        await live.stop()
+        await application_stats.stop()
+        await scoring.stop_workers()
+        shutdown_executor()
+        database.close()
 
-# PDF uploads ke liye static folder mount karo
+app = FastAPI(lifespan=lifespan)
+
+# PDF uploads ke liye static folder mount karo (purane /static/cv/<uuid>.pdf links;
+# naye CVs /cv/<sha>.pdf se aate hain - app/routes/cv_routes.py)
 os.makedirs("uploads/cv", exist_ok=True)
 app.mount("/static", StaticFiles(directory="uploads"), name="static")
 
+# Idempotency-Key wale POST retries stored response paate hain (CORS ke andar,
+# taake replay par bhi CORS headers lagen)
+app.add_middleware(idempotency.IdempotencyMiddleware)
+# Hadd se bari upload parse (aur idempotency claim) se pehle hi 413
+app.add_middleware(UploadLimitMiddleware)
+
 # --- CORS SETTING (Bohat Zaroori for Frontend Connection) ---
 # Iske baghair React backend se baat nahi kar payega
 origins = ["*"] # Abhi ke liye sab allow kardo
@@ -28,15 +72,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursor + idempotent replay/retry headers frontend ko nazar aane chahiye
+    expose_headers=[NEXT_CURSOR_HEADER, idempotency.REPLAYED_HEADER, "Retry-After"],
 )
+# Per-route latency + Mongo time (/metrics par Prometheus format)
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 async def read_root():
     return {"message": "HR System Backend is Fully Ready!"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    # Hit/miss counters - cache size tune karne ke liye
+    return response_cache.snapshot()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    cache = response_cache.snapshot()
+    extra = ["# TYPE response_cache_events_total counter"] + [
+        f'response_cache_events_total{{event="{name}"}} {cache[name]}'
+        for name in ("hits", "misses", "not_modified", "invalidations", "stale_fills")
+    ]
+    return render_metrics(extra + flights.lines() + idempotency.lines())
+
 # --- ROUTERS REGISTER KARO ---
 app.include_router(employee_routes.router, prefix="/api/employee", tags=["Employee"])
 app.include_router(job_routes.router, prefix="/api/jobs", tags=["Jobs"])
 app.include_router(application_routes.router, prefix="/api/applications", tags=["Applications"])
 app.include_router(leave_routes.router, prefix="/api/leaves", tags=["Leaves"])
-app.include_router(attendance_routes.router, prefix="/api/attendance", tags=["Attendance"])
\ No newline at end of file
+app.include_router(attendance_routes.router, prefix="/api/attendance", tags=["Attendance"])
+app.include_router(live_routes.router, prefix="/api/live", tags=["Live"])
+app.include_router(cv_routes.router, prefix="/cv", tags=["CV"])
\ No newline at end of file
@@ -0,0 +1,352 @@
+"""Request metrics, Mongo command timing and a slow-request log.
+
+MetricsMiddleware times every request per route template and tracks the
+number of requests in flight. MongoCommandListener is registered on the
+Motor client (app.database) and adds each command's duration, count and
+returned documents to the request that issued it. Motor runs commands
+with a copy of the caller's contextvars, so the listener can find that
+request.
+
+PoolStatsListener tracks open and checked-out pool connections and how
+long checkouts waited. render() produces the Prometheus text format
+served at /metrics.
+
+Environment:
+  SLOW_REQUEST_MS   log requests slower than this, with query shapes (default 500)
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from pymongo import monitoring
+
+logger = logging.getLogger("app.slow_requests")
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """DB work done while serving one request."""
+
+    __slots__ = ("db_seconds", "queries", "documents", "shapes")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.documents = 0
+        self.shapes = Counter()
+
+
+current_request: ContextVar = ContextVar("current_request", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+_lock = threading.Lock()
+_latency = defaultdict(Histogram)          # (method, route) -> Histogram
+_requests = Counter()                      # (method, route, status) -> count
+_route_db = defaultdict(lambda: [0.0, 0, 0])  # (method, route) -> [db seconds, queries, docs]
+_mongo = defaultdict(lambda: [0, 0.0, 0])  # (command, collection) -> [count, seconds, docs]
+_in_flight = 0
+
+
+# --- MONGO COMMAND MONITORING ---
+_QUERY_FIELDS = {
+    "find": "filter", "count": "query", "findAndModify": "query", "distinct": "query",
+}
+
+
+def query_shape(command_name: str, command) -> str:
+    """"find employees {employee_code}" - field names only, no values."""
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        collection = command.get("collection", "")
+    if command_name in _QUERY_FIELDS:
+        spec = command.get(_QUERY_FIELDS[command_name]) or {}
+    elif command_name in ("update", "delete"):
+        ops = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        spec = ops[0].get("q") or {}
+    elif command_name == "aggregate":
+        stages = command.get("pipeline") or [{}]
+        spec = stages[0].get("$match") or {}
+    else:
+        spec = {}
+    return f"{command_name} {collection} {{{', '.join(sorted(spec))}}}"
+
+
+def _documents(command_name: str, reply) -> int:
+    cursor = reply.get("cursor") if hasattr(reply, "get") else None
+    if cursor:
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") else 0
+    return 0
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Attributes Mongo time / queries / documents to the current request."""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        if event.command_name in ("hello", "isMaster", "ping", "endSessions", "saslStart", "saslContinue"):
+            return
+        self._pending[(event.connection_id, event.request_id)] = (
+            query_shape(event.command_name, event.command),
+            event.command.get(event.command_name) if event.command_name != "getMore" else event.command.get("collection"),
+        )
+
+    def _finish(self, event, documents: int):
+        info = self._pending.pop((event.connection_id, event.request_id), None)
+        if info is None:
+            return
+        shape, collection = info
+        seconds = event.duration_micros / 1e6
+        with _lock:
+            stats = _mongo[(event.command_name, str(collection))]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] += documents
+        req = current_request.get()
+        if req is not None:
+            req.db_seconds += seconds
+            req.queries += 1
+            req.documents += documents
+            req.shapes[shape] += 1
+
+    def succeeded(self, event):
+        self._finish(event, _documents(event.command_name, event.reply))
+
+    def failed(self, event):
+        self._finish(event, 0)
+
+
+mongo_listener = MongoCommandListener()
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Connection pool gauges: open / checked out, checkout wait time."""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        # Naye pymongo event par duration deta hai, warna khud naapo
+        waited = getattr(event, "duration", None)
+        if waited is None:
+            waited = time.perf_counter() - getattr(self._local, "started", time.perf_counter())
+        with _lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def connection_check_out_failed(self, event):
+        with _lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with _lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with _lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with _lock:
+            self.open -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def lines(self) -> list:
+        return [
+            "# TYPE mongo_pool_connections gauge",
+            f"mongo_pool_connections {self.open}",
+            "# TYPE mongo_pool_checked_out gauge",
+            f"mongo_pool_checked_out {self.checked_out}",
+            "# TYPE mongo_pool_checkouts_total counter",
+            f"mongo_pool_checkouts_total {self.checkouts}",
+            "# TYPE mongo_pool_checkout_failures_total counter",
+            f"mongo_pool_checkout_failures_total {self.checkout_failures}",
+            "# TYPE mongo_pool_wait_seconds_total counter",
+            f"mongo_pool_wait_seconds_total {self.wait_seconds:.6f}",
+            "# TYPE mongo_pool_max_wait_seconds gauge",
+            f"mongo_pool_max_wait_seconds {self.max_wait_seconds:.6f}",
+        ]
+
+
+pool_listener = PoolStatsListener()
+
+
+# --- HTTP MIDDLEWARE ---
+def route_template(scope) -> str:
+    """/api/employee/EMP001 -> /api/employee/{employee_code} (keeps label count small)."""
+    if scope.get("route") is None and not scope.get("endpoint"):
+        return "unmatched"
+    path = scope.get("path", "")
+    # Mounts (e.g. /static) apna prefix root_path mein daal dete hain
+    mount_prefix = scope.get("root_path", "")[len(scope.get("app_root_path", "")):]
+    if mount_prefix:
+        return mount_prefix + "/{path}"
+    params = {str(v): k for k, v in (scope.get("path_params") or {}).items()}
+    # Purane Starlette mein mount ka remaining path ek hi param hota hai
+    for value, name in params.items():
+        if "/" in value and path.endswith(value):
+            return path[: len(path) - len(value)].rstrip("/") + "/{" + name + "}"
+    return "/".join("{" + params[seg] + "}" if seg in params else seg for seg in path.split("/"))
+
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency, in-flight count, DB time."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        global _in_flight
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = {"code": 500}
+        started = time.perf_counter()
+        _in_flight += 1
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight -= 1
+            current_request.reset(token)
+            elapsed = time.perf_counter() - started
+            template = route_template(scope)
+            key = (scope["method"], template)
+            with _lock:
+                _latency[key].observe(elapsed)
+                _requests[(scope["method"], template, status["code"])] += 1
+                db = _route_db[key]
+                db[0] += stats.db_seconds
+                db[1] += stats.queries
+                db[2] += stats.documents
+            if elapsed * 1000 >= SLOW_REQUEST_MS:
+                logger.warning(
+                    "Slow request %s %s %.0fms status=%s db=%.0fms queries=%d docs=%d shapes=%s",
+                    scope["method"], template, elapsed * 1000, status["code"],
+                    stats.db_seconds * 1000, stats.queries, stats.documents,
+                    dict(stats.shapes.most_common(10)),
+                )
+
+
+def totals() -> dict:
+    """Requests and DB work summed over every route (benchmarks diff two snapshots)."""
+    with _lock:
+        return {
+            "requests": sum(_requests.values()),
+            "db_seconds": sum(db[0] for db in _route_db.values()),
+            "queries": sum(db[1] for db in _route_db.values()),
+            "documents": sum(db[2] for db in _route_db.values()),
+        }
+
+
+# --- PROMETHEUS TEXT FORMAT ---
+def _labels(**labels) -> str:
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render(extra_lines=()) -> str:
+    lines = []
+    with _lock:
+        lines += ["# TYPE http_requests_in_flight gauge", f"http_requests_in_flight {_in_flight}"]
+
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, code), count in sorted(_requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=code)} {count}")
+
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), hist in sorted(_latency.items()):
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                lines.append(
+                    f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {cumulative}"
+                )
+            lines.append(f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le='+Inf')} {hist.total}")
+            lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {hist.sum:.6f}")
+            lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {hist.total}")
+
+        # Har family apni # TYPE line ke neeche ikatthi (Prometheus parser interleaving reject karta hai)
+        route_db = sorted(_route_db.items())
+        for family, position, fmt in (
+            ("http_request_db_seconds_total", 0, "{:.6f}"),
+            ("http_request_db_queries_total", 1, "{}"),
+            ("http_request_db_documents_total", 2, "{}"),
+        ):
+            lines.append(f"# TYPE {family} counter")
+            for (method, route), values in route_db:
+                lines.append(f"{family}{_labels(method=method, route=route)} {fmt.format(values[position])}")
+
+        mongo = sorted(_mongo.items())
+        for family, position, fmt in (
+            ("mongo_commands_total", 0, "{}"),
+            ("mongo_command_seconds_total", 1, "{:.6f}"),
+            ("mongo_documents_returned_total", 2, "{}"),
+        ):
+            lines.append(f"# TYPE {family} counter")
+            for (command, collection), values in mongo:
+                lines.append(f"{family}{_labels(command=command, collection=collection)} {fmt.format(values[position])}")
+
+    lines.extend(pool_listener.lines())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
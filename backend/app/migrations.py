@@ -0,0 +1,213 @@
+"""One-time data migrations.
+
+Run from the backend folder:  python -m app.migrations
+Every migration is idempotent, so running it twice is harmless.
+"""
+import asyncio
+import hashlib
+import os
+import shutil
+from datetime import datetime, timezone
+
+from app.attendance_summary import reconcile_month
+from app import database
+from app.database import (
+    application_collection,
+    attendance_collection,
+    cv_blob_collection,
+    employee_collection,
+    leave_collection,
+    leave_days_collection,
+)
+from app.leave_balance import is_paid_leave, leave_span, span_days
+from app.leave_calendar import add_leave_days
+from app.uploads import CHUNK_SIZE, LEGACY_URL_PREFIX, blob_path, cv_path_from_url, cv_url_for
+
+
+def _parse_date(value: str):
+    """Parse an ISO string (with optional trailing Z) into a naive UTC datetime."""
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+# 1. LEAVE DATES: string start_date/end_date -> real BSON dates
+async def normalize_leave_dates():
+    """Convert string start_date/end_date values on leaves into datetimes.
+
+    Old leaves were saved with ISO strings, which stops attendance queries
+    from range-bounding on start_date. Unparseable values are left as-is
+    and reported.
+    """
+    converted, skipped = 0, []
+    query = {"$or": [
+        {"start_date": {"$type": "string"}},
+        {"end_date": {"$type": "string"}},
+    ]}
+    async for leave in leave_collection.find(query, {"start_date": 1, "end_date": 1}):
+        update = {}
+        try:
+            for field in ("start_date", "end_date"):
+                if isinstance(leave.get(field), str):
+                    update[field] = _parse_date(leave[field])
+        except ValueError:
+            skipped.append(str(leave["_id"]))
+            continue
+        await leave_collection.update_one({"_id": leave["_id"]}, {"$set": update})
+        converted += 1
+    return {"converted": converted, "skipped": skipped}
+
+
+# 2. LEAVE CALENDAR: har approved leave ko din-wise rows mein expand karo
+async def build_leave_calendar():
+    """Expand every approved leave into leave_days rows (duplicates are skipped)."""
+    expanded = 0
+    async for leave in leave_collection.find(
+        {"status": "Approved"}, {"employee_id": 1, "start_date": 1, "end_date": 1}
+    ):
+        if await add_leave_days(leave):
+            expanded += 1
+    return {"leaves": expanded}
+
+
+# 3. ATTENDANCE COUNTERS: approved_leaves ko stored counter banao
+async def backfill_attendance_counters():
+    """Reconcile approved_leaves for every month with attendance or leave days."""
+    months = set()
+    for collection in (attendance_collection, leave_days_collection):
+        months |= {
+            (row["_id"]["month"], row["_id"]["year"])
+            async for row in collection.aggregate(
+                [{"$group": {"_id": {"month": "$month", "year": "$year"}}}]
+            )
+        }
+    fixed = 0
+    for month, year in sorted(months, key=lambda m: (m[1], m[0])):
+        fixed += len(await reconcile_month(month, year, fix=True))
+    return {"months": len(months), "fixed": fixed}
+
+
+# 4. CV FILES: flat uploads/cv/<uuid>.pdf -> content-addressed uploads/cv/ab/cd/<sha>.pdf
+def _hash_file(path: str):
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _store(path: str, sha: str):
+    """Put a copy of path at blob_path(sha) unless that blob already exists."""
+    target = blob_path(sha)
+    if os.path.exists(target):
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(path, target)
+    except OSError:
+        shutil.copyfile(path, target)
+
+
+async def content_address_cvs():
+    """Move uploaded CVs into the sharded store and point applications at /cv/<sha>.pdf.
+
+    Old files are deleted only after every application using them was
+    updated, so a crash half-way leaves nothing dangling.
+    """
+    migrated, missing, old_files = 0, [], set()
+    async for app in application_collection.find(
+        {"cv_url": {"$regex": f"^{LEGACY_URL_PREFIX}"}}, {"cv_url": 1}
+    ):
+        path = cv_path_from_url(app["cv_url"])
+        if not os.path.isfile(path):
+            missing.append(str(app["_id"]))
+            continue
+        sha, _ = await asyncio.to_thread(_hash_file, path)
+        await asyncio.to_thread(_store, path, sha)
+        await application_collection.update_one(
+            {"_id": app["_id"]}, {"$set": {"cv_url": cv_url_for(sha), "cv_sha": sha}}
+        )
+        old_files.add(path)
+        migrated += 1
+
+    for path in old_files:
+        await asyncio.to_thread(os.remove, path)
+    return {"applications": migrated, "files_removed": len(old_files), "missing": missing, **await recount_cv_refs()}
+
+
+async def recount_cv_refs():
+    """Set cv_blobs.refs from the applications that actually point at each blob."""
+    refs = {
+        row["_id"]: row["count"]
+        async for row in application_collection.aggregate([
+            {"$match": {"cv_sha": {"$type": "string"}}},
+            {"$group": {"_id": "$cv_sha", "count": {"$sum": 1}}},
+        ])
+    }
+    for sha, count in refs.items():
+        path = blob_path(sha)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        await cv_blob_collection.update_one(
+            {"_id": sha},
+            {"$set": {"refs": count}, "$setOnInsert": {"size": size, "created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+    # Jin blobs ko koi application use nahi karti
+    orphaned = await cv_blob_collection.update_many({"_id": {"$nin": list(refs)}}, {"$set": {"refs": 0}})
+    return {"blobs": len(refs), "orphaned_blobs": orphaned.modified_count}
+
+
+# 5. PAID LEAVE: purani approved leaves ka balance paid_leaves_used mein
+async def backfill_paid_leave_reservations():
+    """Reserve the days of approved paid leaves from before reservations existed.
+
+    Leaves approved earlier have no paid_days_reserved; they get their
+    days. Then each employee's paid_leaves_used is set to the sum over
+    their approved leaves, which also drops what the old payroll
+    write-back had charged for unpaid leave types. Run it while nobody
+    is approving leaves.
+    """
+    reserved, skipped = 0, []
+    async for leave in leave_collection.find(
+        {"status": "Approved", "paid_days_reserved": {"$exists": False}},
+        {"employee_id": 1, "start_date": 1, "end_date": 1, "leave_type": 1},
+    ):
+        span = leave_span(leave)
+        if span is None:
+            skipped.append(str(leave["_id"]))
+            continue
+        days = span_days(span) if is_paid_leave(leave) else 0
+        await leave_collection.update_one({"_id": leave["_id"]}, {"$set": {"paid_days_reserved": days}})
+        reserved += 1
+
+    used = {
+        row["_id"]: row["days"]
+        async for row in leave_collection.aggregate([
+            {"$match": {"status": "Approved"}},
+            {"$group": {"_id": "$employee_id", "days": {"$sum": "$paid_days_reserved"}}},
+        ])
+    }
+    updated = 0
+    async for emp in employee_collection.find({}, {"employee_code": 1, "paid_leaves_used": 1}):
+        days = used.get(emp.get("employee_code"), 0)
+        if emp.get("paid_leaves_used") != days:
+            await employee_collection.update_one({"_id": emp["_id"]}, {"$set": {"paid_leaves_used": days}})
+            updated += 1
+    return {"leaves": reserved, "employees_updated": updated, "skipped": skipped}
+
+
+async def run_all():
+    database.connect()
+    print("normalize_leave_dates:", await normalize_leave_dates())
+    print("build_leave_calendar:", await build_leave_calendar())
+    print("backfill_attendance_counters:", await backfill_attendance_counters())
+    print("content_address_cvs:", await content_address_cvs())
+    print("backfill_paid_leave_reservations:", await backfill_paid_leave_reservations())
+    database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_all())
@@ -0,0 +1,77 @@
+"""Keyset pagination shared by the "/all" list endpoints.
+
+Pages are ordered by _id. The next page's cursor goes in the
+X-Next-Cursor response header so the body stays a plain list.
+"""
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, Query
+
+from app.responses import MongoJSONResponse
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class PageParams:
+    """limit / after / fields query parameters (use as a Depends)."""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+        after: Optional[str] = Query(None, description="_id of the last item of the previous page"),
+        fields: Optional[str] = Query(None, description="Comma separated fields to return"),
+    ):
+        self.limit = limit
+        self.after = after
+        self.fields = fields
+
+
+def build_projection(fields: Optional[str], hidden=()) -> Optional[dict]:
+    """Projection for ?fields=a,b - hidden fields (e.g. password) never go out."""
+    if not fields:
+        return {name: 0 for name in hidden} or None
+    wanted = [f.strip() for f in fields.split(",") if f.strip() and f.strip() not in hidden]
+    return {name: 1 for name in wanted} or {"_id": 1}
+
+
+def date_range(start: Optional[datetime], end: Optional[datetime]) -> Optional[dict]:
+    """{"$gte": start, "$lte": end} with missing ends left out."""
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = start
+    if end is not None:
+        bounds["$lte"] = end
+    return bounds or None
+
+
+async def load_page(collection, query: dict, page: PageParams, hidden=()):
+    """One page of documents matching query ordered by _id -> (docs, headers)."""
+    query = dict(query)
+    if page.after:
+        try:
+            query["_id"] = {"$gt": ObjectId(page.after)}
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Ek extra document mangwa kar pata chalta hai ke agla page hai ya nahi
+    cursor = (
+        collection.find(query, build_projection(page.fields, hidden))
+        .sort("_id", 1)
+        .limit(page.limit + 1)
+    )
+    docs = await cursor.to_list(length=page.limit + 1)
+    headers = {}
+    if len(docs) > page.limit:
+        docs = docs[:page.limit]
+        headers[NEXT_CURSOR_HEADER] = str(docs[-1]["_id"])
+    return docs, headers
+
+
+async def fetch_page(collection, query: dict, page: PageParams, hidden=()) -> MongoJSONResponse:
+    """load_page() encoded straight to JSON (ObjectId/datetime handled by the encoder)."""
+    docs, headers = await load_page(collection, query, page, hidden)
+    return MongoJSONResponse(docs, headers=headers)
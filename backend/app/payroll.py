@@ -0,0 +1,155 @@
+"""Whole-month payroll computed column-wise with NumPy.
+
+load_month() pulls the month's attendance and the matching employees into
+flat arrays, compute() does every employee in one vectorized pass, and
+write_back() saves the results on the attendance rows with bulk writes.
+
+Per employee and month:
+  unapproved    = max(0, absent_days - approved_leaves)
+  paid_days     = approved days of paid leave types (leave_days rows)
+  charged       = paid_days covered by the paid-leave balance
+  excess        = paid_days beyond the balance (unpaid)
+  deduction     = (unapproved + excess) * daily_deduction
+  net_pay       = max(0, salary - deduction)
+
+Sick and other unpaid-type leave is approved absence: never deducted,
+never charged. paid_leaves_used is reserved when a paid leave is
+approved (app.leave_balance), so it already includes this month's paid
+days and payroll only reads it. Re-running a month is idempotent.
+"""
+from collections import Counter
+
+import numpy as np
+from pymongo import UpdateOne
+
+from app.database import attendance_collection, employee_collection, leave_collection, leave_days_collection
+from app.leave_balance import is_paid_leave
+
+LOAD_BATCH = 5000
+WRITE_BATCH = 1000
+
+
+async def _paid_leave_days(month: int, year: int) -> Counter:
+    """employee code -> approved paid-type leave days in month/year."""
+    # Calendar rows per leave, phir un leaves ki type ek $in se
+    per_leave = {
+        row["_id"]: (row["employee_id"], row["days"])
+        async for row in leave_days_collection.aggregate([
+            {"$match": {"month": month, "year": year}},
+            {"$group": {"_id": "$leave_id", "employee_id": {"$first": "$employee_id"}, "days": {"$sum": 1}}},
+        ])
+    }
+    leave_ids = list(per_leave)
+    paid = Counter()
+    for start in range(0, len(leave_ids), LOAD_BATCH):
+        async for leave in leave_collection.find(
+            {"_id": {"$in": leave_ids[start:start + LOAD_BATCH]}}, {"leave_type": 1},
+        ):
+            if is_paid_leave(leave):
+                code, days = per_leave[leave["_id"]]
+                paid[code] += days
+    return paid
+
+
+async def load_month(month: int, year: int) -> dict:
+    """Columnar arrays for every attendance row of month/year."""
+    att_ids, codes = [], []
+    absent, approved, daily = [], [], []
+    cursor = attendance_collection.find(
+        {"month": month, "year": year},
+        {"employee_id": 1, "absent_days": 1, "approved_leaves": 1, "daily_deduction": 1},
+    ).batch_size(LOAD_BATCH)
+    async for att in cursor:
+        att_ids.append(att["_id"])
+        codes.append(att.get("employee_id"))
+        absent.append(att.get("absent_days") or 0)
+        approved.append(att.get("approved_leaves") or 0)
+        daily.append(att.get("daily_deduction") or 0.0)
+
+    # Employees batch-wise $in se, code -> (salary, total, used)
+    employees = {}
+    for start in range(0, len(codes), LOAD_BATCH):
+        async for emp in employee_collection.find(
+            {"employee_code": {"$in": codes[start:start + LOAD_BATCH]}},
+            {"_id": 0, "employee_code": 1, "salary": 1, "paid_leaves_total": 1, "paid_leaves_used": 1},
+        ):
+            employees[emp["employee_code"]] = (
+                emp.get("salary") or 0.0,
+                emp.get("paid_leaves_total") or 0,
+                emp.get("paid_leaves_used") or 0,
+            )
+    emp_rows = [employees.get(code, (0.0, 0, 0)) for code in codes]
+    paid_days = await _paid_leave_days(month, year)
+
+    return {
+        "attendance_id": att_ids,
+        "employee_code": codes,
+        "known_employee": np.array([code in employees for code in codes], dtype=bool),
+        "absent_days": np.array(absent, dtype=np.int64),
+        "approved_leaves": np.array(approved, dtype=np.int64),
+        "paid_leave_days": np.array([paid_days[code] for code in codes], dtype=np.int64),
+        "daily_deduction": np.array(daily, dtype=np.float64),
+        "salary": np.array([r[0] for r in emp_rows], dtype=np.float64),
+        "paid_leaves_total": np.array([r[1] for r in emp_rows], dtype=np.int64),
+        "paid_leaves_used": np.array([r[2] for r in emp_rows], dtype=np.int64),
+    }
+
+
+def compute(cols: dict) -> dict:
+    """Vectorized payroll for all rows at once (no Python loop)."""
+    # Is mahine ke paid din nikal kar baaki mahinon ka reserved balance
+    # (Sick waghera approved hain magar balance se nahi katte)
+    used_before = np.maximum(0, cols["paid_leaves_used"] - cols["paid_leave_days"])
+    available = np.maximum(0, cols["paid_leaves_total"] - used_before)
+    charged = np.minimum(cols["paid_leave_days"], available)
+    excess = cols["paid_leave_days"] - charged
+    unapproved = np.maximum(0, cols["absent_days"] - cols["approved_leaves"])
+    deduction = (unapproved + excess) * cols["daily_deduction"]
+    net_pay = np.maximum(0.0, cols["salary"] - deduction)
+    return {
+        "unapproved_absence": unapproved,
+        "leaves_charged": charged,
+        "excess_leaves": excess,
+        "deduction": deduction,
+        "net_pay": net_pay,
+        "paid_leaves_remaining": np.maximum(0, cols["paid_leaves_total"] - cols["paid_leaves_used"]),
+    }
+
+
+def summarize(cols: dict, result: dict) -> dict:
+    return {
+        "employees": int(len(cols["employee_code"])),
+        "unknown_employees": int((~cols["known_employee"]).sum()),
+        "gross": float(cols["salary"].sum()),
+        "deductions": float(result["deduction"].sum()),
+        "net_pay": float(result["net_pay"].sum()),
+    }
+
+
+def rows(cols: dict, result: dict, limit: int) -> list:
+    """First limit rows as plain dicts (for dry-run previews)."""
+    out = []
+    for i in range(min(limit, len(cols["employee_code"]))):
+        out.append({
+            "employee_id": cols["employee_code"][i],
+            "salary": float(cols["salary"][i]),
+            **{name: values[i].item() for name, values in result.items()},
+        })
+    return out
+
+
+async def write_back(cols: dict, result: dict, run_at) -> dict:
+    """Save payroll on the attendance rows."""
+    att_ops = []
+    for i, att_id in enumerate(cols["attendance_id"]):
+        att_ops.append(UpdateOne({"_id": att_id}, {"$set": {"payroll": {
+            "deduction": float(result["deduction"][i]),
+            "net_pay": float(result["net_pay"][i]),
+            "leaves_charged": int(result["leaves_charged"][i]),
+            "excess_leaves": int(result["excess_leaves"][i]),
+            "run_at": run_at,
+        }}}))
+
+    for start in range(0, len(att_ops), WRITE_BATCH):
+        await attendance_collection.bulk_write(att_ops[start:start + WRITE_BATCH], ordered=False)
+    return {"attendance_updated": len(att_ops)}
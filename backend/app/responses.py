@@ -0,0 +1,40 @@
+"""Fast JSON responses for Mongo documents.
+
+Documents go straight from the driver to JSON bytes: ObjectId and
+datetime are handled by the encoder, so routes don't have to walk every
+document to stringify _id, and FastAPI's jsonable_encoder pass is
+skipped. orjson is used when installed, otherwise the stdlib json.
+"""
+import json
+from datetime import date, datetime
+
+from bson import ObjectId
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional - stdlib fallback
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "tolist"):  # NumPy scalars/arrays (payroll)
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, default=_default, separators=(",", ":")).encode()
+
+
+class MongoJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -1,21 +1,30 @@
-from fastapi import APIRouter, Body, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, Body, Depends, UploadFile, File, Form, HTTPException, Query
 from pydantic import EmailStr
-from uuid import uuid4
 from bson import ObjectId
-import os
+from datetime import datetime
+from typing import Optional
+from pymongo import ReturnDocument
+from app import application_stats
 from app.models import ApplicationModel
-from app.database import application_collection
+from app.database import application_collection, job_collection
+from app.live import publish_local
+from app.pagination import PageParams, date_range, fetch_page
+from app.responses import MongoJSONResponse
+from app.scoring import notify as notify_scoring, queue_stats, queued_fields
+from app.search_index import cv_index, job_query, refresh_if_stale
+from app.uploads import add_blob_ref, cv_url_for, save_pdf_upload
 
 router = APIRouter()
 
 # 1. APPLY FOR JOB (Candidate CV upload karega)
 @router.post("/apply")
 async def apply_for_job(app: ApplicationModel = Body(...)):
-    # TODO: Yahan baad mein AI ka code ayega jo score calculate karega
-    # Abhi hum dummy score save kar rahe hain
-    app.ai_score = 85 
-    
-    new_app = await application_collection.insert_one(app.dict())
+    # AI score background worker (app/scoring.py) calculate karega
+    app_doc = {**app.dict(), **queued_fields()}
+    new_app = await application_collection.insert_one(app_doc)
+    await application_stats.count_new(app_doc["job_id"], app_doc.get("status"))
+    notify_scoring()
+    publish_local("applications", "insert", new_app.inserted_id, app_doc)
     return {"message": "Application Submitted", "id": str(new_app.inserted_id)}
 
 
@@ -27,24 +36,11 @@ async def apply_for_job_with_file(
     candidate_email: EmailStr = Form(...),
     file: UploadFile = File(...),
 ):
-    # Sirf PDF allow karo
-    if file.content_type != "application/pdf":
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    # Sirf PDF allow karo - chunks mein disk par, content hash ke naam se (app/uploads.py)
+    sha, size = await save_pdf_upload(file)
 
-    # Upload directory ensure karo
-    upload_dir = os.path.join("uploads", "cv")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    # Unique filename
-    filename = f"{uuid4().hex}.pdf"
-    file_path = os.path.join(upload_dir, filename)
-
-    file_bytes = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(file_bytes)
-
-    # Static URL jo frontend use karega
-    cv_url = f"/static/cv/{filename}"
+    # Immutable URL jo frontend use karega (GET /cv/{sha}.pdf)
+    cv_url = cv_url_for(sha)
 
     app_obj = ApplicationModel(
         job_id=job_id,
@@ -53,7 +49,12 @@ async def apply_for_job_with_file(
         cv_url=cv_url,
     )
 
-    new_app = await application_collection.insert_one(app_obj.dict())
+    app_doc = {**app_obj.dict(), **queued_fields(), "cv_sha": sha}
+    new_app = await application_collection.insert_one(app_doc)
+    await add_blob_ref(sha, size)
+    await application_stats.count_new(job_id, app_doc.get("status"))
+    notify_scoring()
+    publish_local("applications", "insert", new_app.inserted_id, app_doc)
     return {
         "message": "Application Submitted",
         "id": str(new_app.inserted_id),
@@ -63,37 +64,91 @@ async def apply_for_job_with_file(
 # 2. GET ALL APPLICATIONS (Admin dekhega - for counting unviewed)
 # This must come before /{job_id} to avoid route conflicts
 @router.get("/all")
-async def get_all_applications():
-    apps = []
-    async for app in application_collection.find():
-        app["_id"] = str(app["_id"])
-        apps.append(app)
-    return apps
+async def get_all_applications(
+    page: PageParams = Depends(),
+    status: Optional[str] = None,
+    job_id: Optional[str] = None,
+    applied_from: Optional[datetime] = None,
+    applied_to: Optional[datetime] = None,
+):
+    query = {}
+    if status:
+        query["status"] = status
+    if job_id:
+        query["job_id"] = job_id
+    applied_range = date_range(applied_from, applied_to)
+    if applied_range:
+        query["applied_at"] = applied_range
+    return await fetch_page(application_collection, query, page)
+
+# 2.a FUNNEL COUNTERS (dashboard: ek chhota document, poori collection nahi)
+# This must come before /{job_id} as well
+@router.get("/stats")
+async def get_application_stats(job_id: Optional[str] = None):
+    """Applications per status for one job, or for all jobs."""
+    return MongoJSONResponse(await application_stats.get_stats(job_id))
+
+# 2.a.1 SCORING QUEUE STATS (queue depth + throughput)
+@router.get("/scoring/stats")
+async def get_scoring_stats():
+    return await queue_stats()
+
+# 2.a.2 SEARCH CANDIDATES (skills query ya job ke liye best CVs)
+@router.get("/search")
+async def search_applications(
+    q: Optional[str] = None,
+    job_id: Optional[str] = None,
+    k: int = Query(10, ge=1, le=100),
+):
+    """Top-k applications ranked by BM25 over CV text."""
+    if not q:
+        if not job_id:
+            raise HTTPException(status_code=400, detail="Provide q or job_id")
+        try:
+            job = await job_collection.find_one({"_id": ObjectId(job_id)}, {"requirements": 1, "description": 1})
+        except Exception:
+            job = None
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        q = job_query(job)
+
+    await refresh_if_stale()
+    hits = cv_index.search(q, k=k, job_id=job_id)
+    if not hits:
+        return []
+
+    docs = {
+        str(app["_id"]): app
+        async for app in application_collection.find(
+            {"_id": {"$in": [ObjectId(doc_id) for doc_id, _ in hits]}}
+        )
+    }
+    results = []
+    for doc_id, score in hits:
+        app = docs.get(doc_id)
+        if app:
+            app["search_score"] = round(score, 4)
+            results.append(app)
+    return MongoJSONResponse(results)
 
 # 2.b GET APPLICATIONS BY CANDIDATE EMAIL (Applicant dekhega)
 @router.get("/candidate/{candidate_email}")
 async def get_applications_by_candidate(candidate_email: str):
-    apps = []
-    async for app in application_collection.find({"candidate_email": candidate_email}):
-        app["_id"] = str(app["_id"])
-        apps.append(app)
-    return apps
+    apps = await application_collection.find({"candidate_email": candidate_email}).to_list(length=None)
+    return MongoJSONResponse(apps)
 
 # 2.c GET APPLICATIONS FOR A JOB (HR dekhega)
 @router.get("/{job_id}")
 async def get_applications_by_job(job_id: str):
-    apps = []
-    async for app in application_collection.find({"job_id": job_id}):
-        app["_id"] = str(app["_id"])
-        apps.append(app)
-    return apps
+    apps = await application_collection.find({"job_id": job_id}).to_list(length=None)
+    return MongoJSONResponse(apps)
 
 
 # 3. UPDATE APPLICATION STATUS (Shortlist / Reject)
 @router.patch("/{application_id}/status")
 async def update_application_status(application_id: str, payload: dict = Body(...)):
     status = payload.get("status")
-    if status not in {"Pending", "Unviewed", "Viewed", "Shortlisted", "Rejected"}:
+    if status not in application_stats.STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status value")
 
     try:
@@ -101,11 +156,16 @@ async def update_application_status(application_id: str, payload: dict = Body(..
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid application id")
 
-    result = await application_collection.update_one(
+    # Purana status chahiye taake counter us se naye par move ho
+    previous = await application_collection.find_one_and_update(
         {"_id": obj_id},
         {"$set": {"status": status}},
+        projection={"job_id": 1, "status": 1},
+        return_document=ReturnDocument.BEFORE,
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Application not found")
+    await application_stats.count_move(previous.get("job_id"), previous.get("status"), status)
+    publish_local("applications", "update", obj_id, {"status": status})
 
     return {"message": "Status updated", "status": status}
\ No newline at end of file
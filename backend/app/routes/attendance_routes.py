@@ -1,139 +1,150 @@
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, HTTPException, Query, Request
 from bson import ObjectId
 from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from app.models import AttendanceModel
-from app.database import attendance_collection, leave_collection
+from app import payroll
+from app.database import attendance_collection, employee_collection
+from app.attendance_summary import attendance_update, reconcile_month, save_attendance, summary_key
+from app.bulk import read_rows, row_results, validate_rows, write_errors
+from app.exports import batches, export_response
+from app.responses import MongoJSONResponse
+from app.singleflight import coalesce
 
 router = APIRouter()
 
 
+@coalesce("attendance.all")
+async def _month_attendance(month: int, year: int) -> list:
+  # approved_leaves / unapproved_absence document par hi maintained hain
+  return await attendance_collection.find({"month": month, "year": year}).to_list(length=None)
+
+
 @router.get("/all")
 async def get_all_attendance(month: int, year: int):
   """Get attendance summary for all employees for a month/year."""
-  docs = []
-  
-  # First, get all approved leaves for this month/year
-  approved_leaves_map = {}  # employee_id -> count
-  async for leave in leave_collection.find({"status": "Approved"}):
-    if leave.get("start_date") and leave.get("employee_id"):
-      leave_date = leave["start_date"]
-      # Handle both datetime objects and strings
-      if isinstance(leave_date, str):
-        try:
-          leave_date = datetime.fromisoformat(leave_date.replace("Z", "+00:00"))
-        except:
-          continue
-      elif not isinstance(leave_date, datetime):
-        continue
-      if leave_date.month == month and leave_date.year == year:
-        emp_id = leave["employee_id"]
-        approved_leaves_map[emp_id] = approved_leaves_map.get(emp_id, 0) + 1
-  
-  # Now get attendance records and update approved_leaves from leaves database
-  async for att in attendance_collection.find({"month": month, "year": year}):
-    emp_id = att.get("employee_id")
-    approved_count = approved_leaves_map.get(emp_id, 0)
-    att["approved_leaves"] = approved_count
-    
-    # Recalculate unapproved_absence = absent_days - approved_leaves
-    absent = att.get("absent_days", 0) or 0
-    att["unapproved_absence"] = max(0, absent - approved_count)
-    
-    att["_id"] = str(att["_id"])
-    docs.append(att)
-  return docs
+  # Ek saath aaye same month ke requests ek hi query share karte hain
+  return MongoJSONResponse(await _month_attendance(month, year))
+
+
+PAYROLL_EXPORT_COLUMNS = [
+  "employee_id", "full_name", "salary", "month", "year", "absent_days",
+  "approved_leaves", "unapproved_absence", "daily_deduction", "total_deduction",
+]
+
+
+async def _payroll_rows(month: int, year: int):
+  """Attendance batches joined with employee name/salary, one $in query per batch."""
+  cursor = attendance_collection.find({"month": month, "year": year}, {"_id": 0})
+  async for batch in batches(cursor):
+    codes = [att.get("employee_id") for att in batch]
+    employees = {
+      emp["employee_code"]: emp
+      async for emp in employee_collection.find(
+        {"employee_code": {"$in": codes}},
+        {"_id": 0, "employee_code": 1, "full_name": 1, "salary": 1},
+      )
+    }
+    for att in batch:
+      emp = employees.get(att.get("employee_id"), {})
+      att["full_name"] = emp.get("full_name", "")
+      att["salary"] = emp.get("salary", 0.0)
+      # total_deduction upsert_attendance ne save kiya hota hai
+      att.setdefault("total_deduction", 0.0)
+    yield batch
+
+
+@router.get("/export")
+async def export_attendance(month: int, year: int, format: str = Query("csv")):
+  """Stream the month's attendance with salary for the payroll run."""
+  return export_response(
+    _payroll_rows(month, year),
+    format,
+    PAYROLL_EXPORT_COLUMNS,
+    f"attendance_{year}_{month:02d}",
+  )
 
 
 @router.get("/employee/{employee_id}")
 async def get_employee_attendance(employee_id: str, month: int, year: int):
   """Get single employee's attendance for a given month/year."""
-  att = await attendance_collection.find_one(
-    {"employee_id": employee_id, "month": month, "year": year}
-  )
-  if not att:
-    return None
-  
-  # Fetch approved leaves count from leaves database for this month/year
-  approved_count = 0
-  async for leave in leave_collection.find({
-    "employee_id": employee_id,
-    "status": "Approved"
-  }):
-    if leave.get("start_date"):
-      leave_date = leave["start_date"]
-      # Handle both datetime objects and strings
-      if isinstance(leave_date, str):
-        try:
-          leave_date = datetime.fromisoformat(leave_date.replace("Z", "+00:00"))
-        except:
-          continue
-      elif not isinstance(leave_date, datetime):
-        continue
-      if leave_date.month == month and leave_date.year == year:
-        approved_count += 1
-  
-  # Update approved_leaves from leaves database
-  att["approved_leaves"] = approved_count
-  # Recalculate unapproved_absence = absent_days - approved_leaves
-  absent = att.get("absent_days", 0) or 0
-  att["unapproved_absence"] = max(0, absent - approved_count)
-  att["_id"] = str(att["_id"])
-  return att
+  att = await attendance_collection.find_one(summary_key(employee_id, month, year))
+  return MongoJSONResponse(att)
 
 
 @router.post("/upsert")
 async def upsert_attendance(att: AttendanceModel = Body(...)):
   """Create or update monthly attendance for an employee."""
-  data = att.dict()
-  
-  # Fetch approved leaves count from leaves database for this month/year
-  approved_count = 0
-  async for leave in leave_collection.find({
-    "employee_id": att.employee_id,
-    "status": "Approved"
-  }):
-    if leave.get("start_date"):
-      leave_date = leave["start_date"]
-      # Handle both datetime objects and strings
-      if isinstance(leave_date, str):
-        try:
-          leave_date = datetime.fromisoformat(leave_date.replace("Z", "+00:00"))
-        except:
-          continue
-      elif not isinstance(leave_date, datetime):
-        continue
-      if leave_date.month == att.month and leave_date.year == att.year:
-        approved_count += 1
-  
-  # Override approved_leaves with count from leaves database
-  data['approved_leaves'] = approved_count
-  
-  # derived fields: unapproved_absence and total_deduction
-  absent = data.get('absent_days', 0) or 0
-  daily = data.get('daily_deduction', 0) or 0
-  
-  # unapproved_absence = absent_days - approved_leaves (from leaves database)
-  unapproved_absence = max(0, absent - approved_count)
-  data['unapproved_absence'] = unapproved_absence
-  
-  # total_deduction based on unapproved_absence
-  data['total_deduction'] = unapproved_absence * daily
-  
-  # Keep unpaid_days for backward compatibility
-  paid = data.get('paid_leaves', 0) or 0
-  unpaid = max(0, absent - approved_count - paid)
-  data['unpaid_days'] = unpaid
-  existing = await attendance_collection.find_one(
-    {"employee_id": att.employee_id, "month": att.month, "year": att.year}
-  )
-  if existing:
-    await attendance_collection.update_one(
-      {"_id": existing["_id"]},
-      {"$set": data},
-    )
+  # approved_leaves leave approvals se maintained counter hai; derived fields
+  # (unapproved_absence, total_deduction, unpaid_days) isi update mein bante hain
+  result = await save_attendance(att.dict())
+  if result.upserted_id is None:
     return {"message": "Attendance updated"}
-  else:
-    new_doc = await attendance_collection.insert_one(data)
-    return {"message": "Attendance created", "id": str(new_doc.inserted_id)}
+  return {"message": "Attendance created", "id": str(result.upserted_id)}
+
+
+@router.post("/bulk-upsert")
+async def bulk_upsert_attendance(request: Request):
+  """Create or update many monthly attendance rows (CSV or JSON array)."""
+  rows = await read_rows(request)
+  valid, errors = validate_rows(rows, AttendanceModel)
+
+  # Ek hi employee/month do dafa na aaye
+  seen = {}
+  for index, att in list(valid.items()):
+    key = (att.employee_id, att.month, att.year)
+    if key in seen:
+      errors[index] = f"Duplicate employee/month (row {seen[key]})"
+      del valid[index]
+    else:
+      seen[key] = index
+
+  # approved_leaves stored counter hai, is liye leaves scan ki zaroorat nahi
+  indexes = list(valid)
+  operations = [UpdateOne(*attendance_update(valid[i].dict()), upsert=True) for i in indexes]
+  upserted = {}
+  if operations:
+    try:
+      result = await attendance_collection.bulk_write(operations, ordered=False)
+      upserted = result.upserted_ids
+    except BulkWriteError as e:
+      for op_index, message in write_errors(e).items():
+        errors[indexes[op_index]] = message
+      upserted = {u["index"]: u["_id"] for u in e.details.get("upserted", [])}
+
+  done = {}
+  for op_index, row_index in enumerate(indexes):
+    if op_index in upserted:
+      done[row_index] = {"status": "created", "id": str(upserted[op_index])}
+    else:
+      done[row_index] = {"status": "updated"}
+  return {
+    "saved": len(indexes) - sum(1 for i in indexes if i in errors),
+    "failed": len(errors),
+    "results": row_results(len(rows), errors, done),
+  }
+
+
+@router.post("/payroll")
+async def run_payroll(month: int, year: int, dry_run: bool = True, preview: int = Query(50, ge=0, le=1000)):
+  """Compute the month's payroll for everyone in one vectorized pass (app/payroll.py)."""
+  cols = await payroll.load_month(month, year)
+  result = payroll.compute(cols)
+  response = {
+    "month": month,
+    "year": year,
+    "dry_run": dry_run,
+    "summary": payroll.summarize(cols, result),
+    "rows": payroll.rows(cols, result, preview),
+  }
+  if not dry_run:
+    response["written"] = await payroll.write_back(cols, result, datetime.utcnow())
+  return response
 
 
+@router.post("/reconcile")
+async def reconcile_attendance(month: int, year: int, fix: bool = False):
+  """Check stored approved-leave counters against a full recount (fix=true repairs them)."""
+  mismatches = await reconcile_month(month, year, fix=fix)
+  return {"month": month, "year": year, "fixed": fix, "mismatches": mismatches}
@@ -0,0 +1,25 @@
+import os
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from app.uploads import SHA_PATTERN, blob_path
+
+router = APIRouter()
+
+# File ka naam hi uska content hash hai - URL kabhi naya content nahi dega
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+# 1. SERVE CV BY CONTENT HASH (strong ETag + Range, browser/CDN hamesha cache kare)
+@router.get("/{sha}.pdf")
+async def get_cv(sha: str, request: Request):
+    if not SHA_PATTERN.match(sha):
+        raise HTTPException(status_code=404, detail="CV not found")
+    path = blob_path(sha)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="CV not found")
+
+    headers = {"ETag": f'"{sha}"', "Cache-Control": IMMUTABLE}
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    # FileResponse Range / If-Range khud handle karta hai (206)
+    return FileResponse(path, media_type="application/pdf", headers=headers)
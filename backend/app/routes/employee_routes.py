@@ -1,28 +1,58 @@
-from fastapi import APIRouter, HTTPException, Body, Depends
+from fastapi import APIRouter, HTTPException, Body, Depends, Query, Request
 from app.models import EmployeeModel, AddEmployeeModel
 from app.database import employee_collection
-from passlib.context import CryptContext
+from app.cache import response_cache
+from app.bulk import read_rows, row_results, validate_rows, write_errors
+from app.exports import batches, export_response
+from app.pagination import PageParams, fetch_page
+from app.responses import MongoJSONResponse
+from app.security import (
+    create_access_token,
+    get_current_employee,
+    hash_password,
+    invalidate_employee,
+    login_limiter,
+    verify_password,
+)
 from pydantic import BaseModel
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from datetime import datetime
+from typing import Optional
+from pymongo import InsertOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 # --- 1. ROUTER SABSE PEHLE DEFINE HONA CHAHIYE ---
 router = APIRouter()
 
-# --- CONFIGURATION ---
-SECRET_KEY = "supersecretkey_for_fyp_project" 
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # --- HELPER FUNCTIONS ---
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+def duplicate_key_message(error: DuplicateKeyError) -> str:
+    """Map a unique-index violation on employees to a readable message."""
+    details = error.details or {}
+    # keyValue sirf naye servers bhejte hain, warna index name errmsg mein hota hai
+    key = details.get("keyValue") or {}
+    errmsg = details.get("errmsg", "")
+    if "cnic" in key or "cnic_1" in errmsg:
+        return "CNIC already exists!"
+    if "employee_code" in key or "employee_code_1" in errmsg:
+        return "Employee code already exists!"
+    if "email" in key or "email_1" in errmsg:
+        return "Email already exists!"
+    return "Employee already exists!"
+
+def new_employee_doc(employee: AddEmployeeModel) -> dict:
+    """Employee record created by admin (email/password are set during signup)."""
+    return {
+        "employee_code": employee.employee_code,
+        "cnic": employee.cnic,
+        "full_name": employee.full_name or "",
+        "role": employee.role,
+        "salary": employee.salary,
+        "mobile": employee.mobile,
+        "email": "",  # Will be set during signup
+        "password": "",  # Will be set during signup
+        "joined_at": datetime.utcnow(),
+        "paid_leaves_total": 20,
+        "paid_leaves_used": 0
+    }
 
 # --- SCHEMAS ---
 class LoginSchema(BaseModel):
@@ -39,34 +69,68 @@ async def add_employee(employee: AddEmployeeModel = Body(...)):
     if not employee.cnic or len(employee.cnic) != 13 or not employee.cnic.isdigit():
         raise HTTPException(status_code=400, detail="CNIC must be exactly 13 digits")
     
-    # Check if CNIC already exists
-    existing_cnic = await employee_collection.find_one({"cnic": employee.cnic})
-    if existing_cnic:
-        raise HTTPException(status_code=400, detail="CNIC already exists!")
-    
-    # Check if employee_code already exists
-    existing_code = await employee_collection.find_one({"employee_code": employee.employee_code})
-    if existing_code:
-        raise HTTPException(status_code=400, detail="Employee code already exists!")
-    
-    # Create employee record (without password and email - will be added during signup)
-    emp_data = {
-        "employee_code": employee.employee_code,
-        "cnic": employee.cnic,
-        "full_name": employee.full_name or "",
-        "role": employee.role,
-        "salary": employee.salary,
-        "mobile": employee.mobile,
-        "email": "",  # Will be set during signup
-        "password": "",  # Will be set during signup
-        "joined_at": datetime.utcnow(),
-        "paid_leaves_total": 20,
-        "paid_leaves_used": 0
-    }
-    
-    new_employee = await employee_collection.insert_one(emp_data)
+    # Unique indexes on cnic/employee_code make the insert itself the duplicate check
+    try:
+        new_employee = await employee_collection.insert_one(new_employee_doc(employee))
+    except DuplicateKeyError as e:
+        raise HTTPException(status_code=400, detail=duplicate_key_message(e))
     return {"message": "Employee added successfully", "id": str(new_employee.inserted_id)}
 
+# 1.b BULK ADD EMPLOYEES (CSV ya JSON array)
+@router.post("/bulk-add")
+async def bulk_add_employees(request: Request):
+    """Add many employees at once; returns a result per input row."""
+    rows = await read_rows(request)
+    valid, errors = validate_rows(rows, AddEmployeeModel)
+
+    # CNIC check + file ke andar duplicates
+    seen_cnic, seen_code = {}, {}
+    for index, employee in list(valid.items()):
+        if not employee.cnic.isdigit():
+            errors[index] = "CNIC must be exactly 13 digits"
+        elif employee.cnic in seen_cnic:
+            errors[index] = f"Duplicate CNIC (row {seen_cnic[employee.cnic]})"
+        elif employee.employee_code in seen_code:
+            errors[index] = f"Duplicate employee code (row {seen_code[employee.employee_code]})"
+        else:
+            seen_cnic[employee.cnic] = index
+            seen_code[employee.employee_code] = index
+            continue
+        del valid[index]
+
+    # Database mein pehle se maujood - ek hi query
+    if valid:
+        async for emp in employee_collection.find(
+            {"$or": [{"cnic": {"$in": list(seen_cnic)}}, {"employee_code": {"$in": list(seen_code)}}]},
+            {"cnic": 1, "employee_code": 1},
+        ):
+            if emp.get("cnic") in seen_cnic:
+                errors[seen_cnic[emp["cnic"]]] = "CNIC already exists!"
+            if emp.get("employee_code") in seen_code:
+                errors[seen_code[emp["employee_code"]]] = "Employee code already exists!"
+        valid = {i: e for i, e in valid.items() if i not in errors}
+
+    indexes = list(valid)
+    docs = [new_employee_doc(valid[i]) for i in indexes]
+    if docs:
+        try:
+            await employee_collection.bulk_write([InsertOne(doc) for doc in docs], ordered=False)
+        except BulkWriteError as e:
+            # Beech mein kisi aur ne wahi CNIC/code daal diya (unique index)
+            for op_index, message in write_errors(e).items():
+                errors[indexes[op_index]] = message
+
+    created = {
+        i: {"status": "created", "id": str(doc["_id"])}
+        for i, doc in zip(indexes, docs)
+        if i not in errors
+    }
+    return {
+        "created": len(created),
+        "failed": len(errors),
+        "results": row_results(len(rows), errors, created),
+    }
+
 # 2. SIGNUP API (Employee completes their profile)
 @router.post("/signup")
 async def signup_employee(employee: EmployeeModel = Body(...)):
@@ -91,17 +155,8 @@ async def signup_employee(employee: EmployeeModel = Body(...)):
     if existing_emp.get("email") and existing_emp.get("password"):
         raise HTTPException(status_code=400, detail="Employee already signed up. Please login instead.")
     
-    # Check if email is already used by another employee
-    if employee.email:
-        email_check = await employee_collection.find_one({
-            "email": employee.email,
-            "_id": {"$ne": existing_emp["_id"]}
-        })
-        if email_check:
-            raise HTTPException(status_code=400, detail="Email already exists!")
-    
     # Hash password
-    hashed_password = pwd_context.hash(employee.password)
+    hashed_password = await hash_password(employee.password)
     
     # Update existing employee record with signup details
     update_data = {
@@ -117,31 +172,41 @@ async def signup_employee(employee: EmployeeModel = Body(...)):
     if employee.salary:
         update_data["salary"] = employee.salary
     
-    await employee_collection.update_one(
-        {"_id": existing_emp["_id"]},
-        {"$set": update_data}
-    )
+    # Email already used by another employee -> unique email index rejects the update
+    try:
+        await employee_collection.update_one(
+            {"_id": existing_emp["_id"]},
+            {"$set": update_data}
+        )
+    except DuplicateKeyError as e:
+        raise HTTPException(status_code=400, detail=duplicate_key_message(e))
+    invalidate_employee(existing_emp["_id"])
+    await response_cache.invalidate("employee")
     
     return {"message": "Employee signup completed successfully", "id": str(existing_emp["_id"])}
 
 # 2. LOGIN API
 @router.post("/login")
 async def login_employee(creds: LoginSchema = Body(...)):
-    # A. User dhoondo
+    # A. Rate limit (LOGIN_RATE_LIMIT set ho to)
+    login_limiter.check(creds.email)
+
+    # B. User dhoondo
     user = await employee_collection.find_one({"email": creds.email})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # B. Password match karo
-    if not pwd_context.verify(creds.password, user["password"]):
+    # C. Password match karo (bcrypt worker pool mein chalta hai)
+    if not await verify_password(creds.password, user["password"]):
         raise HTTPException(status_code=401, detail="Incorrect Password")
+    login_limiter.reset(creds.email)
 
-    # C. JWT Token Generate karo
+    # D. JWT Token Generate karo
     access_token = create_access_token(
         data={"sub": user["email"], "role": user["role"], "id": str(user["_id"])}
     )
 
-    # D. Token wapis bhejo
+    # E. Token wapis bhejo
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -155,53 +220,68 @@ async def login_employee(creds: LoginSchema = Body(...)):
 
 # 3. GET ALL EMPLOYEES (Admin view)
 @router.get("/all")
-async def get_all_employees():
-    employees = []
-    async for emp in employee_collection.find():
-        emp["_id"] = str(emp["_id"])
-        # Password ko kabhi expose nahi karna
-        emp.pop("password", None)
-        employees.append(emp)
-    return employees
+async def get_all_employees(
+    page: PageParams = Depends(),
+    role: Optional[str] = None,
+):
+    query = {}
+    if role:
+        query["role"] = role
+    # Password ko kabhi expose nahi karna
+    return await fetch_page(employee_collection, query, page, hidden=("password",))
+
+
+EMPLOYEE_EXPORT_COLUMNS = [
+    "employee_code", "full_name", "email", "cnic", "role", "salary", "mobile",
+    "joined_at", "paid_leaves_total", "paid_leaves_used",
+]
+
+# 3.b EXPORT EMPLOYEES (HR reporting - CSV / NDJSON stream)
+@router.get("/export")
+async def export_employees(format: str = Query("csv")):
+    cursor = employee_collection.find({}, {"_id": 0, "password": 0})
+    return export_response(batches(cursor), format, EMPLOYEE_EXPORT_COLUMNS, "employees")
+
+
+# 3.c CURRENT EMPLOYEE (Bearer token se)
+@router.get("/me")
+async def get_me(current: dict = Depends(get_current_employee)):
+    return current
 
 
 @router.get("/{employee_code}")
-async def get_employee_by_code(employee_code: str):
+async def get_employee_by_code(employee_code: str, request: Request):
     """Get a single employee by their employee_code."""
-    emp = await employee_collection.find_one({"employee_code": employee_code})
-    if not emp:
-        # try by _id
-        try:
-            from bson import ObjectId
-            emp = await employee_collection.find_one({"_id": ObjectId(employee_code)})
-        except Exception:
-            emp = None
+    async def load():
+        emp = await employee_collection.find_one({"employee_code": employee_code}, {"password": 0})
+        if not emp:
+            # try by _id
+            try:
+                from bson import ObjectId
+                emp = await employee_collection.find_one({"_id": ObjectId(employee_code)}, {"password": 0})
+            except Exception:
+                emp = None
 
-    if not emp:
-        raise HTTPException(status_code=404, detail="Employee not found")
+        if not emp:
+            raise HTTPException(status_code=404, detail="Employee not found")
 
-    emp.pop("password", None)
-    emp["_id"] = str(emp["_id"])
-    return emp
+        return emp, {}
+
+    # Har page load par aata hai - cache + ETag (writes invalidate karti hain)
+    return await response_cache.respond(request, "employee", load)
 
 # 4. UPDATE EMPLOYEE (Admin can update employee details)
 @router.patch("/{employee_code}")
 async def update_employee(employee_code: str, update_data: dict = Body(...)):
     """Update employee details by employee_code."""
     from bson import ObjectId
-    
-    # Find employee by employee_code first
-    emp = await employee_collection.find_one({"employee_code": employee_code})
-    if not emp:
-        # Try by _id
-        try:
-            emp = await employee_collection.find_one({"_id": ObjectId(employee_code)})
-        except Exception:
-            emp = None
-    
-    if not emp:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    
+
+    # Pehle employee_code; _id sirf tab jab is code ka koi employee na ho
+    # ($or mein dono alag employees match kar sakte the)
+    queries = [{"employee_code": employee_code}]
+    if ObjectId.is_valid(employee_code):
+        queries.append({"_id": ObjectId(employee_code)})
+
     # Don't allow password update through this endpoint (use separate endpoint if needed)
     update_data.pop("password", None)
     update_data.pop("_id", None)  # Don't allow _id update
@@ -214,18 +294,29 @@ async def update_employee(employee_code: str, update_data: dict = Body(...)):
     update_data.pop("employee_code", None)
     
     # Note: Employee can only update: full_name, email, mobile
-    
-    # Update employee
-    result = await employee_collection.update_one(
-        {"_id": emp["_id"]},
-        {"$set": update_data}
-    )
-    
-    if result.matched_count == 0:
+
+    updated_emp = None
+    for query in queries:
+        if not update_data:
+            # Kuch badalna hi nahi ($set {} Mongo mein error hai) - bas current record
+            updated_emp = await employee_collection.find_one(query, {"password": 0})
+        else:
+            # Update + updated document ek hi find_one_and_update mein
+            try:
+                updated_emp = await employee_collection.find_one_and_update(
+                    query,
+                    {"$set": update_data},
+                    projection={"password": 0},
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError as e:
+                raise HTTPException(status_code=400, detail=duplicate_key_message(e))
+        if updated_emp:
+            break
+
+    if not updated_emp:
         raise HTTPException(status_code=404, detail="Employee not found")
-    
-    # Return updated employee
-    updated_emp = await employee_collection.find_one({"_id": emp["_id"]})
-    updated_emp.pop("password", None)
-    updated_emp["_id"] = str(updated_emp["_id"])
-    return updated_emp
\ No newline at end of file
+    if update_data:
+        invalidate_employee(updated_emp["_id"])
+        await response_cache.invalidate("employee")
+    return MongoJSONResponse(updated_emp)
\ No newline at end of file
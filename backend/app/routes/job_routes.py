@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Depends, Request
 from app.models import JobModel
 from app.database import job_collection
-from typing import List
+from app.cache import response_cache
+from app.pagination import PageParams, load_page
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -9,14 +11,24 @@ router = APIRouter()
 @router.post("/create")
 async def create_job(job: JobModel = Body(...)):
     new_job = await job_collection.insert_one(job.dict())
+    await response_cache.invalidate("jobs")
     return {"message": "Job Posted", "id": str(new_job.inserted_id)}
 
 # 2. GET ALL JOBS (Frontend par dikhane ke liye)
 @router.get("/all")
-async def get_all_jobs():
-    jobs = []
-    # Sirf active jobs dikhao
-    async for job in job_collection.find({"is_active": True}):
-        job["_id"] = str(job["_id"])
-        jobs.append(job)
-    return jobs
\ No newline at end of file
+async def get_all_jobs(
+    request: Request,
+    page: PageParams = Depends(),
+    is_active: bool = True,
+    location: Optional[str] = None,
+):
+    # Default: sirf active jobs dikhao
+    query = {"is_active": is_active}
+    if location:
+        query["location"] = location
+
+    async def load():
+        return await load_page(job_collection, query, page)
+
+    # Jobs kam badalti hain - cache + ETag (create_job invalidate karta hai)
+    return await response_cache.respond(request, "jobs", load)
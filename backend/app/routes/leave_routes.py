@@ -1,34 +1,152 @@
-from fastapi import APIRouter, Body, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
 from bson import ObjectId
+from datetime import datetime
+from typing import Optional
 from app.models import LeaveModel
+from pymongo import ReturnDocument
 from app.database import leave_collection
+from app.cache import response_cache
+from app.bulk import read_rows, row_results, validate_rows
+from app.leave_balance import (
+    find_overlap,
+    is_paid_leave,
+    leave_span,
+    release_paid_leave,
+    remaining_balance,
+    reserve_paid_leave,
+    span_days,
+    validate_batch,
+)
+from app.live import publish_local
+from app.leave_calendar import employee_leave_days, employees_on_leave, sync_leave_status
+from app.pagination import PageParams, date_range, fetch_page
+from app.responses import MongoJSONResponse
 
 # --- YEH LINE MISSING HOGI ---
 router = APIRouter()
 
+
+async def _reserve_or_raise(employee_id: str, days: int):
+    """reserve_paid_leave(), with 404 for an unknown employee and 409 for no balance."""
+    if await reserve_paid_leave(employee_id, days):
+        return
+    if await remaining_balance(employee_id) is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    raise HTTPException(status_code=409, detail="Not enough paid leave balance")
+
+
 # 1. REQUEST LEAVE
 @router.post("/request")
 async def request_leave(leave: LeaveModel = Body(...)):
-    new_leave = await leave_collection.insert_one(leave.dict())
+    if leave.end_date < leave.start_date:
+        raise HTTPException(status_code=400, detail="end_date cannot be before start_date")
+
+    leave_doc = leave.dict()
+    span = leave_span(leave_doc)
+    # Pending/Approved leave se takrao - (employee_id, start_date, end_date) index
+    clash = await find_overlap(leave.employee_id, span)
+    if clash:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Overlaps {clash.get('status', '').lower()} leave {clash['_id']}",
+        )
+
+    days = span_days(span)
+    paid = is_paid_leave(leave_doc)
+    remaining = await remaining_balance(leave.employee_id)
+    if remaining is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    # Sirf paid leave types balance se katti hain (Sick waghera nahi)
+    if paid and days > remaining:
+        raise HTTPException(status_code=400, detail=f"Only {max(remaining, 0)} paid leave days left")
+
+    reserved = days if paid and leave.status == "Approved" else 0
+    if reserved:
+        await _reserve_or_raise(leave.employee_id, reserved)
+        leave_doc["paid_days_reserved"] = reserved
+
+    new_leave = await leave_collection.insert_one(leave_doc)
+    # Check aur insert ke beech doosri request aa sakti hai - insert ke baad dobara dekho;
+    # do takrane wali leaves mein nayi (bara _id) hat jati hai
+    clash = await find_overlap(leave.employee_id, span, older_than=new_leave.inserted_id)
+    if clash:
+        await leave_collection.delete_one({"_id": new_leave.inserted_id})
+        await release_paid_leave(leave.employee_id, reserved)
+        raise HTTPException(
+            status_code=409,
+            detail=f"Overlaps {clash.get('status', '').lower()} leave {clash['_id']}",
+        )
+    if reserved:
+        await response_cache.invalidate("employee")
+    # Seedha Approved leave aaye to calendar + attendance counters bhi update karo
+    await sync_leave_status(leave_doc, None, leave.status)
+    publish_local("leaves", "insert", new_leave.inserted_id, leave_doc)
     return {"message": "Leave Requested", "id": str(new_leave.inserted_id)}
 
+# 1.b VALIDATE MANY LEAVES (bulk import / planning se pehle)
+@router.post("/validate")
+async def validate_leaves(request: Request):
+    """Check leaves (CSV or JSON array) for overlaps and paid-leave balance without saving."""
+    rows = await read_rows(request)
+    valid, errors = validate_rows(rows, LeaveModel)
+    indexes = list(valid)
+    checked = await validate_batch([valid[i].dict() for i in indexes], indexes)
+
+    done = {}
+    for row_index, result in zip(indexes, checked):
+        if result["ok"]:
+            done[row_index] = {"status": "ok", "days": result["days"]}
+        else:
+            errors[row_index] = result["error"]
+    return {
+        "ok": len(indexes) - sum(1 for i in indexes if i in errors),
+        "failed": len(errors),
+        "results": row_results(len(rows), errors, done),
+    }
+
 # 2. GET MY LEAVES
 @router.get("/employee/{employee_id}")
 async def get_my_leaves(employee_id: str):
-    leaves = []
-    async for leave in leave_collection.find({"employee_id": employee_id}):
-        leave["_id"] = str(leave["_id"])
-        leaves.append(leave)
-    return leaves
+    leaves = await leave_collection.find({"employee_id": employee_id}).to_list(length=None)
+    return MongoJSONResponse(leaves)
 
 # 3. GET ALL LEAVES
 @router.get("/all")
-async def get_all_leaves():
-    leaves = []
-    async for leave in leave_collection.find():
-        leave["_id"] = str(leave["_id"])
-        leaves.append(leave)
-    return leaves
+async def get_all_leaves(
+    page: PageParams = Depends(),
+    status: Optional[str] = None,
+    employee_id: Optional[str] = None,
+    leave_type: Optional[str] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+):
+    query = {}
+    if status:
+        query["status"] = status
+    if employee_id:
+        query["employee_id"] = employee_id
+    if leave_type:
+        query["leave_type"] = leave_type
+    start_range = date_range(start_from, start_to)
+    if start_range:
+        query["start_date"] = start_range
+    return await fetch_page(leave_collection, query, page)
+
+
+# 3.b LEAVE CALENDAR: kon kab chutti par hai
+@router.get("/calendar")
+async def get_leave_calendar(start: datetime, end: datetime):
+    """Employees on approved leave between start and end (inclusive)."""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end cannot be before start")
+    return await employees_on_leave(start, end)
+
+
+@router.get("/calendar/employee/{employee_id}")
+async def get_employee_leave_days(employee_id: str, month: int, year: int):
+    """Approved leave days of one employee in a month."""
+    dates = await employee_leave_days(employee_id, month, year)
+    return {"employee_id": employee_id, "month": month, "year": year, "days": len(dates), "dates": dates}
 
 
 # 4. UPDATE LEAVE STATUS (Admin approve/reject)
@@ -48,11 +166,58 @@ async def update_leave_status(leave_id: str, payload: dict = Body(...)):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid leave id")
 
-    result = await leave_collection.update_one(
-        {"_id": obj_id},
-        {"$set": update_data},
-    )
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Leave not found")
+    projection = {
+        "employee_id": 1, "start_date": 1, "end_date": 1, "status": 1, "leave_type": 1, "paid_days_reserved": 1,
+    }
+    balance_changed = False
+
+    if status == "Approved":
+        leave = await leave_collection.find_one({"_id": obj_id}, projection)
+        if leave is None:
+            raise HTTPException(status_code=404, detail="Leave not found")
+        if leave.get("status") == "Approved":
+            # Pehle se approved - sirf comments
+            await leave_collection.update_one({"_id": obj_id}, {"$set": update_data})
+            publish_local("leaves", "update", obj_id, update_data)
+            return {"message": "Status updated", "status": status}
+
+        # Paid leave ho to balance pehle reserve (conditional $inc), phir status
+        span = leave_span(leave)
+        days = span_days(span) if span and is_paid_leave(leave) else 0
+        if days:
+            await _reserve_or_raise(leave.get("employee_id"), days)
+        elif await remaining_balance(leave.get("employee_id")) is None:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        update_data["paid_days_reserved"] = days
+        previous = await leave_collection.find_one_and_update(
+            {"_id": obj_id, "status": {"$ne": "Approved"}},
+            {"$set": update_data},
+            projection=projection,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if previous is None:
+            # Beech mein kisi aur ne approve (ya delete) kar di
+            await release_paid_leave(leave.get("employee_id"), days)
+            return {"message": "Status updated", "status": status}
+        balance_changed = days > 0
+    else:
+        # Purana status atomically mil jata hai, taake sirf Approved in/out par counter badle
+        previous = await leave_collection.find_one_and_update(
+            {"_id": obj_id},
+            {"$set": update_data, "$unset": {"paid_days_reserved": ""}},
+            projection=projection,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if previous is None:
+            raise HTTPException(status_code=404, detail="Leave not found")
+        if previous.get("status") == "Approved":
+            reserved = previous.get("paid_days_reserved") or 0
+            await release_paid_leave(previous.get("employee_id"), reserved)
+            balance_changed = reserved > 0
+
+    await sync_leave_status(previous, previous.get("status"), status)
+    publish_local("leaves", "update", obj_id, update_data)
+    if balance_changed:
+        await response_cache.invalidate("employee")
 
     return {"message": "Status updated", "status": status}
\ No newline at end of file
@@ -0,0 +1,77 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.live import broadcaster, unviewed_count
+from app.responses import dumps
+
+router = APIRouter()
+
+TOPICS = {"leaves", "applications", "unviewed"}
+# Proxies idle connection band na kar den
+HEARTBEAT_SECONDS = 15
+
+
+def _event(name: str, data, event_id: str = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id else ""
+    return (head + f"event: {name}\n").encode() + b"data: " + dumps(data) + b"\n\n"
+
+
+# 1. LIVE STREAM (Server-Sent Events - admin dashboards ke liye, polling ki jagah)
+@router.get("/stream")
+async def live_stream(request: Request, topics: str = Query("leaves,applications,unviewed")):
+    """Push leave/application changes and the unviewed CV count as they happen."""
+    wanted = {t.strip() for t in topics.split(",")} & TOPICS
+    if not wanted:
+        raise HTTPException(status_code=400, detail=f"topics must be from {sorted(TOPICS)}")
+
+    # EventSource reconnect par Last-Event-ID khud bhejta hai
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    if "unviewed" in wanted:
+        # Mongo error yahin 500 de, stream shuru hone se pehle (count cache bhi garam)
+        await unviewed_count()
+
+    async def events():
+        # Subscribe generator ke andar - finally har haal mein unsubscribe karta hai
+        sub, missed = broadcaster.subscribe(wanted, last_event_id)
+        try:
+            # Subscribe ke baad parha, taake beech ki koi change chhoot na jaye
+            count = await unviewed_count() if "unviewed" in wanted else None
+            yield b"retry: 3000\n\n"
+            if missed is None:
+                # Purane events buffer se nikal chuke - client poori list dobara laye
+                yield _event("reset", {"last_id": broadcaster.event_id(broadcaster.last_id)})
+            else:
+                for seq, topic, data in missed:
+                    yield _event(topic, data, broadcaster.event_id(seq))
+            if count is not None:
+                yield _event("unviewed", {"count": count})
+
+            while True:
+                if sub.overflowed and sub.queue.empty():
+                    return  # bohat peeche reh gaya - reconnect karke replay karega
+                try:
+                    seq, topic, data = await asyncio.wait_for(sub.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield _event(topic, data, broadcaster.event_id(seq))
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# 2. UNVIEWED CV COUNT (ek dafa ke liye)
+@router.get("/unviewed")
+async def get_unviewed_count():
+    return {"count": await unviewed_count()}
+
+
+# 3. STREAM STATS (subscribers, dropped events)
+@router.get("/stats")
+async def get_live_stats():
+    return broadcaster.stats()
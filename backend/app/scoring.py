@@ -0,0 +1,208 @@
+"""Background CV scoring queue.
+
+The queue lives on the application documents themselves, so there is no
+external broker and queued work survives a restart:
+
+  scoring_status   queued -> processing -> done | failed
+  scoring_attempts how many times a worker picked it up
+  next_attempt_at  earliest time a retry may run (exponential backoff)
+
+SCORING_CONCURRENCY asyncio workers claim applications atomically with
+find_one_and_update and hand the CPU-heavy part (PDF text + scoring,
+app.cv_text.score_cv) to a process pool of SCORING_PROCESSES.
+
+Environment:
+  SCORING_PROCESSES    worker processes (default: CPU count)
+  SCORING_CONCURRENCY  applications scored at once (default: processes)
+  SCORING_MAX_ATTEMPTS attempts before an application is marked failed (default 3)
+  SCORING_POLL_SECONDS idle poll interval (default 5)
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.cv_text import score_cv
+from app.database import application_collection, job_collection
+from app.search_index import save_cv_text
+from app.uploads import cv_path_from_url
+
+logger = logging.getLogger(__name__)
+
+SCORING_PROCESSES = int(os.getenv("SCORING_PROCESSES", os.cpu_count() or 1))
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", SCORING_PROCESSES))
+SCORING_MAX_ATTEMPTS = int(os.getenv("SCORING_MAX_ATTEMPTS", "3"))
+SCORING_POLL_SECONDS = float(os.getenv("SCORING_POLL_SECONDS", "5"))
+# processing mein itni der se phansi application dobara queue mein
+STALE_AFTER = timedelta(minutes=10)
+
+_executor = None
+_workers = []
+_wakeup = asyncio.Event()
+_stats = {"scored": 0, "failed": 0, "retried": 0, "busy_seconds": 0.0, "started_at": None}
+
+
+def queued_fields() -> dict:
+    """Fields that put a new application on the scoring queue."""
+    now = datetime.utcnow()
+    return {"scoring_status": "queued", "scoring_attempts": 0, "queued_at": now, "next_attempt_at": now}
+
+
+def notify():
+    """Wake an idle worker after an application was queued."""
+    _wakeup.set()
+
+
+async def _claim():
+    now = datetime.utcnow()
+    return await application_collection.find_one_and_update(
+        {"scoring_status": "queued", "next_attempt_at": {"$lte": now}},
+        {"$set": {"scoring_status": "processing", "scoring_started_at": now},
+         "$inc": {"scoring_attempts": 1}},
+        sort=[("next_attempt_at", 1)],
+        projection={"job_id": 1, "cv_url": 1, "scoring_attempts": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _job_for(job_id: str) -> dict:
+    try:
+        job = await job_collection.find_one({"_id": ObjectId(job_id)}, {"requirements": 1, "description": 1})
+    except Exception:
+        job = None
+    if not job:
+        raise ValueError(f"Job {job_id} not found")
+    return job
+
+
+async def _process(app_doc: dict):
+    job = await _job_for(app_doc.get("job_id", ""))
+    path = cv_path_from_url(app_doc.get("cv_url", ""))
+    if path is None or not os.path.exists(path):
+        raise FileNotFoundError("CV file is not stored locally")
+
+    loop = asyncio.get_running_loop()
+    score, reasoning, text = await loop.run_in_executor(
+        _executor, score_cv, path, job.get("requirements") or [], job.get("description") or ""
+    )
+    await application_collection.update_one(
+        {"_id": app_doc["_id"]},
+        {"$set": {
+            "ai_score": score,
+            "ai_reasoning": reasoning,
+            "scoring_status": "done",
+            "scored_at": datetime.utcnow(),
+            "scoring_error": None,
+        }},
+    )
+    await save_cv_text(app_doc["_id"], app_doc.get("job_id"), text)
+
+
+async def _fail(app_doc: dict, error: Exception):
+    attempts = app_doc.get("scoring_attempts", 1)
+    if attempts >= SCORING_MAX_ATTEMPTS or isinstance(error, FileNotFoundError):
+        update = {"scoring_status": "failed", "scoring_error": str(error)}
+        _stats["failed"] += 1
+    else:
+        # Exponential backoff: 2, 4, 8 ... seconds
+        retry_at = datetime.utcnow() + timedelta(seconds=2 ** attempts)
+        update = {"scoring_status": "queued", "next_attempt_at": retry_at, "scoring_error": str(error)}
+        _stats["retried"] += 1
+    await application_collection.update_one({"_id": app_doc["_id"]}, {"$set": update})
+
+
+async def _worker():
+    while True:
+        try:
+            app_doc = await _claim()
+        except Exception:
+            logger.exception("Scoring queue claim failed")
+            app_doc = None
+        if app_doc is None:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), SCORING_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        started = time.perf_counter()
+        try:
+            await _process(app_doc)
+            _stats["scored"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Scoring application %s failed: %s", app_doc["_id"], e)
+            try:
+                await _fail(app_doc, e)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Worker zinda rahe; processing mein phansa doc agle startup par requeue_stale() wapas layega
+                logger.exception("Could not record scoring failure for application %s", app_doc["_id"])
+        finally:
+            _stats["busy_seconds"] += time.perf_counter() - started
+
+
+async def requeue_stale():
+    """Put applications left in processing (e.g. by a crash) back on the queue."""
+    result = await application_collection.update_many(
+        {"scoring_status": "processing", "scoring_started_at": {"$lt": datetime.utcnow() - STALE_AFTER}},
+        {"$set": {"scoring_status": "queued", "next_attempt_at": datetime.utcnow()}},
+    )
+    return result.modified_count
+
+
+async def start_workers():
+    global _executor
+    if _workers:
+        return
+    # spawn: Motor ke threads wale process ko fork karna safe nahi
+    _executor = ProcessPoolExecutor(
+        max_workers=SCORING_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+    )
+    _stats["started_at"] = time.time()
+    await requeue_stale()
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(SCORING_CONCURRENCY))
+
+
+async def stop_workers():
+    global _executor
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def queue_stats() -> dict:
+    """Queue depth per status plus throughput counters."""
+    depth = {
+        row["_id"]: row["count"]
+        async for row in application_collection.aggregate([
+            {"$match": {"scoring_status": {"$in": ["queued", "processing", "failed"]}}},
+            {"$group": {"_id": "$scoring_status", "count": {"$sum": 1}}},
+        ])
+    }
+    uptime = time.time() - _stats["started_at"] if _stats["started_at"] else 0.0
+    return {
+        "queued": depth.get("queued", 0),
+        "processing": depth.get("processing", 0),
+        "failed_total": depth.get("failed", 0),
+        "workers": len(_workers),
+        "processes": SCORING_PROCESSES,
+        "scored": _stats["scored"],
+        "failed": _stats["failed"],
+        "retried": _stats["retried"],
+        "scored_per_second": round(_stats["scored"] / uptime, 3) if uptime else 0.0,
+        "avg_seconds_per_cv": round(_stats["busy_seconds"] / _stats["scored"], 4) if _stats["scored"] else None,
+    }
@@ -0,0 +1,139 @@
+"""In-memory inverted index over CV text with BM25 ranking.
+
+Extracted CV text is saved by the scoring workers in the cv_texts
+collection ({_id: application id, job_id, text, updated_at}). Each API
+process keeps its own index: it is built once in the background at
+startup and then topped up incrementally. add() is called after a local
+scoring run, and refresh() picks up CVs scored by other processes.
+
+refresh() reads from the last updated_at it saw with $gte, not $gt: a
+CV saved by another process in the same millisecond but committed after
+the previous refresh still has that timestamp. The ids already read at
+the watermark are remembered so those are not indexed twice.
+
+A job query is built from the job's requirements and description.
+"""
+import asyncio
+import heapq
+import logging
+import math
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from app.cv_text import tokenize
+from app.database import cv_text_collection
+
+logger = logging.getLogger(__name__)
+
+# BM25 constants (standard values)
+K1 = 1.2
+B = 0.75
+REFRESH_SECONDS = 10
+
+
+class InvertedIndex:
+    """term -> {doc_id: term frequency}, plus document lengths for BM25."""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.doc_len = {}
+        self.doc_terms = {}  # doc_id -> its distinct terms, so remove() skips other postings
+        self.doc_job = {}
+        self.total_len = 0
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def add(self, doc_id: str, text: str, job_id: str = None):
+        """(Re)index one document."""
+        if doc_id in self.doc_len:
+            self.remove(doc_id)
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self.postings[term][doc_id] = tf
+        self.doc_terms[doc_id] = list(counts)
+        length = sum(counts.values())
+        self.doc_len[doc_id] = length
+        self.doc_job[doc_id] = job_id
+        self.total_len += length
+
+    def remove(self, doc_id: str):
+        length = self.doc_len.pop(doc_id, None)
+        if length is None:
+            return
+        self.doc_job.pop(doc_id, None)
+        self.total_len -= length
+        for term in self.doc_terms.pop(doc_id, ()):
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def search(self, query: str, k: int = 10, job_id: str = None) -> list:
+        """Top-k (doc_id, score) for query, optionally only within one job."""
+        n = len(self.doc_len)
+        if not n:
+            return []
+        avg_len = self.total_len / n
+        scores = defaultdict(float)
+        # Sirf query terms ki postings dekhte hain, poora index nahi
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if job_id is not None and self.doc_job.get(doc_id) != job_id:
+                    continue
+                norm = tf + K1 * (1 - B + B * self.doc_len[doc_id] / avg_len)
+                scores[doc_id] += idf * tf * (K1 + 1) / norm
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+cv_index = InvertedIndex()
+_watermark = datetime.min
+_seen_at_watermark = set()  # ids read with updated_at == _watermark
+_last_refresh = 0.0
+_refresh_lock = asyncio.Lock()
+
+
+def job_query(job: dict) -> str:
+    """Search text for "best candidates for this job"."""
+    return " ".join(job.get("requirements") or []) + " " + (job.get("description") or "")
+
+
+async def save_cv_text(application_id, job_id: str, text: str):
+    """Persist extracted text and index it in this process."""
+    await cv_text_collection.update_one(
+        {"_id": str(application_id)},
+        {"$set": {"job_id": job_id, "text": text, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+    cv_index.add(str(application_id), text, job_id)
+
+
+async def refresh():
+    """Index CV text saved since the last refresh (by any process)."""
+    global _watermark, _seen_at_watermark, _last_refresh
+    async with _refresh_lock:
+        started = time.monotonic()
+        count = 0
+        async for doc in cv_text_collection.find({"updated_at": {"$gte": _watermark}}).sort("updated_at", 1):
+            if doc["updated_at"] > _watermark:
+                _watermark, _seen_at_watermark = doc["updated_at"], set()
+            elif doc["_id"] in _seen_at_watermark:
+                continue
+            _seen_at_watermark.add(doc["_id"])
+            # CV text badalta nahi - jo is process ne khud index kiya wo skip
+            if doc["_id"] in cv_index.doc_len:
+                continue
+            cv_index.add(doc["_id"], doc.get("text", ""), doc.get("job_id"))
+            count += 1
+        _last_refresh = time.monotonic()
+        if count:
+            logger.info("Indexed %d CVs in %.2fs", count, _last_refresh - started)
+
+
+async def refresh_if_stale():
+    if time.monotonic() - _last_refresh > REFRESH_SECONDS:
+        await refresh()
@@ -0,0 +1,210 @@
+"""Auth helpers: password hashing off the event loop, a per-email login
+rate limiter, and JWT issue/verify with a small decoded-token cache.
+
+bcrypt blocks for tens of milliseconds per call, so hash/verify run in a
+bounded worker pool instead of inside the async handlers.
+
+Environment:
+  PASSWORD_HASH_EXECUTOR     "thread" (default) or "process"
+  PASSWORD_HASH_WORKERS      pool size (default: CPU count)
+  PASSWORD_HASH_CONCURRENCY  max hashes queued/running at once (default: 2 x workers)
+  LOGIN_RATE_LIMIT           attempts per email per window, 0 disables (default 0)
+  LOGIN_RATE_WINDOW          window in seconds (default 60)
+  LOGIN_RATE_MAX_KEYS        emails tracked at once, least recent dropped first (default 10000)
+  AUTH_CACHE_SIZE            decoded tokens / employees kept (default 1024)
+  AUTH_CACHE_TTL             seconds an employee stays cached (default 60)
+"""
+import asyncio
+import os
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+
+from app.cache import TTLCache
+from app.database import employee_collection
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", HASH_WORKERS * 2))
+LOGIN_RATE_LIMIT = int(os.getenv("LOGIN_RATE_LIMIT", "0"))
+LOGIN_RATE_WINDOW = float(os.getenv("LOGIN_RATE_WINDOW", "60"))
+LOGIN_RATE_MAX_KEYS = int(os.getenv("LOGIN_RATE_MAX_KEYS", "10000"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+SECRET_KEY = "supersecretkey_for_fyp_project"
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 60
+
+_executor = None
+# Semaphore apne pehle loop se bandh jata hai - har loop (tests, workers) ka alag
+_hash_slots = weakref.WeakKeyDictionary()  # event loop -> Semaphore
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        if HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def shutdown_executor():
+    """Stop the hashing pool (called on app shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+# Module-level functions taake process pool inhe pickle kar sake
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+def _slots() -> asyncio.Semaphore:
+    """The hash concurrency limit for the running event loop."""
+    loop = asyncio.get_running_loop()
+    slots = _hash_slots.get(loop)
+    if slots is None:
+        slots = _hash_slots[loop] = asyncio.Semaphore(HASH_CONCURRENCY)
+    return slots
+
+
+async def _run(fn, *args):
+    async with _slots():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    if not hashed:
+        return False
+    return await _run(_verify, password, hashed)
+
+
+class LoginRateLimiter:
+    """Sliding-window attempt counter per email (in-process).
+
+    Emails are kept least recently tried first: expired ones are dropped
+    from the front on every check, and past max_keys the oldest go.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = LOGIN_RATE_MAX_KEYS):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._attempts = OrderedDict()  # email -> deque of attempt times
+
+    def _prune(self, now: float):
+        while self._attempts:
+            email, attempts = next(iter(self._attempts.items()))
+            if attempts and now - attempts[-1] <= self.window:
+                return
+            del self._attempts[email]
+
+    def check(self, email: str):
+        """Record an attempt; raise 429 once the window is full."""
+        if self.limit <= 0:
+            return
+        now = time.monotonic()
+        self._prune(now)
+        key = email.lower()
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            attempts = self._attempts[key] = deque()
+        else:
+            self._attempts.move_to_end(key)
+        while attempts and now - attempts[0] > self.window:
+            attempts.popleft()
+        if len(attempts) >= self.limit:
+            raise HTTPException(status_code=429, detail="Too many login attempts. Try again later.")
+        attempts.append(now)
+        # Bohat saari alag emails (spray) se memory na bhare
+        while len(self._attempts) > self.max_keys:
+            self._attempts.popitem(last=False)
+
+    def __len__(self):
+        return len(self._attempts)
+
+    def reset(self, email: str):
+        self._attempts.pop(email.lower(), None)
+
+
+login_limiter = LoginRateLimiter(LOGIN_RATE_LIMIT, LOGIN_RATE_WINDOW)
+
+
+# --- JWT ---
+def create_access_token(data: dict):
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+
+_claims_cache = TTLCache(AUTH_CACHE_SIZE)
+_employee_cache = TTLCache(AUTH_CACHE_SIZE)
+_bearer = HTTPBearer()
+
+
+def decode_token(token: str) -> dict:
+    """Validate a bearer token; decoded claims are cached until the token expires."""
+    claims = _claims_cache.get(token)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        if not claims.get("id"):
+            raise HTTPException(status_code=401, detail="Invalid token")
+        _claims_cache.set(token, claims, claims.get("exp", time.time() + AUTH_CACHE_TTL))
+    return claims
+
+
+def invalidate_employee(employee_id):
+    """Drop a cached employee after it was written (update/signup)."""
+    _employee_cache.pop(str(employee_id))
+
+
+async def get_current_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(_bearer),
+) -> dict:
+    return decode_token(credentials.credentials)
+
+
+async def get_current_employee(claims: dict = Depends(get_current_claims)) -> dict:
+    """FastAPI dependency: the logged-in employee (without password)."""
+    employee_id = claims["id"]
+    emp = _employee_cache.get(employee_id)
+    if emp is None:
+        try:
+            obj_id = ObjectId(employee_id)
+        except Exception:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        emp = await employee_collection.find_one({"_id": obj_id}, {"password": 0})
+        if not emp:
+            raise HTTPException(status_code=401, detail="Employee no longer exists")
+        emp["_id"] = str(emp["_id"])
+        _employee_cache.set(employee_id, emp, time.time() + AUTH_CACHE_TTL)
+    return emp
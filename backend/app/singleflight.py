@@ -0,0 +1,85 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+While one call for a key is running, later calls with the same key wait
+for it and get the same result (or the same exception) instead of
+querying Mongo again. Nothing is kept once the call finishes, so this is
+not a cache: it only collapses a burst, e.g. a whole payroll team opening
+the attendance page at once, or the jobs page right after a new posting
+invalidated the response cache.
+
+The shared call runs as its own task: a caller that disconnects is
+cancelled, the others keep waiting for the result. Callers share the
+result object, so loaders must return data nobody mutates afterwards.
+
+    @coalesce("attendance.all")
+    async def month_attendance(month: int, year: int): ...
+"""
+import asyncio
+import functools
+import inspect
+from collections import Counter
+
+
+class SingleFlight:
+    def __init__(self):
+        # False: har call apna loader chalaye (benchmarks ka --no-coalesce)
+        self.enabled = True
+        self._calls = {}            # key -> running task
+        self.leaders = Counter()    # name -> calls that ran the loader
+        self.coalesced = Counter()  # name -> calls that waited for another one
+
+    async def do(self, name: str, key: str, fn):
+        """Result of fn(), shared with every concurrent call for the same key."""
+        if not self.enabled:
+            return await fn()
+        key = f"{name}:{key}"
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders[name] += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+        else:
+            self.coalesced[name] += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Sab callers cancel ho gaye hon to bhi "exception never retrieved" na aaye
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def lines(self) -> list:
+        lines = ["# TYPE singleflight_calls_total counter"]
+        for name in sorted(set(self.leaders) | set(self.coalesced)):
+            lines.append(f'singleflight_calls_total{{name="{name}",result="leader"}} {self.leaders[name]}')
+            lines.append(f'singleflight_calls_total{{name="{name}",result="coalesced"}} {self.coalesced[name]}')
+        lines += ["# TYPE singleflight_in_flight gauge", f"singleflight_in_flight {self.in_flight()}"]
+        return lines
+
+
+flights = SingleFlight()
+
+
+def call_key(signature: inspect.Signature, args, kwargs) -> str:
+    """Arguments by parameter name with defaults filled in, so f(1, 2) == f(year=2, month=1)."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return "&".join(f"{name}={value!r}" for name, value in sorted(bound.arguments.items()))
+
+
+def coalesce(name: str):
+    """Decorator: concurrent calls with equal arguments share one execution."""
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await flights.do(name, call_key(signature, args, kwargs), lambda: fn(*args, **kwargs))
+
+        return wrapper
+    return decorator
@@ -0,0 +1,192 @@
+"""CV upload handling: chunked, size-limited, off-loop disk writes.
+
+The upload is copied to a temp file in CHUNK_SIZE pieces (each write
+runs in a worker thread) and renamed into place only once it is
+complete, so a half-written PDF is never served.
+
+CVs are content-addressed: the SHA-256 of the bytes, computed while
+streaming, is the file name, and files are sharded two levels deep
+(uploads/cv/ab/cd/abcd....pdf) so no directory grows past a few thousand
+entries. The same PDF uploaded for ten jobs is stored once; cv_blobs
+keeps one {_id: sha, size, refs} document per file, with refs counting
+the applications that point at it.
+
+Oversized uploads are refused before they are read: Starlette parses
+(and spools) the whole multipart body before the route runs, so
+UploadLimitMiddleware answers 413 on a Content-Length above the limit
+and stops a body without one as soon as it grows past it.
+
+Environment:
+  CV_MAX_BYTES   largest accepted CV in bytes (default 5 MB)
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime
+
+from fastapi import HTTPException, UploadFile
+
+from app.database import cv_blob_collection
+
+CV_UPLOAD_DIR = os.path.join("uploads", "cv")
+CV_MAX_BYTES = int(os.getenv("CV_MAX_BYTES", str(5 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+PDF_MAGIC = b"%PDF-"
+CV_URL_PREFIX = "/cv/"
+LEGACY_URL_PREFIX = "/static/cv/"
+SHA_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+# Multipart headers + baaki form fields (naam, email, job_id) ke liye jagah
+FORM_OVERHEAD = 64 * 1024
+# (method, path) -> sab se bari request body
+UPLOAD_LIMITS = {("POST", "/api/applications/apply-file"): CV_MAX_BYTES + FORM_OVERHEAD}
+
+
+async def _send_too_large(send, limit: int):
+    body = ('{"detail":"Request body must be at most %d bytes"}' % limit).encode()
+    await send({"type": "http.response.start", "status": 413, "headers": [
+        (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), (b"connection", b"close"),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class UploadLimitMiddleware:
+    """Pure ASGI middleware: 413 for request bodies over UPLOAD_LIMITS, before they are parsed."""
+
+    def __init__(self, app, limits=None):
+        self.app = app
+        self.limits = UPLOAD_LIMITS if limits is None else limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get((scope["method"], scope["path"])) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                # Body parha hi nahi jata
+                return await _send_too_large(send, limit)
+
+        # Content-Length na ho (chunked) to ginte raho - limit paar hote hi app ko disconnect
+        state = {"read": 0, "exceeded": False, "started": False}
+
+        async def limited_receive():
+            if state["exceeded"]:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                state["read"] += len(message.get("body", b""))
+                if state["read"] > limit:
+                    state["exceeded"] = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if state["exceeded"]:
+                # App ka jawab (400/500 parse error) 413 se badal do
+                if message["type"] == "http.response.start" and not state["started"]:
+                    state["started"] = True
+                    await _send_too_large(send, limit)
+                return
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not state["exceeded"]:
+                raise
+            if not state["started"]:
+                await _send_too_large(send, limit)
+
+
+def _open_temp(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".part")
+    return os.fdopen(fd, "wb"), path
+
+
+def blob_path(sha: str, directory: str = None) -> str:
+    """uploads/cv/ab/cd/<sha>.pdf"""
+    # Default call ke waqt parha jata hai, taake benchmarks CV_UPLOAD_DIR badal saken
+    return os.path.join(directory or CV_UPLOAD_DIR, sha[:2], sha[2:4], f"{sha}.pdf")
+
+
+def cv_url_for(sha: str) -> str:
+    return f"{CV_URL_PREFIX}{sha}.pdf"
+
+
+def _finish(handle, temp_path: str, final_path: str):
+    handle.flush()
+    os.fsync(handle.fileno())
+    handle.close()
+    if os.path.exists(final_path):
+        # Yehi CV pehle se mojood hai - dobara store nahi karna
+        os.remove(temp_path)
+        return
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(temp_path, final_path)
+
+
+def _discard(handle, temp_path: str):
+    handle.close()
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_pdf_upload(file: UploadFile, directory: str = None):
+    """Stream an uploaded PDF to disk and return (sha256 hex, size)."""
+    directory = directory or CV_UPLOAD_DIR
+    # Size pehle se maloom ho to foran reject karo
+    size = getattr(file, "size", None)
+    if size is not None and size > CV_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"CV must be at most {CV_MAX_BYTES} bytes")
+
+    # content_type par bharosa nahi - PDF magic bytes check karo
+    chunk = await file.read(CHUNK_SIZE)
+    if not chunk.startswith(PDF_MAGIC):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+    handle, temp_path = await asyncio.to_thread(_open_temp, directory)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        while chunk:
+            written += len(chunk)
+            if written > CV_MAX_BYTES:
+                raise HTTPException(status_code=413, detail=f"CV must be at most {CV_MAX_BYTES} bytes")
+            digest.update(chunk)
+            await asyncio.to_thread(handle.write, chunk)
+            chunk = await file.read(CHUNK_SIZE)
+
+        sha = digest.hexdigest()
+        await asyncio.to_thread(_finish, handle, temp_path, blob_path(sha, directory))
+    except BaseException:
+        await asyncio.to_thread(_discard, handle, temp_path)
+        raise
+    return sha, written
+
+
+async def add_blob_ref(sha: str, size: int, count: int = 1):
+    """Count count more applications pointing at blob sha."""
+    await cv_blob_collection.update_one(
+        {"_id": sha},
+        {"$inc": {"refs": count}, "$setOnInsert": {"size": size, "created_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+def cv_path_from_url(cv_url: str):
+    """Local file path for a /cv/<sha>.pdf or /static/cv/... URL, or None for external links."""
+    if not cv_url:
+        return None
+    if cv_url.startswith(CV_URL_PREFIX):
+        sha = os.path.basename(cv_url[len(CV_URL_PREFIX):]).removesuffix(".pdf")
+        return blob_path(sha) if SHA_PATTERN.match(sha) else None
+    if cv_url.startswith(LEGACY_URL_PREFIX):
+        # basename: URL se folder ke bahar na ja sake
+        return os.path.join(CV_UPLOAD_DIR, os.path.basename(cv_url[len(LEGACY_URL_PREFIX):]))
+    return None
@@ -0,0 +1,15 @@
+"""Benchmark harness: synthetic data, concurrent endpoint load, micro-benchmarks.
+
+Run from the backend folder (see python -m benchmarks --help):
+
+  python -m benchmarks seed --employees 5000 --years 3 --applications 50000
+  python -m benchmarks load --requests 500 --concurrency 64 --out baseline.json
+  python -m benchmarks micro --quick --out micro.json
+  python -m benchmarks pool --workers 1 2 4 --pool-sizes 5 50 --out pool.json
+  python -m benchmarks compare baseline.json new.json
+
+seed and load use MONGO_URI and the HR_System_bench database (never the
+real HR_System one); --in-memory runs against mongomock-motor instead,
+which needs no server but reports no DB query counts. pool always needs
+a real server (it measures server-side connections).
+"""
@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+from app import database
+
+BENCH_DATABASE = "HR_System_bench"
+
+
+def _use_database(args):
+    if args.db == "HR_System":
+        sys.exit("Refusing to benchmark against the live HR_System database")
+    database.DATABASE_NAME = args.db
+    if args.in_memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--in-memory needs mongomock-motor (pip install mongomock-motor)")
+        database.client = AsyncMongoMockClient()
+    else:
+        database.connect()
+
+
+def _meta(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "command": args.command,
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "backend": "mongomock" if getattr(args, "in_memory", False) else "mongod",
+    }
+
+
+def _write(report: dict, out):
+    text = json.dumps(report, indent=2, default=str)
+    if out:
+        with open(out, "w") as handle:
+            handle.write(text + "\n")
+        print(f"Wrote {out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+async def _seed(args):
+    from benchmarks.seed import SeedConfig, seed
+    _use_database(args)
+    await database.ensure_indexes()
+    config = SeedConfig(
+        employees=args.employees, years=args.years, leaves_per_year=args.leaves_per_year,
+        jobs=args.jobs, applications=args.applications, seed=args.seed,
+    )
+    return await seed(config)
+
+
+async def _load(args):
+    from app import search_index
+    from app.singleflight import flights
+    from benchmarks.load import run_load
+    flights.enabled = not args.no_coalesce
+    report = {}
+    if args.seed_first:
+        report["seeded"] = (await _seed(args))["counts"]
+    else:
+        _use_database(args)
+        await database.ensure_indexes()
+    await search_index.refresh()
+    report["scenarios"] = await run_load(args.requests, args.concurrency, args.only, args.trace_memory, args.seed)
+    return report
+
+
+async def _history(args):
+    from benchmarks.load import run_leave_history
+    from benchmarks.seed import SeedConfig
+    from app.singleflight import flights
+    flights.enabled = not args.no_coalesce
+    _use_database(args)
+    await database.ensure_indexes()
+    config = SeedConfig(
+        employees=args.employees, years=args.years, leaves_per_year=args.leaves_per_year,
+        jobs=args.jobs, applications=args.applications, seed=args.seed,
+    )
+    return await run_leave_history(config, args.scales, args.requests, args.concurrency, args.seed)
+
+
+def _compare(old_path: str, new_path: str, threshold: float):
+    """Print p95 / throughput changes per scenario; exit 1 on regressions past threshold %."""
+    with open(old_path) as handle:
+        old = json.load(handle).get("scenarios", {})
+    with open(new_path) as handle:
+        new = json.load(handle).get("scenarios", {})
+    regressions = 0
+    print(f"{'scenario':34} {'p95 ms':>18} {'rps':>18} {'queries/req':>14}")
+    for name in sorted(set(old) & set(new)):
+        a, b = old[name], new[name]
+        if "latency_ms" not in a or "latency_ms" not in b:
+            continue
+        p95 = (b["latency_ms"]["p95"] - a["latency_ms"]["p95"]) / max(a["latency_ms"]["p95"], 1e-9) * 100
+        rps = (b["throughput_rps"] - a["throughput_rps"]) / max(a["throughput_rps"], 1e-9) * 100
+        flag = " <-" if p95 > threshold else ""
+        regressions += bool(flag)
+        print(
+            f"{name:34} {a['latency_ms']['p95']:>7} -> {b['latency_ms']['p95']:<7}{p95:+5.0f}% "
+            f"{a['throughput_rps']:>7} -> {b['throughput_rps']:<7}{rps:+5.0f}% "
+            f"{a['db_queries_per_request']:>5} -> {b['db_queries_per_request']:<5}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="HR backend benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def db_options(p):
+        p.add_argument("--db", default=BENCH_DATABASE, help="database name (default %(default)s)")
+        p.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of MONGO_URI")
+        p.add_argument("--seed", type=int, default=42)
+        p.add_argument("--out", help="write the JSON report here (default: stdout)")
+
+    def size_options(p):
+        p.add_argument("--employees", type=int, default=1000)
+        p.add_argument("--years", type=int, default=3)
+        p.add_argument("--leaves-per-year", type=int, default=6)
+        p.add_argument("--jobs", type=int, default=50)
+        p.add_argument("--applications", type=int, default=5000)
+
+    seed_p = sub.add_parser("seed", help="wipe and fill the benchmark database")
+    db_options(seed_p)
+    size_options(seed_p)
+
+    load_p = sub.add_parser("load", help="concurrent requests against every router")
+    db_options(load_p)
+    load_p.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    load_p.add_argument("--concurrency", type=int, default=32)
+    load_p.add_argument("--only", nargs="*", help="scenario name prefixes, e.g. leaves. employee.get")
+    load_p.add_argument("--trace-memory", action="store_true", help="tracemalloc peak per scenario (slower)")
+    load_p.add_argument("--no-coalesce", action="store_true", help="disable single-flight (baseline for burst.*)")
+    # --in-memory mein data process ke saath khatam - seed aur load ek hi run mein
+    load_p.add_argument("--seed-first", action="store_true", help="seed (sizes below) before loading")
+    size_options(load_p)
+
+    history_p = sub.add_parser("history", help="attendance read latency as leave history grows (re-seeds)")
+    db_options(history_p)
+    size_options(history_p)
+    history_p.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="leaves per year multipliers")
+    history_p.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    history_p.add_argument("--concurrency", type=int, default=32)
+    history_p.add_argument("--no-coalesce", action="store_true", help="disable single-flight on /attendance/all")
+    # 100x tak bhi saal mein 365 se kam leaves rahen
+    history_p.set_defaults(leaves_per_year=2)
+
+    micro_p = sub.add_parser("micro", help="CPU / disk micro-benchmarks (no database)")
+    micro_p.add_argument("--quick", action="store_true", help="small sizes")
+    micro_p.add_argument("--only", nargs="*", help="suites to run")
+    micro_p.add_argument("--cv-files", type=int, help="files for the cv_layout suite (e.g. 1000000)")
+    micro_p.add_argument("--out")
+
+    pool_p = sub.add_parser("pool", help="connection pool with several worker processes (needs mongod)")
+    pool_p.add_argument("--db", default=BENCH_DATABASE, help="database name (default %(default)s)")
+    pool_p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    pool_p.add_argument("--pool-sizes", type=int, nargs="+", default=[5, 50], help="MONGO_MAX_POOL_SIZE values")
+    pool_p.add_argument("--concurrency", type=int, default=64, help="requests in flight per worker")
+    pool_p.add_argument("--seconds", type=float, default=10)
+    pool_p.add_argument("--wait-queue-timeout-ms", type=int, default=1000)
+    pool_p.add_argument("--out")
+
+    compare_p = sub.add_parser("compare", help="diff two load reports")
+    compare_p.add_argument("old")
+    compare_p.add_argument("new")
+    compare_p.add_argument("--threshold", type=float, default=10.0, help="p95 regression %% that fails")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(1 if _compare(args.old, args.new, args.threshold) else 0)
+
+    report = {"meta": _meta(args)}
+    if args.command == "seed":
+        report.update(asyncio.run(_seed(args)))
+    elif args.command == "load":
+        report.update(asyncio.run(_load(args)))
+        report["config"] = {"requests": args.requests, "concurrency": args.concurrency, "coalesce": not args.no_coalesce}
+    elif args.command == "history":
+        report["results"] = asyncio.run(_history(args))
+        report["config"] = {"requests": args.requests, "concurrency": args.concurrency, "coalesce": not args.no_coalesce}
+    elif args.command == "pool":
+        if not database.MONGO_URL:
+            sys.exit("pool needs a real server: set MONGO_URI")
+        if args.db == "HR_System":
+            sys.exit("Refusing to benchmark against the live HR_System database")
+        from benchmarks.pool import run_pool
+        report["results"] = run_pool(
+            database.MONGO_URL, args.db, args.workers, args.pool_sizes, args.concurrency, args.seconds,
+            args.wait_queue_timeout_ms,
+        )
+    else:
+        from benchmarks.micro import run_micro
+        overrides = {"cv_layout": {"files": args.cv_files}} if args.cv_files else {}
+        report["results"] = run_micro(args.only, args.quick, **overrides)
+    _write(report, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""Concurrent load against every router, in-process through the ASGI app.
+
+Each scenario sends `requests` requests with `concurrency` in flight via
+httpx.ASGITransport, so the numbers cover routing, validation, Mongo and
+serialization but not the network or uvicorn. Scenarios run one after
+another; DB queries per request come from app.metrics (the pymongo
+command listener), diffed around each scenario.
+
+mixed.* scenarios keep a background scenario (logins) running while
+their reads are measured, and also run the reads alone first: the
+report has both latencies, so bcrypt work slowing down other requests
+shows up as the difference.
+
+run_leave_history() re-seeds with 1x/10x/100x leaves per year and times
+the attendance reads at each volume: their latency should stay flat as
+leave history grows, since the approved-leave counts are stored on the
+attendance rows instead of recounted from the leaves.
+"""
+import asyncio
+import itertools
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from app import metrics, uploads
+from app.cache import response_cache
+from app.database import application_collection, employee_collection, job_collection, leave_collection
+from app.main import app
+from app.singleflight import flights
+from benchmarks.seed import PASSWORD, SeedConfig, seed as seed_database
+
+PDF = b"%PDF-1.4\n" + b"synthetic cv python fastapi mongodb react\n" * 2000
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[int], str]            # request number -> path with query
+    body: Optional[Callable[[int], dict]] = None
+    files: Optional[Callable[[int], dict]] = None
+    headers: Optional[dict] = None
+    limit: Optional[int] = None           # at most this many requests (e.g. one per unsigned employee)
+    setup: Optional[Callable[[httpx.AsyncClient], Awaitable]] = None  # awaited once before the run
+    headers_for: Optional[Callable[[int], dict]] = None  # per-request headers
+    background: Optional["Scenario"] = None  # kept running (not measured) during this one
+    background_concurrency: int = 8
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux KB deta hai, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def _sample(rng: random.Random) -> dict:
+    """Keys from the seeded data that the scenarios pick from."""
+    employees = await employee_collection.find({}, {"employee_code": 1, "email": 1, "cnic": 1}).to_list(length=None)
+    signed = [e for e in employees if e.get("email")]
+    unsigned = [e for e in employees if not e.get("email")]
+    jobs = [str(j["_id"]) for j in await job_collection.find({}, {"_id": 1}).to_list(length=None)]
+    apps = await application_collection.find({}, {"candidate_email": 1}).limit(5000).to_list(length=None)
+    pending = await leave_collection.find({"status": "Pending"}, {"_id": 1}).limit(5000).to_list(length=None)
+    rng.shuffle(pending)
+    return {
+        "codes": [e["employee_code"] for e in employees],
+        "signed": signed,
+        "unsigned": [(e["employee_code"], e["cnic"]) for e in unsigned],
+        "jobs": jobs,
+        "apps": [str(a["_id"]) for a in apps],
+        "emails": sorted({a["candidate_email"] for a in apps}),
+        "pending_leaves": [str(l["_id"]) for l in pending],
+    }
+
+
+def _first_request(scenario_args: dict):
+    """setup that sends one request, so the scenario measures replays only."""
+    async def setup(client):
+        await client.request(**scenario_args)
+    return setup
+
+
+def scenarios(data: dict, rng: random.Random, token: str) -> list:
+    codes, jobs, apps, emails = data["codes"], data["jobs"], data["apps"], data["emails"]
+    now = datetime.utcnow()
+    year = now.year
+    pick = rng.choice
+    unique = itertools.count()
+    run_id = f"{int(time.time()) % 100000:05d}"
+    # Naye leave requests future mein, har employee ke liye alag din (overlap nahi)
+    leave_base = datetime(year + 1, 1, 1)
+
+    def new_leave(n):
+        day = leave_base + timedelta(days=(n // max(len(codes), 1)) * 3)
+        return {"employee_id": codes[n % len(codes)], "start_date": day.isoformat(),
+                "end_date": day.isoformat(), "reason": "bench", "leave_type": "Casual"}
+
+    replay_job = {"title": "Bench Job", "description": "python fastapi", "requirements": ["python"]}
+    replay_job_headers = {"Idempotency-Key": f"bench-{run_id}-replay"}
+    replay_apply = {"job_id": jobs[0] if jobs else "", "candidate_name": "Bench", "candidate_email": "replay@bench.example.com"}
+    replay_apply_headers = {"Idempotency-Key": f"bench-{run_id}-apply-replay"}
+
+    logins = Scenario("employee.login", "POST", lambda n: "/api/employee/login",
+                      body=lambda n: {"email": pick(data["signed"])["email"], "password": PASSWORD})
+
+    def new_code(n):
+        return f"B{run_id}{next(unique):06d}"
+
+    def new_cnic():
+        return f"8{run_id}{next(unique):07d}"
+
+    return [
+        # --- Employee ---
+        Scenario("employee.add", "POST", lambda n: "/api/employee/add",
+                 body=lambda n: {"employee_code": new_code(n), "cnic": new_cnic(), "full_name": "Bench", "salary": 90000}),
+        Scenario("employee.bulk_add_50", "POST", lambda n: "/api/employee/bulk-add",
+                 body=lambda n: [{"employee_code": new_code(n), "cnic": new_cnic(), "salary": 1} for _ in range(50)]),
+        Scenario("employee.signup", "POST", lambda n: "/api/employee/signup",
+                 body=lambda n: {"employee_code": data["unsigned"][n][0], "cnic": data["unsigned"][n][1],
+                                 "full_name": "Bench", "email": f"signup{n}.{run_id}@bench.example.com", "password": PASSWORD},
+                 limit=len(data["unsigned"])),
+        logins,
+        Scenario("employee.all", "GET", lambda n: "/api/employee/all?limit=100"),
+        Scenario("employee.export_csv", "GET", lambda n: "/api/employee/export?format=csv"),
+        Scenario("employee.me", "GET", lambda n: "/api/employee/me", headers={"Authorization": f"Bearer {token}"}),
+        Scenario("employee.get", "GET", lambda n: f"/api/employee/{pick(codes)}"),
+        Scenario("employee.patch", "PATCH", lambda n: f"/api/employee/{pick(codes)}",
+                 body=lambda n: {"mobile": f"0300{n:07d}"}),
+        # --- Jobs ---
+        Scenario("jobs.create", "POST", lambda n: "/api/jobs/create",
+                 body=lambda n: {"title": "Bench Job", "description": "python fastapi", "requirements": ["python"]}),
+        Scenario("jobs.all", "GET", lambda n: "/api/jobs/all?limit=100"),
+        # --- Applications ---
+        Scenario("applications.apply", "POST", lambda n: "/api/applications/apply",
+                 body=lambda n: {"job_id": pick(jobs), "candidate_name": "Bench", "candidate_email": f"b{n}@bench.example.com",
+                                 "cv_url": "https://example.com/cv.pdf"}),
+        Scenario("applications.apply_file", "POST", lambda n: "/api/applications/apply-file",
+                 body=lambda n: {"job_id": pick(jobs), "candidate_name": "Bench", "candidate_email": f"f{n}@bench.example.com"},
+                 files=lambda n: {"file": ("cv.pdf", PDF, "application/pdf")}),
+        Scenario("applications.all", "GET", lambda n: "/api/applications/all?limit=100"),
+        Scenario("applications.stats", "GET", lambda n: "/api/applications/stats"),
+        Scenario("applications.stats_job", "GET", lambda n: f"/api/applications/stats?job_id={pick(jobs)}"),
+        Scenario("applications.scoring_stats", "GET", lambda n: "/api/applications/scoring/stats"),
+        Scenario("applications.search", "GET", lambda n: "/api/applications/search?q=python+mongodb&k=20"),
+        Scenario("applications.candidate", "GET", lambda n: f"/api/applications/candidate/{pick(emails)}"),
+        Scenario("applications.by_job", "GET", lambda n: f"/api/applications/{pick(jobs)}"),
+        Scenario("applications.status", "PATCH", lambda n: f"/api/applications/{pick(apps)}/status",
+                 body=lambda n: {"status": pick(["Viewed", "Shortlisted", "Rejected"])}),
+        # --- Leaves ---
+        Scenario("leaves.request", "POST", lambda n: "/api/leaves/request", body=new_leave),
+        Scenario("leaves.validate_50", "POST", lambda n: "/api/leaves/validate",
+                 body=lambda n: [new_leave(n * 50 + i) for i in range(50)]),
+        Scenario("leaves.employee", "GET", lambda n: f"/api/leaves/employee/{pick(codes)}"),
+        Scenario("leaves.all", "GET", lambda n: "/api/leaves/all?limit=100&status=Approved"),
+        Scenario("leaves.calendar_month", "GET",
+                 lambda n: f"/api/leaves/calendar?start={year}-03-01T00:00:00&end={year}-03-31T00:00:00"),
+        Scenario("leaves.calendar_employee", "GET",
+                 lambda n: f"/api/leaves/calendar/employee/{pick(codes)}?month={rng.randint(1, 12)}&year={year}"),
+        Scenario("leaves.status", "PATCH", lambda n: f"/api/leaves/status/{data['pending_leaves'][n]}",
+                 body=lambda n: {"status": pick(["Approved", "Rejected"])}, limit=len(data["pending_leaves"])),
+        # --- Attendance ---
+        Scenario("attendance.all", "GET", lambda n: f"/api/attendance/all?month={rng.randint(1, 12)}&year={year - 1}"),
+        Scenario("attendance.export_csv", "GET", lambda n: f"/api/attendance/export?month=6&year={year - 1}&format=csv"),
+        Scenario("attendance.employee", "GET",
+                 lambda n: f"/api/attendance/employee/{pick(codes)}?month={rng.randint(1, 12)}&year={year - 1}"),
+        Scenario("attendance.upsert", "POST", lambda n: "/api/attendance/upsert",
+                 body=lambda n: {"employee_id": pick(codes), "month": rng.randint(1, 12), "year": year - 1,
+                                 "absent_days": rng.randint(0, 4), "daily_deduction": 2500}),
+        Scenario("attendance.bulk_upsert_100", "POST", lambda n: "/api/attendance/bulk-upsert",
+                 body=lambda n: [{"employee_id": code, "month": 1 + n % 12, "year": year - 1, "absent_days": 1,
+                                  "daily_deduction": 2500} for code in rng.sample(codes, min(100, len(codes)))]),
+        Scenario("attendance.payroll_dry_run", "POST", lambda n: f"/api/attendance/payroll?month=6&year={year - 1}&dry_run=true&preview=10"),
+        Scenario("attendance.reconcile", "POST", lambda n: f"/api/attendance/reconcile?month=6&year={year - 1}"),
+        # --- Idempotency-Key: fresh key har request (claim + store) vs ek hi key (replay) ---
+        Scenario("idempotency.jobs_create_new_key", "POST", lambda n: "/api/jobs/create",
+                 body=lambda n: {"title": "Bench Job", "description": "python fastapi", "requirements": ["python"]},
+                 headers_for=lambda n: {"Idempotency-Key": f"bench-{run_id}-{n}"}),
+        Scenario("idempotency.jobs_create_replay", "POST", lambda n: "/api/jobs/create",
+                 body=lambda n: replay_job, headers=replay_job_headers,
+                 setup=_first_request({"method": "POST", "url": "/api/jobs/create",
+                                       "json": replay_job, "headers": replay_job_headers})),
+        Scenario("idempotency.apply_file_replay", "POST", lambda n: "/api/applications/apply-file",
+                 body=lambda n: replay_apply, files=lambda n: {"file": ("cv.pdf", PDF, "application/pdf")},
+                 headers=replay_apply_headers,
+                 setup=_first_request({"method": "POST", "url": "/api/applications/apply-file", "data": replay_apply,
+                                       "files": {"file": ("cv.pdf", PDF, "application/pdf")},
+                                       "headers": replay_apply_headers})),
+        # --- Bursts of identical reads (single-flight; compare with --no-coalesce) ---
+        Scenario("burst.attendance_all", "GET", lambda n: f"/api/attendance/all?month=3&year={year - 1}"),
+        Scenario("burst.leaves_calendar", "GET",
+                 lambda n: f"/api/leaves/calendar?start={year}-03-01T00:00:00&end={year}-03-31T00:00:00"),
+        # Nayi job post hui: cache khali, sab ek saath miss karte hain
+        Scenario("burst.jobs_after_post", "GET", lambda n: "/api/jobs/all?limit=100",
+                 setup=lambda client: response_cache.invalidate("jobs")),
+        # --- Reads jab saath mein logins (bcrypt) chal rahe hon ---
+        Scenario("mixed.me_during_logins", "GET", lambda n: "/api/employee/me",
+                 headers={"Authorization": f"Bearer {token}"}, background=logins),
+        Scenario("mixed.leaves_employee_during_logins", "GET", lambda n: f"/api/leaves/employee/{pick(codes)}",
+                 background=logins),
+    ]
+
+
+async def _send(client, scenario: Scenario, n: int, latencies: list, statuses: Counter):
+    kwargs = {"headers": scenario.headers_for(n) if scenario.headers_for else scenario.headers}
+    if scenario.files:
+        kwargs.update(data=scenario.body(n), files=scenario.files(n))
+    elif scenario.body:
+        kwargs["json"] = scenario.body(n)
+    started = time.perf_counter()
+    response = await client.request(scenario.method, scenario.path(n), **kwargs)
+    await response.aread()
+    latencies.append((time.perf_counter() - started) * 1000)
+    statuses[response.status_code] += 1
+
+
+async def run_scenario(client, scenario: Scenario, requests: int, concurrency: int, trace_memory: bool) -> dict:
+    total = requests if scenario.limit is None else min(requests, scenario.limit)
+    if total <= 0:
+        return {"skipped": "no input data"}
+    alone = None
+    if scenario.background:
+        # Pehle akele - farq background ka asar hai
+        alone = await run_scenario(client, replace(scenario, background=None), requests, concurrency, False)
+    latencies, statuses = [], Counter()
+    counter = itertools.count()
+    if scenario.setup:
+        await scenario.setup(client)
+    before = metrics.totals()
+    coalesced_before = sum(flights.coalesced.values())
+    if trace_memory:
+        tracemalloc.start()
+
+    async def worker():
+        while True:
+            n = next(counter)
+            if n >= total:
+                return
+            await _send(client, scenario, n, latencies, statuses)
+
+    done = asyncio.Event()
+    background_latencies, background_statuses = [], Counter()
+    background_counter = itertools.count()
+
+    async def background_worker():
+        while not done.is_set():
+            await _send(client, scenario.background, next(background_counter), background_latencies, background_statuses)
+
+    background = [
+        asyncio.create_task(background_worker()) for _ in range(scenario.background_concurrency if scenario.background else 0)
+    ]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await asyncio.gather(*background)
+    after = metrics.totals()
+
+    result = {
+        "requests": total,
+        "concurrency": min(concurrency, total),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "errors_5xx": sum(count for code, count in statuses.items() if code >= 500),
+        "throughput_rps": round(total / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2),
+        },
+        "db_queries_per_request": round((after["queries"] - before["queries"]) / total, 2),
+        "db_documents_per_request": round((after["documents"] - before["documents"]) / total, 1),
+        "db_ms_per_request": round((after["db_seconds"] - before["db_seconds"]) * 1000 / total, 2),
+        "coalesced_requests": sum(flights.coalesced.values()) - coalesced_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if trace_memory:
+        result["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    if alone is not None:
+        # db_* upar background requests ke queries bhi gin lete hain
+        result["latency_ms_alone"] = alone["latency_ms"]
+        result["p99_increase_pct"] = round(
+            (result["latency_ms"]["p99"] / alone["latency_ms"]["p99"] - 1) * 100, 1
+        ) if alone["latency_ms"]["p99"] else None
+        result["background"] = {
+            "scenario": scenario.background.name,
+            "concurrency": scenario.background_concurrency,
+            "requests": len(background_latencies),
+            "statuses": {str(code): count for code, count in sorted(background_statuses.items())},
+            "p99_ms": round(percentile(background_latencies, 99), 2),
+        }
+    return result
+
+
+async def run_load(requests: int = 200, concurrency: int = 32, only=None, trace_memory: bool = False, seed: int = 42) -> dict:
+    # Benchmark ki CVs working tree ke uploads/ mein na jayen
+    with tempfile.TemporaryDirectory(prefix="bench-cv-") as cv_dir:
+        real_dir, uploads.CV_UPLOAD_DIR = uploads.CV_UPLOAD_DIR, cv_dir
+        try:
+            return await _run_load(requests, concurrency, only, trace_memory, seed)
+        finally:
+            uploads.CV_UPLOAD_DIR = real_dir
+
+
+async def _run_load(requests: int, concurrency: int, only, trace_memory: bool, seed: int) -> dict:
+    rng = random.Random(seed)
+    data = await _sample(rng)
+    # Route ka exception 500 gina jaye, poora run na ruke
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        token = ""
+        if data["signed"]:
+            login = await client.post("/api/employee/login", json={"email": data["signed"][0]["email"], "password": PASSWORD})
+            token = login.json().get("access_token", "")
+
+        for scenario in scenarios(data, rng, token):
+            if only and not any(scenario.name.startswith(prefix) for prefix in only):
+                continue
+            results[scenario.name] = await run_scenario(client, scenario, requests, concurrency, trace_memory)
+            print(f"  {scenario.name:32} {results[scenario.name].get('throughput_rps', '-'):>8} rps", file=sys.stderr)
+    return results
+
+
+LEAVE_HISTORY_SCENARIOS = ("attendance.all", "attendance.employee")
+
+
+async def run_leave_history(config: SeedConfig, scales=(1, 10, 100), requests: int = 200, concurrency: int = 32,
+                            seed: int = 42) -> dict:
+    """Seed with config.leaves_per_year x each scale, then time the attendance reads."""
+    results = {}
+    for scale in scales:
+        seeded = await seed_database(replace(config, leaves_per_year=config.leaves_per_year * scale))
+        print(f"leaves x{scale}: {seeded['counts']['leaves']} leaves", file=sys.stderr)
+        scenarios = await run_load(requests, concurrency, LEAVE_HISTORY_SCENARIOS, False, seed)
+        results[f"leaves_x{scale}"] = {
+            "leaves": seeded["counts"]["leaves"],
+            "leave_days": seeded["counts"]["leave_days"],
+            **{
+                name: {
+                    "p50_ms": result["latency_ms"]["p50"],
+                    "p95_ms": result["latency_ms"]["p95"],
+                    "throughput_rps": result["throughput_rps"],
+                    "db_documents_per_request": result["db_documents_per_request"],
+                    "errors_5xx": result["errors_5xx"],
+                }
+                for name, result in scenarios.items()
+            },
+        }
+    return results
@@ -0,0 +1,449 @@
+"""Micro-benchmarks for the CPU / disk heavy building blocks.
+
+No database needed. Each function returns a JSON-able dict; sizes are
+arguments so a quick run and a full-scale run use the same code.
+"""
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, UploadFile
+
+from app import cv_text, payroll, security
+from app.cv_text import score_cv
+from app.interval_tree import IntervalTree
+from app.leave_calendar import expand_leave_days
+from app.responses import dumps
+from app.search_index import InvertedIndex
+from app.uploads import CV_MAX_BYTES, FORM_OVERHEAD, UploadLimitMiddleware, blob_path, save_pdf_upload
+from benchmarks.seed import SKILLS
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    """Fastest of repeat runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(min(timings), 3)
+
+
+# --- 1. SERIALIZATION: per-document mutation + jsonable_encoder vs MongoJSONResponse ---
+def serialization(n: int = 10_000) -> dict:
+    rng = random.Random(1)
+    docs = [
+        {
+            "_id": ObjectId(), "employee_code": f"EMP{i:05d}", "full_name": "Ali Raza", "role": "Employee",
+            "salary": float(rng.randrange(60_000, 400_000)), "email": f"e{i}@x.pk", "password": "$2b$12$" + "x" * 53,
+            "joined_at": datetime(2020, 1, 1) + timedelta(days=i % 2000), "paid_leaves_total": 20, "paid_leaves_used": 3,
+        }
+        for i in range(n)
+    ]
+
+    def old_path():
+        out = []
+        for doc in docs:
+            doc = dict(doc)
+            doc["_id"] = str(doc["_id"])
+            doc.pop("password", None)
+            out.append(doc)
+        json.dumps(jsonable_encoder(out)).encode()
+
+    projected = [{k: v for k, v in doc.items() if k != "password"} for doc in docs]
+    return {
+        "documents": n,
+        "mutate_jsonable_encoder_ms": best_of(old_path),
+        "orjson_response_ms": best_of(lambda: dumps(projected)),
+    }
+
+
+# --- 2. PAYROLL: Python loop per employee vs NumPy columns ---
+def _payroll_cols(n: int, rng: np.random.Generator) -> dict:
+    approved = rng.integers(0, 6, n)
+    paid = rng.integers(0, approved + 1)
+    return {
+        "employee_code": [f"EMP{i}" for i in range(n)],
+        "known_employee": np.ones(n, dtype=bool),
+        "absent_days": approved + rng.integers(0, 3, n),
+        "approved_leaves": approved,
+        "paid_leave_days": paid,
+        "daily_deduction": rng.choice([2000.0, 2500.0, 3000.0], n),
+        "salary": rng.integers(60_000, 400_000, n).astype(np.float64),
+        "paid_leaves_total": np.full(n, 20),
+        "paid_leaves_used": paid + rng.integers(0, 15, n),
+    }
+
+
+def _payroll_loop(cols: dict):
+    out = []
+    for i in range(len(cols["employee_code"])):
+        approved = int(cols["approved_leaves"][i])
+        paid = int(cols["paid_leave_days"][i])
+        used_before = max(0, int(cols["paid_leaves_used"][i]) - paid)
+        charged = min(paid, max(0, int(cols["paid_leaves_total"][i]) - used_before))
+        unapproved = max(0, int(cols["absent_days"][i]) - approved)
+        deduction = (unapproved + paid - charged) * float(cols["daily_deduction"][i])
+        out.append(max(0.0, float(cols["salary"][i]) - deduction))
+    return out
+
+
+def payroll_compute(sizes=(10_000, 100_000, 1_000_000)) -> dict:
+    rng = np.random.default_rng(1)
+    results = {}
+    for n in sizes:
+        cols = _payroll_cols(n, rng)
+        results[str(n)] = {
+            "python_loop_ms": best_of(lambda: _payroll_loop(cols), repeat=1 if n >= 1_000_000 else 3),
+            "numpy_ms": best_of(lambda: payroll.compute(cols)),
+        }
+    return results
+
+
+# --- 3. BM25 CV SEARCH ---
+def bm25(documents: int = 100_000, queries: int = 200) -> dict:
+    rng = random.Random(1)
+    index = InvertedIndex()
+    started = time.perf_counter()
+    for i in range(documents):
+        index.add(str(i), " ".join(rng.choices(SKILLS, k=120)), job_id=f"job{i % 50}")
+    build_ms = (time.perf_counter() - started) * 1000
+
+    latencies = []
+    for _ in range(queries):
+        q = " ".join(rng.sample(SKILLS, 4))
+        started = time.perf_counter()
+        index.search(q, k=20, job_id=rng.choice([None, "job7"]))
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "documents": documents,
+        "build_ms": round(build_ms, 1),
+        "query_p50_ms": round(statistics.median(latencies), 3),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+# --- 4. LEAVE VALIDATION: interval tree vs scanning every leave ---
+def leave_validation(employees: int = 1000, years: int = 5, per_year: int = 12, batch: int = 5000) -> dict:
+    rng = random.Random(1)
+    base = datetime(2020, 1, 1)
+    history = {}
+    for e in range(employees):
+        spans = []
+        for n in range(years * per_year):
+            start = base + timedelta(days=n * (365 // per_year) + rng.randrange(20))
+            spans.append((start, start + timedelta(days=rng.randrange(4))))
+        history[e] = spans
+    proposals = []
+    for _ in range(batch):
+        start = base + timedelta(days=rng.randrange(365 * years))
+        proposals.append((rng.randrange(employees), start, start + timedelta(days=rng.randrange(5))))
+
+    def build():
+        trees = {}
+        for e, spans in history.items():
+            tree = trees[e] = IntervalTree()
+            for start, end in spans:
+                tree.add(start, end)
+        return trees
+
+    trees = build()
+
+    def with_tree():
+        return sum(trees[e].first_overlap(s, t) is not None for e, s, t in proposals)
+
+    def with_scan():
+        return sum(any(a <= t and s <= b for a, b in history[e]) for e, s, t in proposals)
+
+    assert with_tree() == with_scan()
+    return {
+        "employees": employees,
+        "history_leaves": employees * years * per_year,
+        "batch": batch,
+        "interval_tree_build_ms": best_of(build, repeat=3),
+        "interval_tree_ms": best_of(with_tree, repeat=3),
+        "linear_scan_ms": best_of(with_scan, repeat=3),
+        "expand_multi_year_leave_ms": best_of(lambda: expand_leave_days(base, base + timedelta(days=365 * years))),
+    }
+
+
+# --- 5. BCRYPT: thread pool vs process pool ---
+def bcrypt_pools(hashes: int = 32, workers: int = os.cpu_count() or 1) -> dict:
+    results = {"hashes": hashes, "workers": workers}
+    for name, pool_class in (("thread", ThreadPoolExecutor), ("process", ProcessPoolExecutor)):
+        with pool_class(max_workers=workers) as pool:
+            list(pool.map(security._hash, ["warmup"] * workers))
+            started = time.perf_counter()
+            list(pool.map(security._hash, [f"password{i}" for i in range(hashes)]))
+            elapsed = time.perf_counter() - started
+        results[f"{name}_hashes_per_second"] = round(hashes / elapsed, 1)
+    return results
+
+
+# --- 5.b CV SCORING: score_cv throughput in-process and over the spawn pool ---
+def _sample_pdf(pages: list) -> bytes:
+    """Minimal PDF with one Flate-compressed text stream per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines = b" ".join(b"(%s) Tj T*" % line.encode() for line in text.split("\n"))
+        stream = zlib.compress(b"BT /F1 10 Tf 12 TL 40 800 Td " + lines + b" ET")
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _score_all(jobs: list) -> int:
+    for path, requirements, description in jobs:
+        score_cv(path, requirements, description)
+    return len(jobs)
+
+
+def cv_scoring(cvs: int = 200, pages: int = 3, workers=None) -> dict:
+    rng = random.Random(1)
+    cores = os.cpu_count() or 1
+    workers = workers or sorted({1, 2, 4, 8, 16, cores} & set(range(1, cores + 1)))
+    # pypdf na ho to fallback parser naapa jata hai - report mein likho
+    results = {"cvs": cvs, "pages": pages, "cpu_count": cores,
+               "parser": "pypdf" if cv_text.PdfReader is not None else "fallback"}
+    with tempfile.TemporaryDirectory() as directory:
+        jobs = []
+        for i in range(cvs):
+            text = ["\n".join(" ".join(rng.choices(SKILLS + ["experience", "team", "project"], k=12))
+                              for _ in range(40)) for _ in range(pages)]
+            path = os.path.join(directory, f"cv{i}.pdf")
+            with open(path, "wb") as handle:
+                handle.write(_sample_pdf(text))
+            jobs.append((path, rng.sample(SKILLS, 4), " ".join(rng.sample(SKILLS, 8))))
+
+        started = time.perf_counter()
+        _score_all(jobs)
+        rate = cvs / (time.perf_counter() - started)
+        results["in_process"] = {"cvs_per_second": round(rate, 1), "cvs_per_second_per_core": round(rate, 1)}
+
+        # app.scoring jaisa spawn pool; har CV alag task (worker yehi karta hai)
+        spawn = multiprocessing.get_context("spawn")
+        for count in workers:
+            with ProcessPoolExecutor(max_workers=count, mp_context=spawn) as pool:
+                list(pool.map(_score_all, [jobs[:1]] * count))  # processes start + import
+                started = time.perf_counter()
+                list(pool.map(score_cv, *zip(*jobs), chunksize=1))
+                rate = cvs / (time.perf_counter() - started)
+            results[f"pool_{count}"] = {
+                "cvs_per_second": round(rate, 1),
+                "cvs_per_second_per_core": round(rate / min(count, cores), 1),
+            }
+    return results
+
+
+# --- 6. CV UPLOAD: streamed, hashed save of a large PDF ---
+def upload(size_mb: int = 5, repeat: int = 5) -> dict:
+    payload = b"%PDF-1.4\n" + os.urandom(size_mb * 2**20 - 9)
+
+    async def save_once(directory):
+        file = UploadFile(io.BytesIO(payload), size=len(payload), filename="cv.pdf",
+                          headers=Headers({"content-type": "application/pdf"}))
+        return await save_pdf_upload(file, directory)
+
+    with tempfile.TemporaryDirectory() as directory:
+        timings = []
+        tracemalloc.start()
+        for i in range(repeat):
+            # Har dafa naya folder - warna content hash se dedup ho jata
+            started = time.perf_counter()
+            asyncio.run(save_once(os.path.join(directory, str(i))))
+            timings.append((time.perf_counter() - started) * 1000)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        "size_mb": size_mb,
+        "save_ms": round(min(timings), 2),
+        # payload khud bhi memory mein hai - peak us ke upar ka hai
+        "peak_traced_mb_over_payload": round(max(peak - len(payload), 0) / 2**20, 2),
+    }
+
+
+# --- 6.b CONCURRENT UPLOADS: peak RSS of one server process taking N uploads at once ---
+def _rss_now_mb() -> float:
+    try:
+        with open("/proc/self/statm") as handle:
+            pages = int(handle.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        from benchmarks.load import peak_rss_mb
+        return peak_rss_mb()
+
+
+def _concurrent_upload_worker(size_mb: int, uploads: int, directory: str) -> dict:
+    """Runs in a fresh process, so ru_maxrss is this run's peak only."""
+    import httpx
+    from fastapi import FastAPI, File, UploadFile as FormFile
+
+    from benchmarks.load import peak_rss_mb
+
+    # apply-file ka upload hissa (multipart parse + save_pdf_upload), bina Mongo ke
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload_route(file: FormFile = File(...)):
+        sha, size = await save_pdf_upload(file, directory)
+        return {"size": size}
+
+    limit = max(CV_MAX_BYTES, size_mb * 2**20) + FORM_OVERHEAD
+    app.add_middleware(UploadLimitMiddleware, limits={("POST", "/upload"): limit})
+
+    boundary = "benchmarkboundary"
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="cv.pdf"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + b"%PDF-1.4\n" + os.urandom(size_mb * 2**20 - 9) + f"\r\n--{boundary}--\r\n".encode()
+    headers = {"content-type": f"multipart/form-data; boundary={boundary}"}
+
+    async def chunks():
+        # 64 KB tukron mein, taake saari uploads ek saath chalti rahen
+        for start in range(0, len(body), 64 * 1024):
+            yield body[start:start + 64 * 1024]
+            await asyncio.sleep(0)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            return await asyncio.gather(*(
+                client.post("/upload", content=chunks(), headers=headers) for _ in range(uploads)
+            ))
+
+    baseline = _rss_now_mb()
+    started = time.perf_counter()
+    responses = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    peak = peak_rss_mb()
+    return {
+        "uploads": uploads,
+        "failed": sum(1 for r in responses if r.status_code != 200),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": peak,
+        "per_upload_mb": round(max(peak - baseline, 0) / uploads, 2),
+    }
+
+
+def concurrent_upload(size_mb: int = 5, concurrency=(1, 10, 50)) -> dict:
+    results = {"size_mb": size_mb}
+    spawn = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        for uploads in concurrency:
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                results[f"concurrent_{uploads}"] = pool.submit(
+                    _concurrent_upload_worker, size_mb, uploads, os.path.join(directory, str(uploads))
+                ).result()
+    return results
+
+
+# --- 7. CV STORE LAYOUT: one flat folder vs two-level sharding ---
+def _disk_usage(root: str) -> int:
+    total = 0
+    for folder, dirs, files in os.walk(root):
+        total += os.stat(folder).st_blocks * 512
+        for name in files:
+            total += os.stat(os.path.join(folder, name)).st_blocks * 512
+    return total
+
+
+def cv_layout(files: int = 100_000, lookups: int = 10_000) -> dict:
+    rng = random.Random(1)
+    shas = [f"{rng.getrandbits(256):064x}" for _ in range(files)]
+    results = {"files": files}
+    with tempfile.TemporaryDirectory() as root:
+        for layout in ("flat", "sharded"):
+            directory = os.path.join(root, layout)
+            os.makedirs(directory)
+            path_for = (lambda sha: os.path.join(directory, f"{sha}.pdf")) if layout == "flat" \
+                else (lambda sha: blob_path(sha, directory))
+            started = time.perf_counter()
+            for sha in shas:
+                path = path_for(sha)
+                if layout == "sharded":
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, "wb").close()
+            create_s = time.perf_counter() - started
+
+            sample = rng.sample(shas, min(lookups, files)) + [f"{rng.getrandbits(256):064x}" for _ in range(lookups // 10)]
+            started = time.perf_counter()
+            for sha in sample:
+                os.path.exists(path_for(sha))
+            lookup_us = (time.perf_counter() - started) * 1e6 / len(sample)
+
+            started = time.perf_counter()
+            largest = max(len(os.listdir(folder)) for folder, _, _ in os.walk(directory))
+            results[layout] = {
+                "create_s": round(create_s, 2),
+                "lookup_us": round(lookup_us, 2),
+                "largest_directory_entries": largest,
+                "walk_s": round(time.perf_counter() - started, 2),
+                "metadata_bytes": _disk_usage(directory),
+            }
+    return results
+
+
+SUITES = {
+    "serialization": serialization,
+    "payroll": payroll_compute,
+    "bm25": bm25,
+    "leave_validation": leave_validation,
+    "bcrypt": bcrypt_pools,
+    "cv_scoring": cv_scoring,
+    "upload": upload,
+    "concurrent_upload": concurrent_upload,
+    "cv_layout": cv_layout,
+}
+
+# --quick: chhote sizes, CI / laptop par seconds mein
+QUICK = {
+    "serialization": {"n": 10_000},
+    "payroll": {"sizes": (10_000, 100_000)},
+    "bm25": {"documents": 10_000, "queries": 50},
+    "leave_validation": {"employees": 200, "years": 3, "batch": 1000},
+    "bcrypt": {"hashes": 8},
+    "cv_scoring": {"cvs": 50, "pages": 2},
+    "upload": {"size_mb": 5, "repeat": 2},
+    "concurrent_upload": {"size_mb": 5, "concurrency": (1, 10)},
+    "cv_layout": {"files": 10_000, "lookups": 2000},
+}
+
+
+def run_micro(only=None, quick: bool = False, **overrides) -> dict:
+    results = {}
+    for name, fn in SUITES.items():
+        if only and name not in only:
+            continue
+        kwargs = dict(QUICK.get(name, {})) if quick else {}
+        kwargs.update(overrides.get(name, {}))
+        results[name] = fn(**kwargs)
+    return results
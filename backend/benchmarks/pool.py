@@ -0,0 +1,153 @@
+"""Connection pool under several worker processes against a real mongod.
+
+Each worker is a separate process with its own app and Motor client, as
+with uvicorn --workers N, built from the MONGO_* pool settings under
+test. All workers start together and keep `concurrency` requests in
+flight for `seconds`. The parent samples serverStatus.connections.current
+meanwhile, so the report shows how the server-side connection count
+scales with workers x maxPoolSize, and whether a small pool runs out
+(checkout waits, WaitQueueTimeout failures, 5xx).
+
+Needs MONGO_URI and a seeded benchmark database (python -m benchmarks seed).
+"""
+import asyncio
+import itertools
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from benchmarks.load import percentile
+
+# Har request Mongo tak jaye (response cache wale routes nahi)
+PATHS = (
+    "/api/employee/{code}",
+    "/api/leaves/employee/{code}",
+    "/api/attendance/employee/{code}?month={month}&year={year}",
+)
+
+
+def _worker(mongo_url: str, db: str, env: dict, concurrency: int, seconds: float, barrier, results):
+    """One server process: its own client and pool, load through the ASGI app."""
+    os.environ.update(env)
+    import httpx
+
+    from app import database, metrics
+    from app.main import app
+
+    database.MONGO_URL = mongo_url
+    database.DATABASE_NAME = db
+
+    async def main():
+        database.connect()
+        codes = [
+            e["employee_code"]
+            async for e in database.employee_collection.find({}, {"employee_code": 1}).limit(1000)
+        ]
+        year = time.gmtime().tm_year - 1
+        rng = random.Random(os.getpid())
+        latencies, statuses = [], Counter()
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await asyncio.to_thread(barrier.wait)
+            deadline = time.perf_counter() + seconds
+
+            async def user():
+                while time.perf_counter() < deadline:
+                    path = rng.choice(PATHS).format(code=rng.choice(codes), month=rng.randint(1, 12), year=year)
+                    started = time.perf_counter()
+                    response = await client.get(path)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    statuses[response.status_code] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        pool = metrics.pool_listener
+        database.close()
+        return {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "statuses": {str(code): count for code, count in sorted(statuses.items())},
+            "pool_connections_open": pool.open,
+            "pool_checkouts": pool.checkouts,
+            "pool_checkout_failures": pool.checkout_failures,
+            "pool_wait_ms_avg": round(pool.wait_seconds * 1000 / max(pool.checkouts, 1), 3),
+            "pool_wait_ms_max": round(pool.max_wait_seconds * 1000, 2),
+        }
+
+    try:
+        results.put(asyncio.run(main()))
+    except Exception as e:
+        results.put({"error": repr(e)})
+        barrier.abort()
+
+
+def run_case(mongo_url: str, db: str, workers: int, pool_size: int, concurrency: int, seconds: float,
+             wait_queue_timeout_ms: int) -> dict:
+    """workers processes with maxPoolSize=pool_size each, run at the same time."""
+    from pymongo import MongoClient
+
+    env = {"MONGO_MAX_POOL_SIZE": str(pool_size), "MONGO_WAIT_QUEUE_TIMEOUT_MS": str(wait_queue_timeout_ms)}
+    spawn = multiprocessing.get_context("spawn")
+    barrier = spawn.Barrier(workers + 1)
+    results = spawn.Queue()
+    processes = [
+        spawn.Process(target=_worker, args=(mongo_url, db, env, concurrency, seconds, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    admin = MongoClient(mongo_url, maxPoolSize=1)
+    try:
+        baseline = admin.admin.command("serverStatus")["connections"]["current"]
+        peak = baseline
+        try:
+            barrier.wait(timeout=120)
+        except threading.BrokenBarrierError:
+            pass  # kisi worker ka error results mein aayega
+        while any(process.is_alive() for process in processes):
+            peak = max(peak, admin.admin.command("serverStatus")["connections"]["current"])
+            time.sleep(0.1)
+    finally:
+        admin.close()
+    per_worker = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join()
+
+    errors = [r["error"] for r in per_worker if "error" in r]
+    if errors:
+        return {"workers": workers, "max_pool_size": pool_size, "errors": errors}
+    statuses = Counter()
+    for result in per_worker:
+        statuses.update(result["statuses"])
+    return {
+        "workers": workers,
+        "max_pool_size": pool_size,
+        "concurrency_per_worker": concurrency,
+        "throughput_rps": round(sum(r["throughput_rps"] for r in per_worker), 1),
+        "worst_p99_ms": max(r["p99_ms"] for r in per_worker),
+        "statuses": dict(sorted(statuses.items())),
+        "pool_checkout_failures": sum(r["pool_checkout_failures"] for r in per_worker),
+        "pool_wait_ms_max": max(r["pool_wait_ms_max"] for r in per_worker),
+        # Server par hamare connections (monitoring wale bhi) - workers x maxPoolSize se zyada na hon
+        "server_connections_added": peak - baseline,
+        "server_connections_limit": workers * (pool_size + 2),
+        "per_worker": per_worker,
+    }
+
+
+def run_pool(mongo_url: str, db: str, workers=(1, 2, 4), pool_sizes=(5, 50), concurrency: int = 64,
+             seconds: float = 10, wait_queue_timeout_ms: int = 1000) -> dict:
+    results = {}
+    for count, size in itertools.product(workers, pool_sizes):
+        name = f"workers_{count}_pool_{size}"
+        results[name] = run_case(mongo_url, db, count, size, concurrency, seconds, wait_queue_timeout_ms)
+        print(f"  {name:24} {results[name].get('throughput_rps', '-'):>8} rps", file=sys.stderr)
+    return results
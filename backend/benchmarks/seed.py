@@ -0,0 +1,247 @@
+"""Synthetic HR data shaped like app/models.py.
+
+seed() wipes the benchmark database and fills it with employees,
+multi-year leaves (with their leave_days calendar rows), monthly
+attendance with the stored counters, jobs, applications and CV texts.
+The same SeedConfig and seed value always produce the same data.
+"""
+import hashlib
+import random
+from collections import Counter
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app import application_stats
+from app.database import (
+    application_collection,
+    application_stats_collection,
+    attendance_collection,
+    cv_blob_collection,
+    cv_text_collection,
+    employee_collection,
+    job_collection,
+    leave_collection,
+    leave_days_collection,
+)
+from app.leave_calendar import days_per_month, expand_leave_days
+from app.security import pwd_context
+
+INSERT_BATCH = 5000
+PASSWORD = "benchmark-password"
+
+FIRST_NAMES = ["Ali", "Sara", "Usman", "Ayesha", "Bilal", "Fatima", "Hamza", "Zainab", "Omar", "Hira"]
+LAST_NAMES = ["Raza", "Khan", "Ahmed", "Malik", "Qureshi", "Sheikh", "Butt", "Chaudhry", "Siddiqui", "Iqbal"]
+ROLES = ["Employee"] * 8 + ["HR", "Admin"]
+CITIES = ["Karachi", "Lahore", "Islamabad", "Remote"]
+SKILLS = [
+    "python", "fastapi", "django", "react", "javascript", "typescript", "mongodb", "postgresql",
+    "aws", "docker", "kubernetes", "java", "spring", "golang", "redis", "kafka", "css", "figma",
+    "excel", "accounting", "payroll", "recruitment", "sales", "marketing", "seo", "linux",
+]
+TITLES = ["Backend Developer", "Frontend Developer", "Data Analyst", "HR Officer", "Accountant", "DevOps Engineer"]
+LEAVE_TYPES = ["Casual", "Sick", "Annual"]
+LEAVE_STATUSES = ["Approved"] * 7 + ["Pending"] * 2 + ["Rejected"]
+APPLICATION_STATUSES = ["Pending"] * 5 + ["Unviewed", "Viewed", "Shortlisted", "Rejected"]
+
+
+@dataclass
+class SeedConfig:
+    employees: int = 1000
+    years: int = 3
+    leaves_per_year: int = 6
+    jobs: int = 50
+    applications: int = 5000
+    unsigned_employees: float = 0.1  # added by HR but not signed up yet (for /signup)
+    seed: int = 42
+
+
+def employee_code(i: int) -> str:
+    return f"EMP{i:05d}"
+
+
+async def _insert(collection, docs: list):
+    for start in range(0, len(docs), INSERT_BATCH):
+        await collection.insert_many(docs[start:start + INSERT_BATCH], ordered=False)
+
+
+def _employees(config: SeedConfig, rng: random.Random) -> list:
+    # bcrypt mehnga hai - sab signed-up employees ka ek hi hash
+    password_hash = pwd_context.hash(PASSWORD)
+    unsigned = int(config.employees * config.unsigned_employees)
+    docs = []
+    for i in range(config.employees):
+        signed_up = i >= unsigned
+        docs.append({
+            "employee_code": employee_code(i),
+            "cnic": f"{4210100000000 + i:013d}",
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "role": rng.choice(ROLES),
+            "salary": float(rng.randrange(60_000, 400_000, 5_000)),
+            "mobile": f"03{rng.randrange(10**8, 10**9)}",
+            "email": f"emp{i}@bench.example.com" if signed_up else "",
+            "password": password_hash if signed_up else "",
+            "joined_at": datetime(2015, 1, 1) + timedelta(days=rng.randrange(3000)),
+            "paid_leaves_total": 20,
+            "paid_leaves_used": 0,
+        })
+    return docs
+
+
+def _leaves(config: SeedConfig, rng: random.Random, first_year: int):
+    """Non-overlapping leaves per employee + calendar rows for the approved ones."""
+    leaves, leave_days = [], []
+    approved_per_month = Counter()  # (employee, month, year) -> days
+    used_this_year = Counter()
+    days_in_range = 365 * config.years
+    if config.leaves_per_year > 365:
+        raise ValueError("leaves_per_year above 365 cannot be seeded without overlaps")
+    for i in range(config.employees):
+        code = employee_code(i)
+        count = config.leaves_per_year * config.years
+        # Har leave apne hisse mein - overlap nahi hoga
+        slot = days_in_range // max(count, 1)
+        for n in range(count):
+            start = datetime(first_year, 1, 1) + timedelta(days=n * slot + rng.randrange(max(slot - 5, 1)))
+            # Chhote hisse (bohat leaves) mein leave hissa paar na kare
+            end = start + timedelta(days=min(rng.choice([0, 0, 1, 2, 4]), slot - 1))
+            status = rng.choice(LEAVE_STATUSES)
+            leave = {
+                "_id": ObjectId(),
+                "employee_id": code,
+                "start_date": start,
+                "end_date": end,
+                "reason": "Synthetic leave",
+                "leave_type": rng.choice(LEAVE_TYPES),
+                "status": status,
+                "admin_comments": None,
+            }
+            if status == "Approved":
+                days = expand_leave_days(start, end)
+                for day in days:
+                    leave_days.append({
+                        "leave_id": leave["_id"], "employee_id": code,
+                        "date": day, "month": day.month, "year": day.year,
+                    })
+                for (month, year), n_days in days_per_month(days).items():
+                    approved_per_month[(code, month, year)] += n_days
+                if start.year == first_year + config.years - 1:
+                    leave["paid_days_reserved"] = len(days)
+                    used_this_year[code] += len(days)
+            leaves.append(leave)
+    return leaves, leave_days, approved_per_month, used_this_year
+
+
+def _attendance(config: SeedConfig, rng: random.Random, first_year: int, approved_per_month: Counter) -> list:
+    docs = []
+    for i in range(config.employees):
+        code = employee_code(i)
+        daily = float(rng.choice([2000, 2500, 3000, 5000]))
+        for year in range(first_year, first_year + config.years):
+            for month in range(1, 13):
+                approved = approved_per_month.get((code, month, year), 0)
+                absent = approved + rng.choice([0, 0, 0, 1, 2])
+                unapproved = max(0, absent - approved)
+                docs.append({
+                    "employee_id": code, "month": month, "year": year,
+                    "absent_days": absent, "approved_leaves": approved, "paid_leaves": 0,
+                    "daily_deduction": daily, "unapproved_absence": unapproved,
+                    "total_deduction": unapproved * daily, "unpaid_days": unapproved,
+                })
+    return docs
+
+
+def _jobs(config: SeedConfig, rng: random.Random) -> list:
+    return [
+        {
+            "_id": ObjectId(),
+            "title": rng.choice(TITLES),
+            "description": " ".join(rng.sample(SKILLS, 8)),
+            "requirements": rng.sample(SKILLS, 4),
+            "location": rng.choice(CITIES),
+            "salary_range": "Not Disclosed",
+            "is_active": rng.random() < 0.8,
+            "created_at": datetime(2024, 1, 1) + timedelta(days=rng.randrange(600)),
+        }
+        for _ in range(config.jobs)
+    ]
+
+
+def _applications(config: SeedConfig, rng: random.Random, jobs: list):
+    apps, texts, blobs = [], [], Counter()
+    candidates = max(config.applications // 3, 1)
+    for n in range(config.applications):
+        job = rng.choice(jobs)
+        candidate = rng.randrange(candidates)
+        # Ek candidate ka ek hi CV - content-addressed store mein dedup
+        sha = hashlib.sha256(f"cv-{candidate}".encode()).hexdigest()
+        blobs[sha] += 1
+        app_id = ObjectId()
+        applied_at = datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(600 * 24 * 60))
+        apps.append({
+            "_id": app_id,
+            "job_id": str(job["_id"]),
+            "candidate_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "candidate_email": f"candidate{candidate}@bench.example.com",
+            "cv_url": f"/cv/{sha}.pdf",
+            "cv_sha": sha,
+            "ai_score": rng.randrange(101),
+            "ai_reasoning": "Synthetic score",
+            "status": rng.choice(APPLICATION_STATUSES),
+            "applied_at": applied_at,
+            "scoring_status": "done",
+            "scoring_attempts": 1,
+        })
+        texts.append({
+            "_id": app_id,
+            "job_id": str(job["_id"]),
+            "text": " ".join(rng.choices(SKILLS, k=120)),
+            "updated_at": applied_at,
+        })
+    blob_docs = [{"_id": sha, "size": 150_000, "refs": refs, "created_at": datetime(2024, 1, 1)} for sha, refs in blobs.items()]
+    return apps, texts, blob_docs
+
+
+SEEDED = [
+    employee_collection, leave_collection, leave_days_collection, attendance_collection,
+    job_collection, application_collection, cv_text_collection, cv_blob_collection,
+    application_stats_collection,
+]
+
+
+async def seed(config: SeedConfig) -> dict:
+    """Drop and refill every collection; returns counts and sample keys for the load run."""
+    rng = random.Random(config.seed)
+    first_year = datetime.utcnow().year - config.years + 1
+
+    for collection in SEEDED:
+        await collection.delete_many({})
+
+    employees = _employees(config, rng)
+    leaves, leave_days, approved_per_month, used = _leaves(config, rng, first_year)
+    for emp in employees:
+        emp["paid_leaves_used"] = min(used.get(emp["employee_code"], 0), emp["paid_leaves_total"])
+    attendance = _attendance(config, rng, first_year, approved_per_month)
+    jobs = _jobs(config, rng)
+    apps, texts, blobs = _applications(config, rng, jobs)
+
+    for collection, docs in (
+        (employee_collection, employees), (leave_collection, leaves),
+        (leave_days_collection, leave_days), (attendance_collection, attendance),
+        (job_collection, jobs), (application_collection, apps),
+        (cv_text_collection, texts), (cv_blob_collection, blobs),
+    ):
+        await _insert(collection, docs)
+    # Seed routes ke baghair likhta hai - funnel counters ek recount se
+    await application_stats.reconcile()
+
+    return {
+        "config": asdict(config),
+        "first_year": first_year,
+        "counts": {
+            "employees": len(employees), "leaves": len(leaves), "leave_days": len(leave_days),
+            "attendance": len(attendance), "jobs": len(jobs), "applications": len(apps),
+            "cv_blobs": len(blobs),
+        },
+    }
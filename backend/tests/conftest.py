@@ -0,0 +1,58 @@
+"""Shared fixtures.
+
+mongo:       runs a coroutine against an in-memory mongomock-motor client.
+real_mongo:  the same against a real mongod (MONGO_TEST_URI), for tests that
+             need server behaviour such as explain(); skipped when unset.
+
+Each fixture returns run(fn): fn is an async function, called inside a
+fresh event loop with app.database pointed at a throwaway database.
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from app import database
+
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI")
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    from mongomock_motor import AsyncMongoMockClient
+
+    monkeypatch.setattr(database, "DATABASE_NAME", "HR_System_test")
+
+    def run(fn):
+        async def main():
+            database.client = AsyncMongoMockClient()
+            try:
+                return await fn()
+            finally:
+                database.client = None
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def real_mongo(monkeypatch):
+    if not MONGO_TEST_URI:
+        pytest.skip("MONGO_TEST_URI not set")
+    name = f"HR_System_test_{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(database, "MONGO_URL", MONGO_TEST_URI)
+    monkeypatch.setattr(database, "DATABASE_NAME", name)
+
+    def run(fn):
+        async def main():
+            database.client = None
+            client = database.connect()
+            try:
+                return await fn()
+            finally:
+                await client.drop_database(name)
+                database.close()
+        return asyncio.run(main())
+
+    return run
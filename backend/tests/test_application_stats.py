@@ -0,0 +1,40 @@
+from app import application_stats
+from app.database import application_collection, application_stats_collection
+
+
+def test_a_job_called_all_does_not_share_the_all_jobs_counters(mongo):
+    async def check():
+        await application_collection.insert_many([
+            {"job_id": "all", "status": "Pending"},
+            {"job_id": "J1", "status": "Viewed"},
+        ])
+        await application_stats.count_new("all", "Pending")
+        await application_stats.count_new("J1", "Viewed")
+        drift = await application_stats.reconcile(fix=False)
+        return (
+            drift,
+            await application_stats.get_stats(),
+            await application_stats.get_stats("all"),
+            await application_stats.unviewed_total(),
+        )
+
+    drift, every_job, job_all, unviewed = mongo(check)
+    assert drift["drifted"] == []
+    assert every_job["total"] == 2 and every_job["job_id"] is None
+    assert job_all["total"] == 1 and job_all["job_id"] == "all"
+    assert unviewed == 1
+
+
+def test_reconcile_replaces_the_legacy_all_document(mongo):
+    async def check():
+        await application_collection.insert_one({"job_id": "J1", "status": "Pending"})
+        await application_stats_collection.insert_one({"_id": "all", "counts": {"Pending": 1}, "total": 1})
+        await application_stats.reconcile()
+        return (
+            await application_stats_collection.count_documents({"_id": "all"}),
+            await application_stats.get_stats(),
+        )
+
+    legacy, every_job = mongo(check)
+    assert legacy == 0
+    assert every_job["counts"]["Pending"] == 1
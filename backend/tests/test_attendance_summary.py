@@ -0,0 +1,66 @@
+import asyncio
+
+from pymongo.errors import DuplicateKeyError
+
+from app import attendance_summary, database
+from app.attendance_summary import apply_leave_delta, save_attendance, summary_key
+from app.database import attendance_collection
+
+
+class CountingCollection:
+    """Forwards to the real collection, counts update_one round-trips and can
+    make the first `lose` upserts fail like the loser of an insert race."""
+
+    def __init__(self, collection, lose: int = 0):
+        self._collection = collection
+        self.calls = 0
+        self.lose = lose
+
+    async def update_one(self, *args, **kwargs):
+        self.calls += 1
+        # Doosre coroutines ko beech mein chalne do - sab ek saath "insert" karein
+        await asyncio.sleep(0)
+        if self.lose:
+            self.lose -= 1
+            raise DuplicateKeyError("E11000 duplicate key error (simulated race)")
+        return await self._collection.update_one(*args, **kwargs)
+
+
+def test_parallel_upserts_leave_one_summary(mongo, monkeypatch):
+    counting = CountingCollection(attendance_collection, lose=50)
+    monkeypatch.setattr(attendance_summary, "attendance_collection", counting)
+
+    async def check():
+        await database.ensure_indexes()
+        await asyncio.gather(*(apply_leave_delta("EMP1", 6, 2025, 1) for _ in range(300)))
+        return await attendance_collection.find(summary_key("EMP1", 6, 2025)).to_list(length=None)
+
+    docs = mongo(check)
+    assert len(docs) == 1
+    assert docs[0]["approved_leaves"] == 300
+    # Har call ek round-trip (find + insert/update nahi); race haarne wale ek retry
+    assert counting.calls == 300 + 50
+
+
+def test_save_attendance_recomputes_derived_fields(mongo):
+    async def check():
+        await save_attendance({"employee_id": "EMP1", "month": 6, "year": 2025,
+                               "absent_days": 4, "daily_deduction": 1000.0})
+        await apply_leave_delta("EMP1", 6, 2025, 1)
+        return await attendance_collection.find_one(summary_key("EMP1", 6, 2025))
+
+    doc = mongo(check)
+    assert doc["approved_leaves"] == 1
+    assert doc["unapproved_absence"] == 3
+    assert doc["total_deduction"] == 3000.0
+
+
+def test_parallel_upserts_against_a_real_server(real_mongo):
+    async def check():
+        await database.ensure_indexes()
+        await asyncio.gather(*(apply_leave_delta("EMP1", 6, 2025, 1) for _ in range(300)))
+        return await attendance_collection.find(summary_key("EMP1", 6, 2025)).to_list(length=None)
+
+    docs = real_mongo(check)
+    assert len(docs) == 1
+    assert docs[0]["approved_leaves"] == 300
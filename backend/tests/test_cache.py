@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+from starlette.requests import Request
+
+from app.cache import InMemoryCache, ResponseCache
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/api/jobs/all", "headers": [], "query_string": b""})
+
+
+def test_invalidate_during_a_suspended_fill_does_not_cache_old_data():
+    cache = ResponseCache(InMemoryCache(16), ttl=300)
+    data = {"version": "old"}
+    loads = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def loader():
+            snapshot = dict(data)
+            loads.append(snapshot)
+            if len(loads) == 1:
+                await release.wait()  # purana read abhi chal raha hai
+            return snapshot, {}
+
+        before = asyncio.create_task(cache.respond(_request(), "jobs", loader))
+        while not loads:
+            await asyncio.sleep(0)
+        # Write + invalidate jab pehla loader ruka hua hai
+        data["version"] = "new"
+        await cache.invalidate("jobs")
+        # Purani flight mein shamil hota to yahan atak jata
+        after = await asyncio.wait_for(cache.respond(_request(), "jobs", loader), 1)
+        release.set()
+        first = await before
+        later = await cache.respond(_request(), "jobs", loader)
+        return first, after, later
+
+    first, after, later = asyncio.run(run())
+    assert json.loads(first.body) == {"version": "old"}
+    assert json.loads(after.body) == {"version": "new"}
+    assert json.loads(later.body) == {"version": "new"}
+    assert len(loads) == 2
+    assert cache.stats["stale_fills"] == 1
@@ -0,0 +1,10 @@
+import pytest
+
+from app import database
+from app.database import ClientNotConnected, employee_collection
+
+
+def test_collections_refuse_to_reconnect_after_close(monkeypatch):
+    monkeypatch.setattr(database, "client", None)
+    with pytest.raises(ClientNotConnected):
+        employee_collection.find_one
@@ -0,0 +1,49 @@
+import httpx
+from bson import ObjectId
+
+from app.database import employee_collection
+from app.main import app
+
+
+async def _patch(path: str, body: dict):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.patch(path, json=body)
+
+
+def test_patch_prefers_employee_code_over_object_id(mongo):
+    other_id = ObjectId()
+    # Ek employee ka code doosre ka valid ObjectId hai
+    code = str(other_id)
+
+    async def check():
+        await employee_collection.insert_many([
+            {"_id": other_id, "employee_code": "EMP2", "cnic": "2", "mobile": "old"},
+            {"employee_code": code, "cnic": "1", "mobile": "old"},
+        ])
+        response = await _patch(f"/api/employee/{code}", {"mobile": "new"})
+        return response, await employee_collection.find_one({"_id": other_id})
+
+    response, other = mongo(check)
+    assert response.status_code == 200
+    assert response.json()["employee_code"] == code
+    assert response.json()["mobile"] == "new"
+    assert other["mobile"] == "old"
+
+
+def test_patch_falls_back_to_object_id(mongo):
+    emp_id = ObjectId()
+
+    async def check():
+        await employee_collection.insert_one({"_id": emp_id, "employee_code": "EMP1", "cnic": "1", "password": "x"})
+        return await _patch(f"/api/employee/{emp_id}", {"mobile": "0300"})
+
+    response = mongo(check)
+    assert response.status_code == 200
+    assert response.json()["mobile"] == "0300"
+    assert "password" not in response.json()
+
+
+def test_patch_unknown_employee_is_404(mongo):
+    response = mongo(lambda: _patch("/api/employee/NOPE", {"mobile": "1"}))
+    assert response.status_code == 404
@@ -0,0 +1,51 @@
+import httpx
+
+from app import idempotency
+from app.idempotency import MAX_STORED_BODY, IdempotencyMiddleware
+
+
+def _app(calls: list, size: int):
+    async def app(scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+        calls.append(1)
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"x" * size})
+    return app
+
+
+async def _post_twice(app, first: bytes, second: bytes):
+    transport = httpx.ASGITransport(app=IdempotencyMiddleware(app, routes={("POST", "/create")}))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = {"Idempotency-Key": "k1"}
+        return (
+            await client.post("/create", content=first, headers=headers),
+            await client.post("/create", content=second, headers=headers),
+        )
+
+
+def test_small_response_is_replayed(mongo, monkeypatch):
+    monkeypatch.setattr(idempotency, "_completed", idempotency.TTLCache(16))
+    calls = []
+    first, again = mongo(lambda: _post_twice(_app(calls, 10), b"body", b"body"))
+    assert (first.status_code, again.status_code) == (201, 201)
+    assert again.headers[idempotency.REPLAYED_HEADER] == "true"
+    assert calls == [1]
+
+
+def test_response_too_big_to_store_is_not_run_again(mongo, monkeypatch):
+    monkeypatch.setattr(idempotency, "_completed", idempotency.TTLCache(16))
+    calls = []
+    first, again = mongo(lambda: _post_twice(_app(calls, MAX_STORED_BODY + 1), b"body", b"body"))
+    assert first.status_code == 201
+    assert len(first.content) == MAX_STORED_BODY + 1
+    assert again.status_code == 409
+    assert calls == [1]
+
+
+def test_key_reused_with_another_body_is_422(mongo, monkeypatch):
+    monkeypatch.setattr(idempotency, "_completed", idempotency.TTLCache(16))
+    calls = []
+    first, again = mongo(lambda: _post_twice(_app(calls, MAX_STORED_BODY + 1), b"body", b"other"))
+    assert (first.status_code, again.status_code) == (201, 422)
+    assert calls == [1]
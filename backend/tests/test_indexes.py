@@ -0,0 +1,59 @@
+import pytest
+
+from app import database
+from app.database import (
+    application_collection,
+    attendance_collection,
+    employee_collection,
+    job_collection,
+    leave_collection,
+)
+
+# (collection, filter) - the lookups the routes do on every request
+HOT_QUERIES = [
+    (employee_collection, {"email": "ali@example.com"}),
+    (employee_collection, {"cnic": "4210100000001"}),
+    (employee_collection, {"employee_code": "EMP00001"}),
+    (attendance_collection, {"employee_id": "EMP00001", "month": 6, "year": 2025}),
+    (attendance_collection, {"month": 6, "year": 2025}),
+    (leave_collection, {"employee_id": "EMP00001", "status": "Approved"}),
+    (leave_collection, {"status": "Pending"}),
+    (application_collection, {"job_id": "665f00000000000000000001"}),
+    (application_collection, {"candidate_email": "a@example.com"}),
+    (job_collection, {"is_active": True}),
+]
+
+
+@pytest.mark.parametrize("collection,query", HOT_QUERIES, ids=lambda v: getattr(v, "name", None) or ",".join(v))
+def test_hot_queries_use_an_index(real_mongo, collection, query):
+    async def check():
+        await database.ensure_indexes()
+        await collection.insert_one({**query, "seeded": True})
+        return await collection.find(query).explain()
+
+    plan = str(real_mongo(check)["queryPlanner"]["winningPlan"])
+    assert "IXSCAN" in plan
+    assert "COLLSCAN" not in plan
+
+
+def test_startup_fails_when_a_unique_index_cannot_be_built(mongo):
+    async def check():
+        # Purana data: do employees ek hi CNIC ke saath
+        await employee_collection.insert_many([
+            {"employee_code": "EMP1", "cnic": "4210100000001"},
+            {"employee_code": "EMP2", "cnic": "4210100000001"},
+        ])
+        with pytest.raises(database.MissingUniqueIndex, match="cnic"):
+            await database.ensure_indexes()
+
+    mongo(check)
+
+
+def test_ensure_indexes_is_idempotent(mongo):
+    async def check():
+        await database.ensure_indexes()
+        await database.ensure_indexes()
+        return await employee_collection.index_information()
+
+    indexes = mongo(check)
+    assert any(info.get("unique") and info["key"] == [("cnic", 1)] for info in indexes.values())
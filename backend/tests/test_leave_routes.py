@@ -0,0 +1,135 @@
+import time
+from datetime import datetime
+
+import httpx
+from bson import ObjectId
+
+from app import leave_balance, security
+from app.database import employee_collection, leave_collection
+from app.main import app
+from app.migrations import backfill_paid_leave_reservations
+from app.routes import leave_routes
+
+
+async def _call(method: str, path: str, body: dict):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, path, json=body)
+
+
+def _leave(leave_type: str, start: str, end: str, status: str = "Pending") -> dict:
+    return {
+        "employee_id": "EMP1", "start_date": start, "end_date": end,
+        "reason": "test", "leave_type": leave_type, "status": status,
+    }
+
+
+def test_only_paid_leave_is_checked_against_the_balance(mongo):
+    async def check():
+        await employee_collection.insert_one({"employee_code": "EMP1", "paid_leaves_total": 2, "paid_leaves_used": 0})
+        sick = await _call("POST", "/api/leaves/request", _leave("Sick Leave", "2026-03-02", "2026-03-06"))
+        casual = await _call("POST", "/api/leaves/request", _leave("Casual Leave", "2026-04-06", "2026-04-10"))
+        approved = await _call("PATCH", f"/api/leaves/status/{sick.json()['id']}", {"status": "Approved"})
+        employee = await employee_collection.find_one({"employee_code": "EMP1"})
+        return sick, casual, approved, employee
+
+    sick, casual, approved, employee = mongo(check)
+    assert sick.status_code == 200
+    assert casual.status_code == 400
+    assert approved.status_code == 200
+    assert employee["paid_leaves_used"] == 0
+
+
+def test_approving_a_leave_of_an_unknown_employee_is_404(mongo):
+    async def check():
+        casual = await leave_collection.insert_one(
+            {**_leave("Casual", "x", "x"), "start_date": datetime(2026, 3, 2), "end_date": datetime(2026, 3, 3)}
+        )
+        sick = await leave_collection.insert_one(
+            {**_leave("Sick", "x", "x"), "start_date": datetime(2026, 4, 2), "end_date": datetime(2026, 4, 3)}
+        )
+        return [
+            await _call("PATCH", f"/api/leaves/status/{leave_id}", {"status": "Approved"})
+            for leave_id in (casual.inserted_id, sick.inserted_id)
+        ]
+
+    for response in mongo(check):
+        assert response.status_code == 404
+
+
+def test_overlap_missed_by_the_pre_check_is_caught_after_insert(mongo, monkeypatch):
+    real_find_overlap = leave_balance.find_overlap
+    calls = []
+
+    async def racing_find_overlap(*args, **kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            # Pre-check ke waqt doosri request abhi insert nahi hui thi
+            return None
+        return await real_find_overlap(*args, **kwargs)
+
+    monkeypatch.setattr(leave_routes, "find_overlap", racing_find_overlap)
+
+    async def check():
+        await employee_collection.insert_one({"employee_code": "EMP1", "paid_leaves_total": 20, "paid_leaves_used": 0})
+        await leave_collection.insert_one({
+            **_leave("Casual", "x", "x"), "start_date": datetime(2026, 3, 4), "end_date": datetime(2026, 3, 5),
+        })
+        response = await _call(
+            "POST", "/api/leaves/request", _leave("Casual", "2026-03-02", "2026-03-06", status="Approved")
+        )
+        employee = await employee_collection.find_one({"employee_code": "EMP1"})
+        return response, await leave_collection.count_documents({}), employee
+
+    response, leaves, employee = mongo(check)
+    assert response.status_code == 409
+    assert leaves == 1
+    assert employee["paid_leaves_used"] == 0
+    assert "older_than" in calls[1]
+
+
+def test_backfill_reserves_previously_approved_paid_leaves(mongo):
+    async def check():
+        await employee_collection.insert_many([
+            # Purane payroll write-back ne Sick ke din bhi gine the
+            {"employee_code": "EMP1", "paid_leaves_total": 20, "paid_leaves_used": 7},
+            {"employee_code": "EMP2", "paid_leaves_total": 20, "paid_leaves_used": 0},
+        ])
+        await leave_collection.insert_many([
+            {**_leave("Casual", "x", "x", "Approved"), "start_date": datetime(2026, 3, 2), "end_date": datetime(2026, 3, 4)},
+            {**_leave("Sick", "x", "x", "Approved"), "start_date": datetime(2026, 4, 2), "end_date": datetime(2026, 4, 5)},
+            {**_leave("Annual", "x", "x", "Pending"), "start_date": datetime(2026, 5, 2), "end_date": datetime(2026, 5, 5)},
+            {**_leave("Casual", "x", "x", "Approved"), "employee_id": "EMP2",
+             "start_date": datetime(2026, 3, 2), "end_date": datetime(2026, 3, 2), "paid_days_reserved": 1},
+        ])
+        first = await backfill_paid_leave_reservations()
+        second = await backfill_paid_leave_reservations()
+        used = {
+            emp["employee_code"]: emp["paid_leaves_used"]
+            async for emp in employee_collection.find({}, {"employee_code": 1, "paid_leaves_used": 1})
+        }
+        return first, second, used
+
+    first, second, used = mongo(check)
+    assert first["leaves"] == 2
+    assert used == {"EMP1": 3, "EMP2": 1}
+    assert second == {"leaves": 0, "employees_updated": 0, "skipped": []}
+
+
+def test_reserve_and_release_drop_the_cached_employee(mongo):
+    emp_id = ObjectId()
+    stale = {"_id": str(emp_id), "paid_leaves_used": 0}
+
+    async def check():
+        await employee_collection.insert_one({"_id": emp_id, "employee_code": "EMP1", "paid_leaves_total": 20})
+        leave = await leave_collection.insert_one(
+            {**_leave("Casual", "x", "x"), "start_date": datetime(2026, 3, 2), "end_date": datetime(2026, 3, 3)}
+        )
+        cached = []
+        for status in ("Approved", "Rejected"):
+            security._employee_cache.set(str(emp_id), stale, time.time() + 60)
+            await _call("PATCH", f"/api/leaves/status/{leave.inserted_id}", {"status": status})
+            cached.append(security._employee_cache.get(str(emp_id)))
+        return cached
+
+    assert mongo(check) == [None, None]
@@ -0,0 +1,53 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.requests import Request
+
+from app.live import broadcaster
+from app.main import app
+from app.routes import live_routes
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/api/live/stream", "headers": [], "query_string": b""})
+
+
+def test_failed_count_leaves_no_subscriber(monkeypatch):
+    async def broken_count():
+        raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(live_routes, "unviewed_count", broken_count)
+
+    async def get():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/live/stream")
+
+    before = broadcaster.stats()["subscribers"]
+    assert asyncio.run(get()).status_code == 500
+    assert broadcaster.stats()["subscribers"] == before
+
+
+@pytest.mark.parametrize("read_first", [False, True])
+def test_stream_unsubscribes_when_closed(monkeypatch, read_first):
+    async def count():
+        return 3
+
+    monkeypatch.setattr(live_routes, "unviewed_count", count)
+
+    async def stream():
+        before = broadcaster.stats()["subscribers"]
+        response = await live_routes.live_stream(_request(), "leaves,unviewed")
+        body = response.body_iterator
+        if read_first:
+            assert await body.__anext__() == b"retry: 3000\n\n"
+            assert broadcaster.stats()["subscribers"] == before + 1
+        else:
+            # Client response shuru hone se pehle chala gaya - koi subscriber bana hi nahi
+            assert broadcaster.stats()["subscribers"] == before
+        await body.aclose()
+        return before, broadcaster.stats()["subscribers"]
+
+    before, after = asyncio.run(stream())
+    assert after == before
@@ -0,0 +1,22 @@
+from app import metrics
+
+
+def test_every_family_is_contiguous_after_its_type_line(monkeypatch):
+    monkeypatch.setattr(metrics, "_route_db", {("GET", "/a"): [0.5, 2, 10], ("GET", "/b"): [0.1, 1, 1]})
+    monkeypatch.setattr(metrics, "_mongo", {("find", "leaves"): [3, 0.2, 30], ("insert", "jobs"): [1, 0.1, 0]})
+
+    typed, finished, current = set(), set(), None
+    for line in metrics.render().splitlines():
+        if line.startswith("# TYPE "):
+            current = line.split()[2]
+            assert current not in typed
+            typed.add(current)
+            continue
+        family = line.split("{")[0].split()[0]
+        # Histogram ke _bucket/_sum/_count apni family ke hain
+        for suffix in ("_bucket", "_sum", "_count"):
+            if family.endswith(suffix) and family[: -len(suffix)] == current:
+                family = current
+        assert family == current, line
+        finished.add(family)
+    assert {"http_request_db_queries_total", "mongo_command_seconds_total", "mongo_documents_returned_total"} <= finished
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from app import payroll
+from app.database import attendance_collection, employee_collection, leave_collection, leave_days_collection
+from app.leave_calendar import expand_leave_days
+
+
+async def _approved(code: str, leave_type: str, start: datetime, end: datetime):
+    leave = {"_id": ObjectId(), "employee_id": code, "leave_type": leave_type, "status": "Approved",
+             "start_date": start, "end_date": end}
+    await leave_collection.insert_one(leave)
+    await leave_days_collection.insert_many([
+        {"leave_id": leave["_id"], "employee_id": code, "date": day, "month": day.month, "year": day.year}
+        for day in expand_leave_days(start, end)
+    ])
+
+
+def test_sick_days_are_neither_charged_nor_excess(mongo):
+    async def check():
+        await employee_collection.insert_many([
+            # Balance kaafi hai
+            {"employee_code": "EMP1", "salary": 10_000.0, "paid_leaves_total": 20, "paid_leaves_used": 3},
+            # Balance mein sirf 2 din, 3 Casual reserve ho chuke (purana data)
+            {"employee_code": "EMP2", "salary": 10_000.0, "paid_leaves_total": 2, "paid_leaves_used": 3},
+        ])
+        for code in ("EMP1", "EMP2"):
+            await _approved(code, "Casual Leave", datetime(2026, 3, 2), datetime(2026, 3, 4))
+            await _approved(code, "Sick", datetime(2026, 3, 16), datetime(2026, 3, 17))
+            await attendance_collection.insert_one({
+                "employee_id": code, "month": 3, "year": 2026,
+                "absent_days": 5, "approved_leaves": 5, "daily_deduction": 100.0,
+            })
+        cols = await payroll.load_month(3, 2026)
+        return cols, payroll.compute(cols)
+
+    cols, result = mongo(check)
+    rows = {code: i for i, code in enumerate(cols["employee_code"])}
+    assert cols["paid_leave_days"].tolist() == [3, 3]
+    emp1, emp2 = rows["EMP1"], rows["EMP2"]
+    assert result["leaves_charged"][emp1] == 3
+    assert result["excess_leaves"][emp1] == 0
+    assert result["deduction"][emp1] == 0
+    # Sirf teesra Casual din balance se bahar - Sick ke 2 din nahi
+    assert result["leaves_charged"][emp2] == 2
+    assert result["excess_leaves"][emp2] == 1
+    assert result["deduction"][emp2] == 100.0
+    assert result["unapproved_absence"].tolist() == [0, 0]
@@ -0,0 +1,17 @@
+import asyncio
+
+from app import database
+from benchmarks.pool import run_case
+
+
+def test_workers_stay_within_their_pools(real_mongo):
+    async def check():
+        await database.employee_collection.insert_many(
+            [{"employee_code": f"EMP{i:05d}", "cnic": str(i)} for i in range(20)]
+        )
+        return await asyncio.to_thread(run_case, database.MONGO_URL, database.DATABASE_NAME, 2, 3, 16, 1.5, 5000)
+
+    result = real_mongo(check)
+    assert "errors" not in result
+    assert set(result["statuses"]) <= {"200", "404"}
+    assert result["server_connections_added"] <= result["server_connections_limit"]
@@ -0,0 +1,35 @@
+import asyncio
+
+from app import scoring
+
+
+def test_worker_survives_a_failing_fail(monkeypatch):
+    claims = []
+
+    async def claim():
+        claims.append(1)
+        return {"_id": len(claims)} if len(claims) <= 2 else None
+
+    async def process(app_doc):
+        raise ValueError("bad pdf")
+
+    async def fail(app_doc, error):
+        raise ConnectionError("mongo down")
+
+    monkeypatch.setattr(scoring, "_claim", claim)
+    monkeypatch.setattr(scoring, "_process", process)
+    monkeypatch.setattr(scoring, "_fail", fail)
+    monkeypatch.setattr(scoring, "SCORING_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(scoring, "_wakeup", asyncio.Event())
+
+    async def run():
+        worker = asyncio.create_task(scoring._worker())
+        await asyncio.sleep(0.05)
+        alive = not worker.done()
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        return alive
+
+    assert asyncio.run(run())
+    # Dono docs ke baad bhi worker queue dekhta raha
+    assert len(claims) > 2
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from app import search_index
+from app.database import cv_text_collection
+from app.search_index import InvertedIndex
+
+
+def test_refresh_picks_up_a_cv_saved_at_the_watermark_time(mongo, monkeypatch):
+    monkeypatch.setattr(search_index, "cv_index", InvertedIndex())
+    monkeypatch.setattr(search_index, "_watermark", datetime.min)
+    monkeypatch.setattr(search_index, "_seen_at_watermark", set())
+    saved_at = datetime(2026, 3, 2, 10, 0, 0, 123000)
+
+    async def check():
+        await cv_text_collection.insert_one({"_id": "A", "job_id": "J1", "text": "python", "updated_at": saved_at})
+        await search_index.refresh()
+        # Doosre process ki CV, usi millisecond mein, pichhle refresh ke baad
+        await cv_text_collection.insert_one({"_id": "B", "job_id": "J1", "text": "django", "updated_at": saved_at})
+        await search_index.refresh()
+        await search_index.refresh()
+
+    mongo(check)
+    assert sorted(search_index.cv_index.doc_len) == ["A", "B"]
+    assert search_index._seen_at_watermark == {"A", "B"}
+
+
+def test_remove_drops_only_the_documents_postings():
+    index = InvertedIndex()
+    index.add("1", "python fastapi mongodb")
+    index.add("2", "python react")
+    index.add("1", "golang")  # re-index replaces the old terms
+    index.remove("2")
+    assert dict(index.postings) == {"golang": {"1": 1}}
+    assert index.doc_terms == {"1": ["golang"]}
+    assert index.total_len == 1
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app import security
+from app.security import LoginRateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(security.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_limiter_blocks_after_limit_and_forgets_after_window(clock):
+    limiter = LoginRateLimiter(limit=2, window=60)
+    limiter.check("A@x.pk")
+    limiter.check("a@x.pk")
+    with pytest.raises(HTTPException) as error:
+        limiter.check("a@x.pk")
+    assert error.value.status_code == 429
+    clock[0] += 61
+    limiter.check("a@x.pk")
+
+
+def test_limiter_drops_expired_emails(clock):
+    limiter = LoginRateLimiter(limit=5, window=60)
+    for i in range(1000):
+        limiter.check(f"user{i}@x.pk")
+    assert len(limiter) == 1000
+    clock[0] += 61
+    limiter.check("late@x.pk")
+    assert len(limiter) == 1
+
+
+def test_limiter_is_capped_at_max_keys(clock):
+    limiter = LoginRateLimiter(limit=5, window=60, max_keys=100)
+    for i in range(1000):
+        limiter.check(f"user{i}@x.pk")
+    assert len(limiter) == 100
+
+
+def test_hash_slots_work_across_event_loops(monkeypatch):
+    monkeypatch.setattr(security, "HASH_CONCURRENCY", 1)
+    monkeypatch.setattr(security, "_hash_slots", security.weakref.WeakKeyDictionary())
+
+    async def busy():
+        # Slot ke liye intezar ho - Semaphore loop se tab hi bandhta hai
+        await asyncio.gather(*(security._run(time.sleep, 0.01) for _ in range(3)))
+
+    try:
+        asyncio.run(busy())
+        asyncio.run(busy())
+    finally:
+        security.shutdown_executor()
@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+
+from app.main import app
+from app.uploads import UploadLimitMiddleware
+
+LIMIT = 1000
+ROUTE = ("POST", "/upload")
+
+
+def _scope(headers=()):
+    return {"type": "http", "method": "POST", "path": "/upload", "headers": list(headers)}
+
+
+async def _parsing_app(scope, receive, send):
+    """Reads the whole body like the form parser, then answers 200."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("client disconnected")
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _run(scope, chunks):
+    sent, received = [], []
+
+    async def receive():
+        chunk = chunks[len(received)]
+        received.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": len(received) < len(chunks)}
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = UploadLimitMiddleware(_parsing_app, {ROUTE: LIMIT})
+    asyncio.run(middleware(scope, receive, send))
+    return sent[0]["status"], len(received)
+
+
+def test_content_length_over_the_limit_is_413_without_reading_the_body():
+    status, received = _run(_scope([(b"content-length", b"5000")]), [b"x" * 5000])
+    assert status == 413
+    assert received == 0
+
+
+def test_body_without_content_length_is_cut_off_at_the_limit():
+    status, received = _run(_scope(), [b"x" * 400] * 10)
+    assert status == 413
+    assert received == 3
+
+
+def test_body_within_the_limit_reaches_the_app():
+    status, received = _run(_scope(), [b"x" * 400, b"x" * 400])
+    assert status == 200
+    assert received == 2
+
+
+def test_apply_file_rejects_an_oversized_upload_before_parsing(mongo):
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/applications/apply-file",
+                data={"job_id": "J1", "candidate_name": "A", "candidate_email": "a@example.com"},
+                files={"file": ("cv.pdf", b"%PDF-" + b"x" * (6 * 1024 * 1024), "application/pdf")},
+            )
+
+    assert mongo(post).status_code == 413
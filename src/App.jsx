@@ -12,7 +12,7 @@ import ApplicantApplications from './pages/ApplicantApplications/ApplicantApplic
 import AdminOpenings from './pages/AdminOpenings/AdminOpenings'
 import AdminLeaves from './pages/AdminLeaves/AdminLeaves'
 import AdminAttendance from './pages/AdminAttendance/AdminAttendance'
-import { getAllApplications } from './api'
+import { subscribeLive } from './api'
 import './App.css'
 
 function App() {
@@ -90,29 +90,13 @@ function App() {
     navigate('/login', { replace: true })
   }
 
-  // Fetch unviewed CVs count for admin
+  // Unviewed CVs count for admin - server push karta hai (status 'Unviewed', 'Pending' ya koi status nahi)
   useEffect(() => {
-    const loadUnviewedCount = async () => {
-      if (userRole === 'administrator' || userRole === 'admin') {
-        try {
-          const res = await getAllApplications()
-          const apps = res.data || []
-          // Count applications with status 'Unviewed' or no status
-          const unviewed = apps.filter(app => 
-            !app.status || app.status === 'Unviewed' || app.status === 'Pending'
-          ).length
-          setUnviewedCVsCount(unviewed)
-        } catch (err) {
-          console.error('Error loading unviewed CVs count', err)
-        }
-      }
-    }
-
-    if (isLoggedIn) {
-      loadUnviewedCount()
-      // Refresh count every 30 seconds
-      const interval = setInterval(loadUnviewedCount, 30000)
-      return () => clearInterval(interval)
+    if (isLoggedIn && (userRole === 'administrator' || userRole === 'admin')) {
+      const source = subscribeLive(['unviewed'], {
+        unviewed: (data) => setUnviewedCVsCount(data.count),
+      })
+      return () => source.close()
     }
   }, [isLoggedIn, userRole])
 
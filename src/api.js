@@ -15,24 +15,56 @@ API.interceptors.request.use((req) => {
   return req;
 });
 
+// 3. RETRY-SAFE POST (Idempotency-Key)
+// Network error ya "abhi process ho raha hai" (409 + Retry-After) par wahi key ke
+// saath dobara bhejo - server pehli response lauta deta hai, duplicate nahi banta
+const postOnce = async (url, data, retries = 2) => {
+  const headers = { 'Idempotency-Key': crypto.randomUUID() };
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await API.post(url, data, { headers });
+    } catch (err) {
+      const inProgress = err.response?.status === 409 && err.response.headers['retry-after'];
+      if ((err.response && !inProgress) || attempt >= retries) throw err;
+      await new Promise((resolve) => setTimeout(resolve, 1000 * (attempt + 1)));
+    }
+  }
+};
+
+// 4. POORI LIST ("/all" endpoints pages mein aate hain, agla cursor X-Next-Cursor header mein)
+// limit/after na diya ho to saare pages jor kar ek hi response - purane callers ko poori list milti hai
+const PAGE_SIZE = 1000;
+const getAllPages = async (url, params = {}) => {
+  if (params.limit || params.after) return API.get(url, { params });
+  const first = await API.get(url, { params: { ...params, limit: PAGE_SIZE } });
+  let data = first.data || [];
+  let cursor = first.headers['x-next-cursor'];
+  while (cursor) {
+    const res = await API.get(url, { params: { ...params, limit: PAGE_SIZE, after: cursor } });
+    data = data.concat(res.data || []);
+    cursor = res.headers['x-next-cursor'];
+  }
+  return { ...first, data };
+};
+
 // --- SAARI APIS EK JAGAH ---
 
 // A. AUTHENTICATION
 export const signup = (data) => API.post('/employee/signup', data);
 export const login = (data) => API.post('/employee/login', data);
-export const getAllEmployees = () => API.get('/employee/all');
+export const getAllEmployees = (params) => getAllPages('/employee/all', params);
 export const getEmployee = (employeeCode) => API.get(`/employee/${employeeCode}`);
 export const updateEmployee = (employeeCode, data) => API.patch(`/employee/${employeeCode}`, data);
-export const addEmployee = (data) => API.post('/employee/add', data);
+export const addEmployee = (data) => postOnce('/employee/add', data);
 
 // B. JOBS (HR Jobs post karega, Candidates dekhenge)
-export const createJob = (jobData) => API.post('/jobs/create', jobData);
-export const getAllJobs = () => API.get('/jobs/all');
+export const createJob = (jobData) => postOnce('/jobs/create', jobData);
+export const getAllJobs = (params) => getAllPages('/jobs/all', params);
 
 // C. LEAVES (Employee request karega, HR dekhega)
-export const requestLeave = (leaveData) => API.post('/leaves/request', leaveData);
+export const requestLeave = (leaveData) => postOnce('/leaves/request', leaveData);
 export const getMyLeaves = (employeeId) => API.get(`/leaves/employee/${employeeId}`);
-export const getAllLeaves = () => API.get('/leaves/all');
+export const getAllLeaves = (params) => getAllPages('/leaves/all', params);
 export const updateLeaveStatus = (leaveId, status, admin_comments) =>
   API.patch(`/leaves/status/${leaveId}`, { status, admin_comments });
 
@@ -44,11 +76,27 @@ export const getEmployeeAttendance = (employeeId, month, year) =>
 export const upsertAttendance = (data) => API.post('/attendance/upsert', data);
 
 // D. APPLICATIONS (CV Upload karna)
-export const applyForJob = (applicationData) => API.post('/applications/apply-file', applicationData);
+export const applyForJob = (applicationData) => postOnce('/applications/apply-file', applicationData);
 export const getApplicationsForJob = (jobId) => API.get(`/applications/${jobId}`);
 export const getApplicationsByCandidate = (candidateEmail) => API.get(`/applications/candidate/${candidateEmail}`);
-export const getAllApplications = () => API.get('/applications/all');
+export const getAllApplications = (params) => getAllPages('/applications/all', params);
+// Status counters (total, counts per status, unviewed) - jobId na do to saari jobs
+export const getApplicationStats = (jobId) =>
+  API.get('/applications/stats', { params: jobId ? { job_id: jobId } : {} });
 export const updateApplicationStatus = (applicationId, status) =>
   API.patch(`/applications/${applicationId}/status`, { status });
 
+// E. LIVE UPDATES (Server-Sent Events - polling ki jagah)
+// handlers: { leaves, applications, unviewed, reset } -> har event ka parsed data
+// EventSource reconnect par Last-Event-ID khud bhejta hai. Band karne ke liye .close()
+export const subscribeLive = (topics, handlers) => {
+  const source = new EventSource(`${BACKEND_URL}/api/live/stream?topics=${topics.join(',')}`);
+  [...topics, 'reset'].forEach((name) => {
+    if (handlers[name]) {
+      source.addEventListener(name, (e) => handlers[name](JSON.parse(e.data)));
+    }
+  });
+  return source;
+};
+
 export default API;
\ No newline at end of file
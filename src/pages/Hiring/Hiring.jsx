@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react'
-import { getAllJobs, getApplicationsForJob, BACKEND_URL, updateApplicationStatus } from '../../api'
+import { getAllJobs, getApplicationsForJob, getApplicationStats, BACKEND_URL, updateApplicationStatus } from '../../api'
 import CVList from './components/CVList/CVList'
 import PositionFilter from './components/PositionFilter/PositionFilter'
 import ManualReview from './components/ManualReview/ManualReview'
@@ -14,6 +14,9 @@ function Hiring() {
   const [jobs, setJobs] = useState([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState('')
+  // Server-side counters - poori list download kiye baghair
+  const [stats, setStats] = useState(null)
+  const [selectedJobId, setSelectedJobId] = useState(null)
 
   const positions = ['All Positions', ...jobs.map((j) => j.title)]
 
@@ -22,10 +25,32 @@ function Hiring() {
       ? cvs.filter((cv) => cv.position === selectedPosition)
       : cvs
 
-  const unviewedCount = cvs.filter(cv => cv.status === 'Unviewed').length
+  // Counters usi job ke jo list mein dikh rahi hai
+  const loadStats = async (jobId = selectedJobId) => {
+    if (!jobId) {
+      setStats(null)
+      return
+    }
+    try {
+      const res = await getApplicationStats(jobId)
+      setStats(res.data)
+    } catch (err) {
+      console.error('Error loading application stats', err)
+    }
+  }
+
+  // Backend ka "unviewed" Pending + Unviewed hai (sidebar badge aur CVList jaisa)
+  const unviewedCount = stats
+    ? stats.unviewed
+    : cvs.filter(cv => cv.status === 'Unviewed' || cv.status === 'Pending').length
+
+  useEffect(() => {
+    loadStats(selectedJobId)
+  }, [selectedJobId])
 
   useEffect(() => {
     const loadApplicationsForJob = async (jobId, jobTitle) => {
+      setSelectedJobId(jobId || null)
       if (!jobId) {
         setCVs([])
         return
@@ -128,6 +153,7 @@ function Hiring() {
     )
     try {
       await updateApplicationStatus(cv.id, newStatus)
+      loadStats()
     } catch (err) {
       console.error('Error updating status', err)
       // Revert if failed
@@ -147,11 +173,21 @@ function Hiring() {
           <h2 className="section-heading">Hiring</h2>
           <div className="stats-info">
             <span className="stat-item">
-              Total CVs: <strong>{cvs.length}</strong>
+              Total CVs: <strong>{stats ? stats.total : cvs.length}</strong>
             </span>
             <span className="stat-item unviewed">
-              Unviewed: <strong>{unviewedCount}</strong>
+              Unviewed / Pending: <strong>{unviewedCount}</strong>
             </span>
+            {stats && (
+              <>
+                <span className="stat-item">
+                  Shortlisted: <strong>{stats.counts.Shortlisted}</strong>
+                </span>
+                <span className="stat-item">
+                  Rejected: <strong>{stats.counts.Rejected}</strong>
+                </span>
+              </>
+            )}
           </div>
         </div>
 